@@ -0,0 +1 @@
+# /dev/__init__.py
@@ -0,0 +1,295 @@
+# /dev/bench.py
+
+# End-to-end timings of the app against the local stand-in backend, driven through Streamlit's AppTest.
+#   python -m dev.bench --conversations 100 --turns 50 --repeat 10
+#   python -m dev.bench --compare dev/results/before.json dev/results/after.json --max-regression 20
+# Every run is written to dev/results/ as JSON so runs can be compared later.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from dev.fake_backend import FakeBackendConfig, FakeBackendServer, start_fake_backend
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "dev" / "results"
+APP_TIMEOUT = 60
+
+SCENARIOS = (
+    "cold_start", "login_imports", "login_to_home", "sidebar_render", "rerun_overhead", "conversation_open", "send_message"
+)
+
+
+def _git_rev() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _app_secrets(server_secrets: Dict[str, object], conversations: int) -> Dict[str, object]:
+    # Render every seeded conversation in the sidebar and log in without touching the form
+    return {
+        **server_secrets,
+        "AUTO_LOGIN": 1,
+        "CONVERSATION_PAGE_SIZE": conversations,
+    }
+
+
+def _new_app(secrets: Dict[str, object]):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(str(ROOT / "main.py"), default_timeout=APP_TIMEOUT)
+    for key, value in secrets.items():
+        at.secrets[key] = value
+    return at
+
+
+def _run(at):
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"App raised: {at.exception[0].value}")
+    return at
+
+
+def _timed(func: Callable[[], object]) -> float:
+    started = time.perf_counter()
+    func()
+    return (time.perf_counter() - started) * 1000
+
+
+def _cold_start(secrets: Dict[str, object]) -> float:
+    """
+    First run of the app (imports included) in a fresh interpreter, timed by the child process.
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", "dev.bench", "--cold-start-child"],
+        cwd=ROOT,
+        env={**os.environ, "BENCH_SECRETS": json.dumps(secrets)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _cold_start_child():
+    started = time.perf_counter()
+    at = _new_app(json.loads(os.environ["BENCH_SECRETS"]))
+    _run(at)
+    print((time.perf_counter() - started) * 1000)
+
+
+def _login_imports(secrets: Dict[str, object]) -> float:
+    """
+    Importing what the login page needs in a fresh interpreter, timed by the child process.
+    """
+    result = subprocess.run(
+        [sys.executable, "-m", "dev.bench", "--login-imports-child"],
+        cwd=ROOT,
+        env={**os.environ, "BENCH_SECRETS": json.dumps(secrets)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def _login_imports_child():
+    import streamlit as st
+    from streamlit.runtime.secrets import Secrets
+
+    # Modules read their secrets at import, they are injected the same way AppTest does it
+    secrets = Secrets()
+    secrets._secrets = json.loads(os.environ["BENCH_SECRETS"])
+    st.secrets = secrets
+
+    started = time.perf_counter()
+    import src.components  # noqa: F401
+    import src.pages
+
+    src.pages.render_login_ui
+    print((time.perf_counter() - started) * 1000)
+
+
+def _rerun_overhead(at) -> float:
+    """
+    A rerun of the home page minus the time spent rendering the sidebar, what every rerun pays for setup.
+    """
+    from src.utils.telemetry import get_span_recorder
+
+    started = time.time()
+    total = _timed(lambda: _run(at))
+    rendering = sum(
+        s.duration_ms for s in get_span_recorder().spans() if s.name == "render_sidebar" and s.start >= started
+    )
+    return total - rendering
+
+
+def _login(at):
+    _run(at)
+    if at.session_state["page"] != "home":
+        raise RuntimeError(f"Expected the home page after login, got '{at.session_state['page']}'")
+
+
+def run_once(secrets: Dict[str, object], scenarios: List[str], message: str) -> Dict[str, float]:
+    timings = {}
+    if "cold_start" in scenarios:
+        timings["cold_start"] = _cold_start(secrets)
+    if "login_imports" in scenarios:
+        timings["login_imports"] = _login_imports(secrets)
+
+    at = _new_app(secrets)
+    timings["login_to_home"] = _timed(lambda: _login(at))
+
+    # A plain rerun of the home page, the conversation list is already in session state
+    timings["sidebar_render"] = _timed(lambda: _run(at))
+    if "rerun_overhead" in scenarios:
+        timings["rerun_overhead"] = _rerun_overhead(at)
+
+    at.session_state["clicked_convo_id"] = at.session_state["convos"][0]["id"]
+    timings["conversation_open"] = _timed(lambda: _run(at))
+
+    if "send_message" in scenarios:
+        at.chat_input[0].set_value(message)
+        timings["send_message"] = _timed(lambda: _run(at))
+
+    return {name: ms for name, ms in timings.items() if name in scenarios}
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "median_ms": round(statistics.median(ordered), 1),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 1),
+        "min_ms": round(ordered[0], 1),
+        "max_ms": round(ordered[-1], 1),
+    }
+
+
+def run_benchmark(config: FakeBackendConfig, repeat: int, scenarios: List[str], message: str) -> Dict:
+    server: FakeBackendServer = start_fake_backend(config=config)
+    secrets = _app_secrets(server.secrets(), config.conversations)
+    os.chdir(ROOT)
+    try:
+        samples: Dict[str, List[float]] = {name: [] for name in scenarios}
+        for _ in range(repeat):
+            for name, ms in run_once(secrets, scenarios, message).items():
+                samples[name].append(ms)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_rev": _git_rev(),
+        "python": sys.version.split()[0],
+        "params": {
+            "repeat": repeat,
+            "conversations": config.conversations,
+            "turns": config.turns_per_conversation,
+            "message_chars": config.message_chars,
+            "latency": config.latency,
+            "chunk_delay": config.chunk_delay,
+            "reply_words": config.reply_words,
+        },
+        "results": {name: summarize(values) for name, values in samples.items() if values},
+        "samples": samples,
+    }
+
+
+def save_results(results: Dict, output: Path | None = None) -> Path:
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = results["timestamp"].replace(":", "").replace("-", "")
+        output = RESULTS_DIR / f"{stamp}-{results['git_rev'] or 'unknown'}.json"
+    output.write_text(json.dumps(results, indent=2))
+    return output
+
+
+def print_results(results: Dict):
+    print(f"{'scenario':<20}{'median':>10}{'p95':>10}{'min':>10}{'max':>10}")
+    for name, row in results["results"].items():
+        print(f"{name:<20}{row['median_ms']:>10}{row['p95_ms']:>10}{row['min_ms']:>10}{row['max_ms']:>10}")
+
+
+def compare(before_path: Path, after_path: Path, max_regression: float | None = None) -> int:
+    """
+    Print the median change per scenario between two result files. Returns a non-zero exit code
+    when any scenario got slower by more than `max_regression` percent.
+    """
+    before = json.loads(before_path.read_text())
+    after = json.loads(after_path.read_text())
+    if before["params"] != after["params"]:
+        print("Warning: the runs used different parameters, the comparison may not be meaningful.")
+
+    regressed = []
+    print(f"{'scenario':<20}{'before':>10}{'after':>10}{'change':>10}")
+    for name in SCENARIOS:
+        if name not in before["results"] or name not in after["results"]:
+            continue
+        old = before["results"][name]["median_ms"]
+        new = after["results"][name]["median_ms"]
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"{name:<20}{old:>10}{new:>10}{change:>+9.1f}%")
+        if max_regression is not None and change > max_regression:
+            regressed.append(name)
+
+    if regressed:
+        print(f"Regressed by more than {max_regression}%: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmarks against the local fake backend.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--conversations", type=int, default=50, help="Conversations seeded and listed in the sidebar.")
+    parser.add_argument("--turns", type=int, default=20, help="Turns seeded per conversation.")
+    parser.add_argument("--message-chars", type=int, default=400, help="Length of each seeded message.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay the fake backend adds to every response.")
+    parser.add_argument("--chunk-delay", type=float, default=0.0, help="Seconds between streamed chunks.")
+    parser.add_argument("--reply-words", type=int, default=40)
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS, help="Only run these scenarios (repeatable).")
+    parser.add_argument("--message", default="What supports does my plan cover?")
+    parser.add_argument("--output", type=Path, help="Where to write the results (default: dev/results/).")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("BEFORE", "AFTER"))
+    parser.add_argument("--max-regression", type=float, help="With --compare, fail when a median grows by more than this percent.")
+    parser.add_argument("--cold-start-child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--login-imports-child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cold_start_child:
+        _cold_start_child()
+        return
+    if args.login_imports_child:
+        _login_imports_child()
+        return
+    if args.compare:
+        sys.exit(compare(*args.compare, max_regression=args.max_regression))
+
+    config = FakeBackendConfig(
+        latency=args.latency,
+        chunk_delay=args.chunk_delay,
+        reply_words=args.reply_words,
+        conversations=args.conversations,
+        turns_per_conversation=args.turns,
+        message_chars=args.message_chars,
+    )
+    results = run_benchmark(config, args.repeat, args.scenario or list(SCENARIOS), args.message)
+    print_results(results)
+    print(f"Saved to {save_results(results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,673 @@
+# /dev/fake_backend.py
+
+# Local stand-in for every service the app talks to: Supabase auth, the edge functions, PostgREST,
+# storage uploads and the FastAPI turn endpoints. Run with `python -m dev.fake_backend --port 8000`
+# and point SUPABASE_URL at http://127.0.0.1:8000 and FASTAPI_BASE_URL at http://127.0.0.1:8000/api
+# Realtime (dev/fake_realtime.py) runs on its own port when --realtime-port is given.
+
+import argparse
+import base64
+import json
+import operator
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+from urllib.parse import parse_qs, unquote
+from uuid import uuid4
+
+from dev.fake_realtime import FakeRealtimeServer
+
+FILLER_WORDS = (
+    "Sure, here is a detailed answer based on the documents available to me. "
+    "Your plan covers core supports, capacity building and capital supports, "
+    "and each category has its own budget and rules about how funds can be used."
+).split()
+
+FAKE_USER_ID = "00000000-0000-4000-8000-000000000001"
+
+# PostgREST filter operators the app uses, timestamps compare correctly as ISO strings
+POSTGREST_OPERATORS: Dict[str, Callable[[str, str], bool]] = {
+    "eq": operator.eq,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "gt": operator.gt,
+    "gte": operator.ge,
+}
+
+
+def _split_top_level(expr: str) -> List[str]:
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(expr):
+        depth += (char == "(") - (char == ")")
+        if char == "," and depth == 0:
+            parts.append(expr[start:i])
+            start = i + 1
+    return parts + [expr[start:]]
+
+
+def postgrest_condition(expr: str) -> Callable[[dict], bool]:
+    """
+    Row predicate of a PostgREST logical filter, e.g. `or(updated_at.lt.X,and(updated_at.eq.X,id.lt.Y))`.
+    """
+    if expr.startswith(("or(", "and(")):
+        kind, _, inner = expr.partition("(")
+        conditions = [postgrest_condition(part) for part in _split_top_level(inner[:-1])]
+        combine = any if kind == "or" else all
+        return lambda row: combine(condition(row) for condition in conditions)
+    column, op, value = expr.split(".", 2)
+    return lambda row: POSTGREST_OPERATORS[op](str(row.get(column) or ""), value)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _filler(chars: int) -> str:
+    text = " ".join(FILLER_WORDS)
+    return (text * (chars // len(text) + 1))[:chars]
+
+
+def fake_jwt(sub: str = FAKE_USER_ID, email: str = "tester@example.com") -> str:
+    """
+    An unsigned token in JWT shape, enough for the app to read the `sub` claim from it.
+    """
+    def encode(part: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(part).encode()).decode().rstrip("=")
+    claims = {"sub": sub, "email": email, "role": "authenticated", "exp": int(time.time()) + 3600}
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode(claims)}.fake"
+
+
+@dataclass
+class FakeBackendConfig:
+    latency: float = 0.0
+    chunk_delay: float = 0.02
+    reply_words: int = 40
+    conversations: int = 20
+    turns_per_conversation: int = 10
+    message_chars: int = 200
+    system_prompt_chars: int = 2000
+    # Share of turn requests answered with a 503, and of turns that take `slow_turn_seconds` extra
+    turn_error_rate: float = 0.0
+    slow_turn_rate: float = 0.0
+    slow_turn_seconds: float = 5.0
+    # False answers streaming turn requests with a 406, like a turn API that cannot stream
+    stream_turns: bool = True
+    # PostgREST's max-rows, selects return at most this many rows whatever their limit, 0 for no cap
+    max_rows: int = 0
+    email: str = "tester@example.com"
+    password: str = "password"
+
+
+@dataclass
+class FakeUpload:
+    bucket: str
+    object_name: str
+    length: int
+    data: bytearray = field(default_factory=bytearray)
+
+
+@dataclass
+class FakeTurnReply:
+    done: threading.Event = field(default_factory=threading.Event)
+    reply: str = ""
+
+
+@dataclass
+class FakeBackendState:
+    conversations: Dict[str, dict] = field(default_factory=dict)
+    turns: Dict[str, List[dict]] = field(default_factory=dict)
+    uploads: Dict[str, FakeUpload] = field(default_factory=dict)
+    objects: Dict[str, bytes] = field(default_factory=dict)
+    # Idempotency-Key of every create and delete already applied, with the row it created
+    idempotent: Dict[str, dict | None] = field(default_factory=dict)
+    # Replies of turns by Idempotency-Key, set once the turn has been recorded
+    turn_replies: Dict[str, "FakeTurnReply"] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    idempotency_lock: threading.Lock = field(default_factory=threading.Lock)
+    # Called with (table, type, record, old_record) after every write, like a replication stream
+    listeners: List[Callable] = field(default_factory=list)
+
+    def emit(self, table: str, change_type: str, record: dict, old_record: dict | None = None):
+        for listener in self.listeners:
+            listener(table, change_type, dict(record), old_record)
+
+    def seed(self, config: FakeBackendConfig):
+        """
+        Populate conversations and turns, spaced a minute apart going back from now.
+        """
+        start = _now() - timedelta(minutes=config.conversations * (config.turns_per_conversation + 1))
+        for c in range(config.conversations):
+            created = start + timedelta(minutes=c * (config.turns_per_conversation + 1))
+            convo = self.add_conversation(f"Seeded-Convo-{c:04d}", {
+                "system_prompt": _filler(config.system_prompt_chars),
+                "document_prompt": "Here are additional documents that may help answer the users question: {context}",
+                "retrieval_documents": 5,
+                "max_previous_turns": 6,
+                "temperature": 0.4,
+                "max_tokens": 400,
+                "max_completion_tokens": 400,
+            }, created)
+            for t in range(config.turns_per_conversation):
+                self.record_turn(
+                    convo["id"],
+                    f"Question {t}: {_filler(config.message_chars)}",
+                    f"Answer {t}: {_filler(config.message_chars)}",
+                    created + timedelta(minutes=t + 1),
+                )
+
+    def add_conversation(self, name: str, agent_config: dict | None, created: datetime | None = None) -> dict:
+        created = created or _now()
+        convo = {
+            "id": str(uuid4()),
+            "user_id": FAKE_USER_ID,
+            "name": name,
+            "agent_config": agent_config,
+            "created_at": created.isoformat(),
+            "updated_at": created.isoformat(),
+        }
+        with self.lock:
+            self.conversations[convo["id"]] = convo
+            self.turns[convo["id"]] = []
+        self.emit("conversations", "INSERT", convo)
+        return convo
+
+    def reply_for(self, user_message: str, words: int) -> str:
+        filler = [FILLER_WORDS[i % len(FILLER_WORDS)] for i in range(max(words, 0))]
+        return " ".join([f"You said: {user_message}."] + filler)
+
+    def record_turn(self, convo_id: str, user_message: str, assistant_response: str, created: datetime | None = None) -> dict:
+        created = created or _now()
+        with self.lock:
+            turns = self.turns.setdefault(convo_id, [])
+            turn = {
+                "id": str(uuid4()),
+                "conversation_id": convo_id,
+                "turn_index": len(turns),
+                "user_message": user_message,
+                "assistant_response": assistant_response,
+                "created_at": created.isoformat(),
+            }
+            turns.append(turn)
+            if convo := self.conversations.get(convo_id):
+                convo["updated_at"] = created.isoformat()
+        self.emit("turns", "INSERT", turn)
+        if convo:
+            self.emit("conversations", "UPDATE", convo)
+        return turn
+
+
+ROUTES = [
+    # Supabase auth
+    ("POST", re.compile(r"^/auth/v1/token$"), "handle_sign_in"),
+    ("POST", re.compile(r"^/auth/v1/logout$"), "handle_sign_out"),
+    # Supabase edge functions
+    ("GET", re.compile(r"^/functions/v1/conversations$"), "handle_list_conversations"),
+    ("POST", re.compile(r"^/functions/v1/conversations$"), "handle_create_conversation"),
+    ("DELETE", re.compile(r"^/functions/v1/conversations/(?P<convo_id>[^/]+)$"), "handle_delete_conversation"),
+    ("GET", re.compile(r"^/functions/v1/turns$"), "handle_list_turns"),
+    ("GET", re.compile(r"^/functions/v1/log$"), "handle_log"),
+    # PostgREST
+    ("GET", re.compile(r"^/rest/v1/conversations$"), "handle_rest_select"),
+    ("PATCH", re.compile(r"^/rest/v1/conversations$"), "handle_rest_update"),
+    ("POST", re.compile(r"^/rest/v1/turns$"), "handle_rest_insert_turn"),
+    # FastAPI
+    ("POST", re.compile(r"^/api/conversations/(?P<convo_id>[^/]+)/turn(?:_dev)?$"), "handle_turn"),
+    # Supabase storage
+    ("POST", re.compile(r"^/storage/v1/object/(?P<path>.+)$"), "handle_object_upload"),
+    ("POST", re.compile(r"^/storage/v1/upload/resumable$"), "handle_tus_create"),
+    ("HEAD", re.compile(r"^/storage/v1/upload/resumable/(?P<upload_id>[^/]+)$"), "handle_tus_head"),
+    ("PATCH", re.compile(r"^/storage/v1/upload/resumable/(?P<upload_id>[^/]+)$"), "handle_tus_patch"),
+]
+
+
+class FakeBackendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "FakeBackendServer"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_HEAD(self):
+        self._dispatch("HEAD")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method: str):
+        path, _, query = self.path.partition("?")
+        self.query = {k: v[-1] for k, v in parse_qs(query).items()}
+        for route_method, pattern, handler_name in ROUTES:
+            if route_method == method and (match := pattern.match(path)):
+                if self.server.config.latency:
+                    time.sleep(self.server.config.latency)
+                getattr(self, handler_name)(**{k: unquote(v) for k, v in match.groupdict().items()})
+                return
+        self._read_body()
+        self._send_json(404, {"error": f"No route for {method} {path}"})
+
+    # Helpers
+    def _read_body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _read_json(self):
+        body = self._read_body()
+        return json.loads(body) if body else {}
+
+    def _send_empty(self, status: int, headers: Dict[str, str] | None = None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_chunked(self, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _postgrest_filter(self, column: str) -> str | None:
+        value = self.query.get(column)
+        return value.removeprefix("eq.") if value else None
+
+    # Auth
+    def handle_sign_in(self):
+        body = self._read_json()
+        config = self.server.config
+        if body.get("email") != config.email or body.get("password") != config.password:
+            self._send_json(400, {"error": "invalid_grant", "error_description": "Invalid login credentials"})
+            return
+
+        now = _now().isoformat()
+        self._send_json(200, {
+            "access_token": fake_jwt(email=config.email),
+            "token_type": "bearer",
+            "expires_in": 3600,
+            "expires_at": int(time.time()) + 3600,
+            "refresh_token": uuid4().hex,
+            "user": {
+                "id": FAKE_USER_ID,
+                "aud": "authenticated",
+                "role": "authenticated",
+                "email": config.email,
+                "app_metadata": {"provider": "email"},
+                "user_metadata": {},
+                "created_at": now,
+                "updated_at": now,
+            },
+        })
+
+    def handle_sign_out(self):
+        self._read_body()
+        self._send_empty(204)
+
+    # Edge functions
+    def handle_list_conversations(self):
+        with self.server.state.lock:
+            convos = sorted(self.server.state.conversations.values(), key=lambda c: c["updated_at"], reverse=True)
+        if before := self.query.get("before"):
+            convos = [c for c in convos if c["updated_at"] < before]
+        if since := self.query.get("since"):
+            convos = [c for c in convos if c["updated_at"] >= since]
+        if limit := self.query.get("limit"):
+            convos = convos[:int(limit)]
+        self._send_json(200, convos)
+
+    def handle_create_conversation(self):
+        body = self._read_json()
+        state = self.server.state
+        key = self.headers.get("Idempotency-Key")
+        with state.idempotency_lock:
+            # A repeated key gets the conversation the first request created
+            if key and key in state.idempotent:
+                convo = state.idempotent[key]
+            else:
+                convo = state.add_conversation(body.get("name", "Untitled"), body.get("agent_config"))
+                if key:
+                    state.idempotent[key] = convo
+        self._send_json(200, convo)
+
+    def handle_delete_conversation(self, convo_id: str):
+        self._read_body()
+        state = self.server.state
+        key = self.headers.get("Idempotency-Key")
+        with state.lock:
+            if convo_id not in state.conversations and not (key and key in state.idempotent):
+                found = False
+            else:
+                found = True
+                removed = state.conversations.pop(convo_id, None)
+                state.turns.pop(convo_id, None)
+                if key:
+                    state.idempotent[key] = None
+        if found:
+            if removed:
+                state.emit("conversations", "DELETE", {}, {"id": convo_id})
+            self._send_empty(204)
+        else:
+            self._send_json(404, {"error": "Conversation not found"})
+
+    def handle_list_turns(self):
+        with self.server.state.lock:
+            turns = list(self.server.state.turns.get(self.query.get("conversation_id"), []))
+        if since := self.query.get("since"):
+            turns = [t for t in turns if t["created_at"] >= since]
+        if self.query.get("limit"):
+            # Paged requests are served newest first, like the real endpoint
+            turns.sort(key=lambda t: t["created_at"], reverse=True)
+            if before := self.query.get("before"):
+                turns = [t for t in turns if t["created_at"] < before]
+            turns = turns[:int(self.query["limit"])]
+        self._send_json(200, turns)
+
+    def handle_log(self):
+        convo_id = self.query.get("conversation_id")
+        with self.server.state.lock:
+            convo = self.server.state.conversations.get(convo_id)
+            turns = list(self.server.state.turns.get(convo_id, []))
+        if convo is None:
+            self._send_json(404, {"error": "Conversation not found"})
+            return
+        # The real endpoint returns the log as a JSON-encoded string
+        self._send_json(200, json.dumps({"conversation": convo, "turns": turns}))
+
+    # PostgREST
+    def handle_rest_select(self):
+        convo_id = self._postgrest_filter("id")
+        with self.server.state.lock:
+            rows = [c for c in self.server.state.conversations.values() if convo_id is None or c["id"] == convo_id]
+        if updated_at := self.query.get("updated_at"):
+            op, _, value = updated_at.partition(".")
+            rows = [r for r in rows if POSTGREST_OPERATORS[op](r["updated_at"], value)]
+        if condition := self.query.get("or"):
+            rows = list(filter(postgrest_condition(f"or{condition}"), rows))
+        if order := self.query.get("order"):
+            # Sorted by the last column first, the stable sort keeps that order among ties
+            for term in reversed(order.split(",")):
+                column, _, direction = term.partition(".")
+                rows.sort(key=lambda r: r.get(column) or "", reverse=direction == "desc")
+        if limit := self.query.get("limit"):
+            rows = rows[:int(limit)]
+        if self.server.config.max_rows:
+            rows = rows[:self.server.config.max_rows]
+        if (select := self.query.get("select")) and select != "*":
+            columns = select.split(",")
+            rows = [{col: row.get(col) for col in columns} for row in rows]
+
+        if "vnd.pgrst.object" in self.headers.get("Accept", ""):
+            if len(rows) != 1:
+                self._send_json(406, {"message": "JSON object requested, multiple (or no) rows returned"})
+                return
+            self._send_json(200, rows[0])
+            return
+        self._send_json(200, rows)
+
+    def handle_rest_update(self):
+        body = self._read_json()
+        convo_id = self._postgrest_filter("id")
+        with self.server.state.lock:
+            if convo := self.server.state.conversations.get(convo_id):
+                convo.update(body)
+        if convo:
+            self.server.state.emit("conversations", "UPDATE", convo)
+        self._send_empty(204)
+
+    def handle_rest_insert_turn(self):
+        body = self._read_json()
+        if body.get("conversation_id") not in self.server.state.conversations:
+            self._send_json(409, {"message": "insert or update on table \"turns\" violates foreign key constraint"})
+            return
+        self.server.state.record_turn(body["conversation_id"], body["user_message"], body["assistant_response"])
+        self._send_empty(201)
+
+    # FastAPI
+    def handle_turn(self, convo_id: str):
+        body = self._read_json()
+        config = self.server.config
+        state = self.server.state
+        wants_stream = body.get("stream") or "text/event-stream" in self.headers.get("Accept", "")
+        if wants_stream and not config.stream_turns:
+            self._send_json(406, {"error": "Streaming is not supported"})
+            return
+        if random.random() < config.turn_error_rate:
+            self._send_json(503, {"error": "Service temporarily unavailable"})
+            return
+        if random.random() < config.slow_turn_rate:
+            time.sleep(config.slow_turn_seconds)
+
+        # A retried or hedged copy of a turn waits for the original and gets the same reply
+        user_message = body.get("user_message", "")
+        key = self.headers.get("Idempotency-Key")
+        with state.idempotency_lock:
+            existing = state.turn_replies.get(key) if key else None
+            if existing is None:
+                entry = FakeTurnReply()
+                if key:
+                    state.turn_replies[key] = entry
+        if existing is not None:
+            existing.done.wait(timeout=60)
+            reply = existing.reply
+        else:
+            reply = state.reply_for(user_message, config.reply_words)
+            state.record_turn(convo_id, user_message, reply)
+            entry.reply = reply
+            entry.done.set()
+
+        if not wants_stream:
+            self._send_json(200, {"assistant_response": reply})
+            return
+
+        self._start_chunked("text/event-stream")
+        for i, word in enumerate(reply.split(" ")):
+            delta = word if i == 0 else f" {word}"
+            self._write_chunk(f"data: {json.dumps({'delta': delta})}\n\n".encode())
+            if self.server.config.chunk_delay:
+                time.sleep(self.server.config.chunk_delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+    # Storage
+    def handle_object_upload(self, path: str):
+        data = self._read_body()
+        with self.server.state.lock:
+            self.server.state.objects[path] = data
+        self._send_json(200, {"Key": path})
+
+    def handle_tus_create(self):
+        self._read_body()
+        metadata = {}
+        for item in self.headers.get("Upload-Metadata", "").split(","):
+            if " " in item:
+                name, value = item.split(" ", 1)
+                metadata[name] = base64.b64decode(value).decode()
+
+        upload_id = uuid4().hex
+        with self.server.state.lock:
+            self.server.state.uploads[upload_id] = FakeUpload(
+                bucket=metadata.get("bucketName", ""),
+                object_name=metadata.get("objectName", ""),
+                length=int(self.headers.get("Upload-Length", 0)),
+            )
+        self._send_empty(201, {
+            "Location": f"/storage/v1/upload/resumable/{upload_id}",
+            "Tus-Resumable": "1.0.0",
+        })
+
+    def handle_tus_head(self, upload_id: str):
+        upload = self.server.state.uploads.get(upload_id)
+        if upload is None:
+            self._send_empty(404)
+            return
+        self._send_empty(200, {
+            "Upload-Offset": str(len(upload.data)),
+            "Upload-Length": str(upload.length),
+            "Tus-Resumable": "1.0.0",
+        })
+
+    def handle_tus_patch(self, upload_id: str):
+        chunk = self._read_body()
+        state = self.server.state
+        with state.lock:
+            upload = state.uploads.get(upload_id)
+            if upload is None:
+                self._send_empty(404)
+                return
+            if int(self.headers.get("Upload-Offset", -1)) != len(upload.data):
+                self._send_empty(409, {"Upload-Offset": str(len(upload.data))})
+                return
+            upload.data.extend(chunk)
+            if len(upload.data) >= upload.length:
+                state.objects[f"{upload.bucket}/{upload.object_name}"] = bytes(upload.data)
+                del state.uploads[upload_id]
+            offset = len(upload.data)
+        self._send_empty(204, {"Upload-Offset": str(offset), "Tus-Resumable": "1.0.0"})
+
+
+class FakeBackendServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: FakeBackendConfig | None = None, verbose: bool = False):
+        super().__init__(address, FakeBackendHandler)
+        self.config = config or FakeBackendConfig()
+        self.state = FakeBackendState()
+        self.state.seed(self.config)
+        self.verbose = verbose
+        self.realtime: FakeRealtimeServer | None = None
+
+    def start_realtime(self, port: int = 0) -> FakeRealtimeServer:
+        host = self.server_address[0]
+        self.realtime = FakeRealtimeServer(host, port).start()
+        self.state.listeners.append(self.realtime.broadcast)
+        return self.realtime
+
+    def reset(self, config: FakeBackendConfig | None = None):
+        """
+        Start over with freshly seeded state, e.g. between tests sharing one server.
+        """
+        self.config = config or FakeBackendConfig()
+        state = FakeBackendState()
+        state.seed(self.config)
+        if self.realtime is not None:
+            state.listeners.append(self.realtime.broadcast)
+        self.state = state
+
+    def server_close(self):
+        if self.realtime is not None:
+            self.realtime.shutdown()
+        super().server_close()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def secrets(self) -> Dict[str, object]:
+        """
+        Streamlit secrets pointing the app at this server.
+        """
+        return {
+            "SUPABASE_URL": self.url,
+            "SUPABASE_ANON_KEY": "fake-anon-key",
+            "FASTAPI_BASE_URL": f"{self.url}/api",
+            # The fake turn endpoints record a turn once per Idempotency-Key
+            "TURN_IDEMPOTENCY_KEYS": 1,
+            "DEFAULT_EMAIL": self.config.email,
+            "DEFAULT_PASSWORD": self.config.password,
+            **({"REALTIME_URL": self.realtime.url} if self.realtime else {}),
+        }
+
+
+def start_fake_backend(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    config: FakeBackendConfig | None = None,
+    realtime: bool = False
+) -> FakeBackendServer:
+    """
+    Start the stand-in server on a background thread, port 0 picks a free port. With `realtime`
+    the Realtime stand-in is started beside it on a free port.
+    """
+    server = FakeBackendServer((host, port), config)
+    if realtime:
+        server.start_realtime()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Clover backend.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay before every response.")
+    parser.add_argument("--chunk-delay", type=float, default=0.02, help="Seconds between streamed chunks.")
+    parser.add_argument("--reply-words", type=int, default=40, help="Filler words appended to each reply.")
+    parser.add_argument("--conversations", type=int, default=20, help="Conversations to seed.")
+    parser.add_argument("--turns", type=int, default=10, help="Turns to seed per conversation.")
+    parser.add_argument("--message-chars", type=int, default=200, help="Length of each seeded message.")
+    parser.add_argument("--system-prompt-chars", type=int, default=2000, help="Length of each seeded system prompt.")
+    parser.add_argument("--turn-error-rate", type=float, default=0.0, help="Share of turns answered with a 503.")
+    parser.add_argument("--slow-turn-rate", type=float, default=0.0, help="Share of turns delayed by --slow-turn-seconds.")
+    parser.add_argument("--slow-turn-seconds", type=float, default=5.0)
+    parser.add_argument("--realtime-port", type=int, help="Also serve the Realtime stand-in on this port.")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    config = FakeBackendConfig(
+        latency=args.latency,
+        chunk_delay=args.chunk_delay,
+        reply_words=args.reply_words,
+        conversations=args.conversations,
+        turns_per_conversation=args.turns,
+        message_chars=args.message_chars,
+        system_prompt_chars=args.system_prompt_chars,
+        turn_error_rate=args.turn_error_rate,
+        slow_turn_rate=args.slow_turn_rate,
+        slow_turn_seconds=args.slow_turn_seconds,
+    )
+    server = FakeBackendServer((args.host, args.port), config, verbose=args.verbose)
+    print(f"Fake backend listening on {server.url}, log in as {config.email} / {config.password}")
+    if args.realtime_port is not None:
+        print(f"Realtime listening on {server.start_realtime(args.realtime_port).url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
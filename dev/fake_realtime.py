@@ -0,0 +1,125 @@
+# /dev/fake_realtime.py
+
+# Local stand-in for Supabase Realtime: the Phoenix channel protocol over a websocket, pushing
+# postgres_changes for the fake backend's conversations and turns to every joined channel.
+
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import Server, ServerConnection, serve
+
+REALTIME_PATH = "/realtime/v1/websocket"
+
+# Connection open/close lines would drown out the benchmark output
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.WARNING)
+
+
+@dataclass
+class FakeSubscription:
+    connection: ServerConnection
+    topic: str
+    # (table, event) pairs from the join's postgres_changes config, event "*" matches every change
+    filters: List[tuple] = field(default_factory=list)
+
+
+class FakeRealtimeServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server: Server = serve(self._handle, host, port, logger=logger)
+        self._subscriptions: List[FakeSubscription] = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.socket.getsockname()[:2]
+        return f"ws://{host}:{port}{REALTIME_PATH}"
+
+    def start(self) -> "FakeRealtimeServer":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def shutdown(self):
+        self._server.shutdown()
+
+    @staticmethod
+    def _reply(connection: ServerConnection, message: Dict, response: Dict | None = None, status: str = "ok"):
+        connection.send(json.dumps({
+            "topic": message.get("topic"),
+            "event": "phx_reply",
+            "payload": {"status": status, "response": response or {}},
+            "ref": message.get("ref"),
+        }))
+
+    def _handle(self, connection: ServerConnection):
+        if connection.request.path.split("?")[0] != REALTIME_PATH:
+            connection.close(code=1008, reason="Unknown path")
+            return
+        try:
+            for raw in connection:
+                message = json.loads(raw)
+                event = message.get("event")
+                if event == "phx_join":
+                    changes = message["payload"].get("config", {}).get("postgres_changes", [])
+                    subscription = FakeSubscription(connection, message["topic"], [(c["table"], c.get("event", "*")) for c in changes])
+                    with self._lock:
+                        self._subscriptions.append(subscription)
+                    self._reply(connection, message, {"postgres_changes": [{**c, "id": i} for i, c in enumerate(changes)]})
+                elif event == "phx_leave":
+                    self._drop(connection, message.get("topic"))
+                    self._reply(connection, message)
+                elif event in ("heartbeat", "access_token"):
+                    self._reply(connection, message)
+        except ConnectionClosed:
+            pass
+        finally:
+            self._drop(connection)
+
+    def disconnect_all(self):
+        """
+        Close every joined connection, as a Realtime restart or a network drop would.
+        """
+        with self._lock:
+            connections = {id(s.connection): s.connection for s in self._subscriptions}
+            self._subscriptions = []
+        for connection in connections.values():
+            connection.close()
+
+    def _drop(self, connection: ServerConnection, topic: str | None = None):
+        with self._lock:
+            self._subscriptions = [
+                s for s in self._subscriptions
+                if not (s.connection is connection and (topic is None or s.topic == topic))
+            ]
+
+    def broadcast(self, table: str, change_type: str, record: Dict, old_record: Dict | None = None):
+        """
+        Push a change the way Realtime does, to every channel whose filters match it.
+        """
+        with self._lock:
+            targets = [s for s in self._subscriptions if (table, "*") in s.filters or (table, change_type) in s.filters]
+        for subscription in targets:
+            try:
+                subscription.connection.send(json.dumps({
+                    "topic": subscription.topic,
+                    "event": "postgres_changes",
+                    "payload": {
+                        "ids": [0],
+                        "data": {
+                            "schema": "public",
+                            "table": table,
+                            "type": change_type,
+                            "commit_timestamp": datetime.now(timezone.utc).isoformat(),
+                            "record": record if change_type != "DELETE" else {},
+                            "old_record": old_record or {},
+                            "errors": None,
+                        },
+                    },
+                    "ref": None,
+                }))
+            except ConnectionClosed:
+                self._drop(subscription.connection)
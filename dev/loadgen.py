@@ -0,0 +1,429 @@
+# /dev/loadgen.py
+
+# Headless load generator: starts `streamlit run main.py` against the local stand-in backend and drives
+# many simulated browser sessions over Streamlit's websocket protocol through the real page flow:
+# auto-login, sidebar listing, opening conversations and sending turns.
+#   python -m dev.loadgen --sessions 20 --turns-per-conversation 3 --latency 0.05
+# Turns go through the blocking query_llm_dev path unless --stream is given.
+
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List
+
+import requests
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.sync.client import connect
+
+from dev.bench import RESULTS_DIR, ROOT
+from dev.fake_backend import FakeBackendConfig, start_fake_backend
+
+STEPS = ("login", "sidebar", "open_conversation", "send_turn")
+
+STEP_TIMEOUT = 120
+SERVER_START_TIMEOUT = 60
+
+# Elements the simulated sessions interact with
+WIDGET_TYPES = ("button", "button_group", "chat_input")
+
+
+class SessionError(Exception):
+    pass
+
+
+@dataclass
+class StepResult:
+    session: int
+    step: str
+    start: float
+    duration_ms: float
+    ok: bool
+    error: str | None = None
+    elements: int = 0
+
+
+@dataclass
+class ScriptRun:
+    widgets: Dict[str, object] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    elements: int = 0
+
+
+def rss_bytes(pid: int) -> int | None:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _write_secrets(secrets: Dict[str, object]) -> str:
+    f = tempfile.NamedTemporaryFile("w", suffix=".toml", prefix="loadgen-secrets-", delete=False)
+    with f:
+        for key, value in secrets.items():
+            f.write(f"{key} = {json.dumps(value)}\n")
+    return f.name
+
+
+class AppServer:
+    """
+    A `streamlit run main.py` process with its own secrets file.
+    """
+
+    def __init__(self, secrets: Dict[str, object], port: int | None = None):
+        self.port = port or _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._secrets_path = _write_secrets(secrets)
+        # A file rather than a pipe, a pipe nobody reads blocks the server once its buffer fills up
+        self._log = tempfile.NamedTemporaryFile("w+b", suffix=".log", prefix="loadgen-streamlit-", delete=False)
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "streamlit", "run", "main.py",
+                "--server.headless", "true",
+                "--server.port", str(self.port),
+                "--server.address", "127.0.0.1",
+                "--server.fileWatcherType", "none",
+                "--browser.gatherUsageStats", "false",
+                "--secrets.files", self._secrets_path,
+            ],
+            cwd=ROOT,
+            stdout=subprocess.DEVNULL,
+            stderr=self._log,
+        )
+
+    def log_tail(self, size: int = 2000) -> str:
+        with open(self._log.name, "rb") as f:
+            return f.read().decode(errors="replace")[-size:]
+
+    def wait_ready(self, timeout: float = SERVER_START_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise SessionError(f"Streamlit exited: {self.log_tail()}")
+            try:
+                if requests.get(f"{self.url}/_stcore/health", timeout=1).ok:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.2)
+        raise SessionError(f"Streamlit did not become healthy within {timeout}s")
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self._log.close()
+        os.unlink(self._log.name)
+        os.unlink(self._secrets_path)
+
+
+class SimulatedSession:
+    """
+    One browser tab: a websocket to the app that sends reruns with widget states the way the
+    frontend does and reads forward messages until the run has finished.
+    """
+
+    def __init__(self, index: int, url: str, results: List[StepResult], lock: threading.Lock, think_time: float):
+        self.index = index
+        self._ws_url = url.replace("http://", "ws://") + "/_stcore/stream"
+        self._ws = None
+        self._page_hash = ""
+        self._results = results
+        self._lock = lock
+        self._think_time = think_time
+        self._random = random.Random(index)
+        self._widget_fragments: Dict[str, str] = {}
+        self.run_state = ScriptRun()
+
+    def _rerun(self, *widget_states: WidgetState) -> ScriptRun:
+        if self._ws is None:
+            self._ws = connect(self._ws_url, subprotocols=["streamlit"], open_timeout=10, max_size=None)
+
+        msg = BackMsg()
+        msg.rerun_script.page_script_hash = self._page_hash
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+        # Like the frontend, a widget drawn by a fragment only reruns that fragment
+        for state in widget_states:
+            if fragment_id := self._widget_fragments.get(state.id):
+                msg.rerun_script.fragment_id = fragment_id
+        self._ws.send(msg.SerializeToString())
+
+        run = ScriptRun()
+        deadline = time.monotonic() + STEP_TIMEOUT
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self._ws.recv(timeout=max(deadline - time.monotonic(), 0.1)))
+            kind = forward.WhichOneof("type")
+            if kind == "new_session":
+                # Every script run (including the ones started by st.rerun) begins afresh
+                run = ScriptRun()
+                self._page_hash = forward.new_session.page_script_hash
+            elif kind == "delta" and forward.delta.WhichOneof("type") == "new_element":
+                run.elements += 1
+                element = forward.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type in WIDGET_TYPES:
+                    widget = getattr(element, element_type)
+                    run.widgets[widget.id] = widget
+                    self._widget_fragments[widget.id] = forward.delta.fragment_id
+                elif element_type == "exception":
+                    run.errors.append(element.exception.message)
+                elif element_type == "alert" and element.alert.format == Alert.ERROR:
+                    run.errors.append(element.alert.body)
+            elif kind == "script_finished":
+                if forward.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    raise SessionError("Script failed to compile")
+                if forward.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    break
+
+        self.run_state = run
+        if run.errors:
+            raise SessionError(run.errors[0])
+        return run
+
+    def _step(self, name: str, *widget_states: WidgetState) -> bool:
+        started = time.time()
+        perf = time.perf_counter()
+        error = None
+        try:
+            self._rerun(*widget_states)
+        except Exception as e:
+            error = str(e) or repr(e)
+        duration_ms = (time.perf_counter() - perf) * 1000
+        result = StepResult(self.index, name, started, duration_ms, error is None, error, self.run_state.elements)
+        with self._lock:
+            self._results.append(result)
+        if self._think_time:
+            time.sleep(self._random.uniform(0, 2 * self._think_time))
+        return result.ok
+
+    def _conversation_buttons(self) -> list:
+        # Each sidebar entry is a segmented control keyed `{convo_id}_seg`
+        return [w for wid, w in self.run_state.widgets.items() if wid.endswith("_seg") and len(w.options) == 2]
+
+    def _chat_input_id(self) -> str | None:
+        return next((wid for wid, w in self.run_state.widgets.items() if w.DESCRIPTOR.name == "ChatInput"), None)
+
+    def _fail(self, step: str, error: str):
+        with self._lock:
+            self._results.append(StepResult(self.index, step, time.time(), 0.0, False, error))
+
+    def run(self, conversations: int, turns: int, message: str):
+        # Auto-login happens on the first run, it reruns into the home page. The websocket is left
+        # open afterwards so the session is still held by the server when memory is measured.
+        if not self._step("login") or not self._step("sidebar"):
+            return
+
+        buttons = self._conversation_buttons()
+        if not buttons:
+            self._fail("sidebar", "No conversations listed in the sidebar")
+            return
+
+        for button in self._random.sample(buttons, min(conversations, len(buttons))):
+            click = WidgetState(id=button.id)
+            click.string_array_value.data.append(button.options[0].content)
+            if not self._step("open_conversation", click):
+                return
+            if (chat_input_id := self._chat_input_id()) is None:
+                self._fail("open_conversation", "Conversation page has no chat input")
+                return
+
+            for t in range(turns):
+                send = WidgetState(id=chat_input_id)
+                send.chat_input_value.data = f"{message} ({self.index}/{t})"
+                if not self._step("send_turn", send):
+                    return
+
+    def close(self):
+        if self._ws is not None:
+            self._ws.close()
+
+
+def run_load(
+    config: FakeBackendConfig,
+    sessions: int,
+    concurrency: int,
+    ramp_up: float,
+    conversations: int,
+    turns: int,
+    think_time: float,
+    stream: bool,
+    message: str,
+) -> Dict:
+    backend = start_fake_backend(config=config)
+    app = AppServer({
+        **backend.secrets(),
+        "AUTO_LOGIN": 1,
+        "STREAM_RESPONSES": int(stream),
+        "CONVERSATION_PAGE_SIZE": config.conversations,
+    })
+    results: List[StepResult] = []
+    lock = threading.Lock()
+    simulated: List[SimulatedSession] = []
+
+    try:
+        app.wait_ready()
+
+        # One throwaway session so imports and process-wide caches are not billed to the sessions
+        warmup = SimulatedSession(-1, app.url, [], lock, 0)
+        warmup.run(0, 0, message)
+        warmup.close()
+        time.sleep(1)
+        baseline_rss = rss_bytes(app.process.pid)
+
+        simulated = [SimulatedSession(i, app.url, results, lock, think_time) for i in range(sessions)]
+        delay = ramp_up / sessions if sessions else 0
+
+        def start(session: SimulatedSession):
+            time.sleep(session.index * delay)
+            session.run(conversations, turns, message)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency or sessions, thread_name_prefix="loadgen") as pool:
+            for future in [pool.submit(start, s) for s in simulated]:
+                future.result()
+        elapsed = time.perf_counter() - started
+        peak_rss = rss_bytes(app.process.pid)
+    finally:
+        for session in simulated:
+            session.close()
+        app.stop()
+        backend.shutdown()
+        backend.server_close()
+
+    memory = {}
+    if baseline_rss is not None and peak_rss is not None:
+        memory = {
+            "baseline_mb": round(baseline_rss / 2**20, 1),
+            "peak_mb": round(peak_rss / 2**20, 1),
+            "per_session_mb": round((peak_rss - baseline_rss) / 2**20 / max(sessions, 1), 2),
+        }
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "params": {
+            "sessions": sessions,
+            "concurrency": concurrency or sessions,
+            "ramp_up": ramp_up,
+            "conversations_per_session": conversations,
+            "turns_per_conversation": turns,
+            "think_time": think_time,
+            "stream": stream,
+            "latency": config.latency,
+            "seeded_conversations": config.conversations,
+            "seeded_turns": config.turns_per_conversation,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "memory": memory,
+        "steps": summarize_steps(results, elapsed),
+        "errors": [asdict(r) for r in results if not r.ok][:20],
+    }
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def summarize_steps(results: List[StepResult], elapsed: float) -> Dict[str, Dict]:
+    summary = {}
+    for step in STEPS:
+        rows = [r for r in results if r.step == step]
+        if not rows:
+            continue
+        ordered = sorted(r.duration_ms for r in rows)
+        summary[step] = {
+            "count": len(rows),
+            "errors": sum(not r.ok for r in rows),
+            "per_second": round(len(rows) / elapsed, 2) if elapsed else 0.0,
+            "p50_ms": round(statistics.median(ordered), 1),
+            "p95_ms": round(_percentile(ordered, 95), 1),
+            "p99_ms": round(_percentile(ordered, 99), 1),
+            "max_ms": round(ordered[-1], 1),
+            "elements": round(statistics.median(r.elements for r in rows)),
+        }
+    return summary
+
+
+def print_report(report: Dict):
+    print(f"{report['params']['sessions']} sessions in {report['elapsed_s']}s")
+    print(f"{'step':<20}{'count':>7}{'errors':>8}{'/s':>8}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}{'elements':>10}")
+    for step, row in report["steps"].items():
+        print(
+            f"{step:<20}{row['count']:>7}{row['errors']:>8}{row['per_second']:>8}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}{row['elements']:>10}"
+        )
+    if memory := report["memory"]:
+        print(f"Server RSS {memory['baseline_mb']} MB -> {memory['peak_mb']} MB, {memory['per_session_mb']} MB per session")
+    for error in report["errors"][:5]:
+        print(f"  session {error['session']} {error['step']}: {error['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent multi-session load against `streamlit run main.py`.")
+    parser.add_argument("--sessions", type=int, default=10, help="Simulated sessions (browser tabs).")
+    parser.add_argument("--concurrency", type=int, default=0, help="Sessions active at once (default: all).")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds over which the sessions are started.")
+    parser.add_argument("--conversations-per-session", type=int, default=2)
+    parser.add_argument("--turns-per-conversation", type=int, default=2)
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause in seconds between steps.")
+    parser.add_argument("--stream", action="store_true", help="Stream turns instead of the blocking query_llm_dev path.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay the fake backend adds to every response.")
+    parser.add_argument("--chunk-delay", type=float, default=0.0)
+    parser.add_argument("--seed-conversations", type=int, default=30)
+    parser.add_argument("--seed-turns", type=int, default=10)
+    parser.add_argument("--message", default="What supports does my plan cover?")
+    parser.add_argument("--output", type=Path, help="Write the report as JSON (default: dev/results/).")
+    args = parser.parse_args()
+
+    config = FakeBackendConfig(
+        latency=args.latency,
+        chunk_delay=args.chunk_delay,
+        conversations=args.seed_conversations,
+        turns_per_conversation=args.seed_turns,
+    )
+    report = run_load(
+        config,
+        sessions=args.sessions,
+        concurrency=args.concurrency,
+        ramp_up=args.ramp_up,
+        conversations=args.conversations_per_session,
+        turns=args.turns_per_conversation,
+        think_time=args.think_time,
+        stream=args.stream,
+        message=args.message,
+    )
+    print_report(report)
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f"loadgen-{report['timestamp'].replace(':', '').replace('-', '')}.json"
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,19 @@
 # /src/components/__init__.py
 
-from .segment_button import segment_button
-from .sidebar import render_sidebar
+import importlib
+
+# Imported on first use, the login page renders without the sidebar and its backend imports
+_EXPORTS = {
+    "open_clicked_conversation": ".sidebar",
+    "render_sidebar": ".sidebar",
+    "render_latency_panel": ".latency_panel",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    return value
@@ -0,0 +1,93 @@
+# /src/components/latency_panel.py
+
+import io
+
+import streamlit as st
+
+from src.utils.backend import coalesced_requests, get_turn_router
+from src.utils.cache import get_user_cache
+from src.utils.http import get_http_client
+from src.utils.message_store import process_memory_report
+from src.utils.prefetch import PREFETCH_CONVERSATIONS, get_prefetcher
+from src.utils.response_cache import RESPONSE_CACHE, get_response_cache
+from src.utils.telemetry import current_session_id, get_span_recorder
+
+
+def latency_panel_enabled() -> bool:
+    # Operators only, the panel shows the spans of every session in the process
+    return bool(st.secrets.get("LATENCY_PANEL", False))
+
+
+def _spans_jsonl(session_id: str | None) -> str:
+    buffer = io.StringIO()
+    get_span_recorder().export_jsonl(buffer, session_id)
+    return buffer.getvalue()
+
+
+def render_latency_panel():
+    if not latency_panel_enabled():
+        return
+
+    recorder = get_span_recorder()
+    with st.sidebar.expander("Latency", icon=":material/speed:"):
+        scope = st.segmented_control(
+            "Scope",
+            options=["Session", "Process"],
+            default="Session",
+            key="latency_scope",
+            label_visibility="collapsed"
+        )
+        session_id = current_session_id() if scope != "Process" else None
+
+        st.write("**Spans**")
+        st.dataframe(recorder.summary(session_id), hide_index=True)
+
+        st.write("**HTTP Pools**")
+        st.dataframe(
+            [{"host": host, **{k: v for k, v in stats.items() if k != "status_codes"}} for host, stats in get_http_client().stats().items()],
+            hide_index=True
+        )
+
+        st.write("**Turn Endpoints**")
+        st.dataframe(get_turn_router().snapshot(), hide_index=True)
+
+        st.write("**Cache**")
+        st.dataframe(
+            [{"resource": resource, **counters} for resource, counters in get_user_cache().stats().items()],
+            hide_index=True
+        )
+        st.caption(f"{coalesced_requests()} duplicate requests coalesced")
+
+        st.write("**Transcript Memory**")
+        if scope == "Process":
+            st.dataframe([process_memory_report()], hide_index=True)
+        else:
+            st.dataframe([st.session_state.messages.memory_report()], hide_index=True)
+
+        if PREFETCH_CONVERSATIONS:
+            st.write("**Prefetch**")
+            st.dataframe([get_prefetcher().stats()], hide_index=True)
+
+        if RESPONSE_CACHE:
+            st.write("**Response Cache**")
+            st.dataframe([get_response_cache().stats()], hide_index=True)
+
+        cols = st.columns(2)
+        with cols[0]:
+            st.download_button(
+                "JSONL",
+                data=lambda: _spans_jsonl(session_id),
+                file_name="spans.jsonl",
+                mime="application/jsonl",
+                icon=":material/download:",
+                on_click="ignore"
+            )
+        with cols[1]:
+            st.download_button(
+                "Prometheus",
+                data=recorder.prometheus_snapshot,
+                file_name="metrics.prom",
+                mime="text/plain",
+                icon=":material/download:",
+                on_click="ignore"
+            )
@@ -2,7 +2,7 @@
 
 import streamlit as st
 
-from src.utils.misc import time_ago, pad_convo_label
+from src.utils.convo_index import get_convo_index
 from src.dialogs.view_config import render_view_config_dialog_ui
 
 @st.fragment()
@@ -17,8 +17,7 @@ def segment_button(convo):
         st.session_state[seg_key] = None
         st.session_state[trigger_key] = False
 
-    last_turn = time_ago(convo["updated_at"])
-    text = pad_convo_label(convo["name"], last_turn)
+    text = get_convo_index().label(convo)
     options = [text, "⋮"]
 
     seg_value = st.segmented_control(
@@ -32,7 +31,6 @@ def segment_button(convo):
 
     if seg_value:
         if seg_value == options[0]:
-            st.cache_data.clear()
             st.session_state.clicked_convo_id = convo["id"]
             st.session_state[trigger_key] = True
             st.rerun()
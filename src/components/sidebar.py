@@ -1,20 +1,249 @@
 # /src/sidebar.py
 
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+
 import streamlit as st
 
-from src.utils.misc import get_random_conversation_name, sort_recent_conversations
+from src.utils.misc import get_random_conversation_name, rerun_fragment
 from src.utils.backend import (
-        fetch_conversations,
-        fetch_conversation_turns,
-        create_conversation,
+        CONVERSATION_PAGE_SIZE,
+        fetch_conversations_page,
+        fetch_conversation_turns_page,
+        invalidate_cached,
+        load_local_conversations,
+        sync_local_conversations,
         upload_plan
     )
+from src.utils.auth import sign_out
+from src.utils.convo_index import get_convo_index
+from src.utils.local_store import LOCAL_STORE
+from src.utils.prefetch import get_prefetcher, prefetch_recent_conversations
+from src.utils.realtime import apply_changes, get_change_feed, get_realtime_hub
+from src.utils.telemetry import traced
+from src.utils.mutations import (
+        create_conversation_optimistic,
+        has_finished_mutations,
+        has_pending_mutations,
+        is_pending,
+        reconcile_mutations
+    )
+from .latency_panel import render_latency_panel
 from .segment_button import segment_button
 
 
+# A refresh this soon after the list was loaded is a repeated click, not a request for newer data
+REFRESH_DEBOUNCE_SECONDS = 1.0
+
+# Search matches rendered at once, the query is refined rather than scrolled
+SEARCH_RESULT_LIMIT = 50
+
+
+@st.cache_resource(show_spinner=False)
+def _get_sync_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="local-sync")
+
+
+def _start_local_sync():
+    # Once per session, or again after a refresh
+    if LOCAL_STORE and st.session_state.get("local_sync") is None:
+        st.session_state.local_sync = _get_sync_executor().submit(sync_local_conversations, jwt=st.session_state.jwt)
+        st.session_state.local_sync_ids = {c["id"] for c in st.session_state.convos or []}
+
+
+@st.fragment(run_every=0.5)
+def _await_local_sync():
+    # The list drawn from disk is swapped for the synced one once no optimistic write depends on it
+    future = st.session_state.local_sync
+    if not future.done() or has_pending_mutations():
+        return
+    st.session_state.local_sync = False
+    try:
+        future.result()
+    except Exception as e:
+        st.toast(f"Failed to sync conversations: {e}", icon=":material/sync_problem:")
+        return
+    # As many synced rows as were shown, paging on continues from the local store
+    shown = len(st.session_state.convos or [])
+    if page := load_local_conversations(limit=max(shown, CONVERSATION_PAGE_SIZE)):
+        st.session_state.convos = _merge_synced(page["items"])
+        st.session_state.convos_cursor = page["next_cursor"]
+        st.session_state.convos_local = True
+        st.rerun()
+
+
+def _merge_synced(synced: list) -> list:
+    # The sync only saw the server as it was when it started. Conversations created since then are
+    # kept, ones deleted since then are not brought back. `synced` may be only the first rows.
+    convos = st.session_state.convos
+    if convos is None:
+        return synced
+    known = st.session_state.get("local_sync_ids", set())
+    current = {c["id"] for c in convos}
+    synced_ids = {c["id"] for c in synced}
+    created = [c for c in convos if c["id"] not in known and c["id"] not in synced_ids]
+    return created + [c for c in synced if c["id"] in current or c["id"] not in known]
+
+
+@st.fragment(run_every=1.0)
+def _apply_pushed_changes():
+    # Drains the session's realtime feed, the app only reruns when something shown has changed
+    if (feed := get_change_feed()) and apply_changes(feed.drain()):
+        st.rerun()
+
+
+@st.fragment(run_every=0.5)
+def _await_mutations():
+    # Reruns the app once a background write has finished so it can be reconciled
+    if has_finished_mutations():
+        st.rerun()
+
+
+def open_clicked_conversation():
+    """
+    Opens the conversation picked in the sidebar. Runs before the page is chosen, so the click needs
+    a single full rerun rather than one to record it and another to switch pages.
+    """
+    clicked_convo_id = st.session_state.get("clicked_convo_id")
+    if not clicked_convo_id:
+        return
+    try:
+        convo = next(c for c in st.session_state.convos if c["id"] == clicked_convo_id)
+        st.session_state.selected_convo = convo
+        st.session_state.page = "convo"
+        st.session_state.messages.clear()
+        st.session_state.messages_cursor = None
+        if not is_pending(convo):
+            page = fetch_conversation_turns_page(convo["id"])
+            st.session_state.messages.replace(page["messages"])
+            st.session_state.messages_cursor = page["next_cursor"]
+            get_convo_index().add_turns(convo["id"], page["messages"])
+    except Exception as e:
+        st.sidebar.error(f"Failed to load conversation history: {e}")
+        st.session_state.messages.replace([{"role": "assistant", "content": "SAMPLE MESSAGE"}])
+    st.session_state.clicked_convo_id = None
+
+
+@st.fragment()
+@traced()
+def _render_conversation_list():
+    # Refreshing and paging only rerun the list, opening a conversation reruns the app
+    cols = st.columns([1, 0.15])
+    with cols[0]:
+        st.markdown("### Chats")
+    with cols[1]:
+        if get_change_feed() and get_realtime_hub().is_connected(st.session_state.jwt):
+            # Changes are pushed, there's nothing to refresh
+            st.caption(":green[:material/sensors:]", help="Live updates are on.")
+        elif st.button("", icon=":material/refresh:", type="tertiary"):
+            if monotonic() - st.session_state.get("convos_loaded_at", 0.0) > REFRESH_DEBOUNCE_SECONDS:
+                invalidate_cached()
+                st.session_state.convos = None
+                st.session_state.local_sync = None
+
+    try:
+        if st.session_state.convos is None:
+            # Drawn from the local store when it has the user's conversations, synced in the background
+            if page := load_local_conversations():
+                st.session_state.convos_local = True
+            else:
+                page = fetch_conversations_page()
+                st.session_state.convos_local = False
+            st.session_state.convos = page["items"]
+            st.session_state.convos_cursor = page["next_cursor"]
+            st.session_state.convos_loaded_at = monotonic()
+            _start_local_sync()
+
+        index = get_convo_index()
+        query = st.text_input(
+            "Search conversations",
+            key="convo_search",
+            placeholder="Search conversations",
+            icon=":material/search:",
+            label_visibility="collapsed"
+        ).strip()
+        convos = index.search(query) if query else index.ordered()
+
+        with st.container(height=420, border=False):
+            if query:
+                if not convos:
+                    st.caption("No matching conversations.")
+                elif len(convos) > SEARCH_RESULT_LIMIT:
+                    st.caption(f"Showing {SEARCH_RESULT_LIMIT} of {len(convos)} matches.")
+            for convo in convos[:SEARCH_RESULT_LIMIT] if query else convos:
+                segment_button(convo)
+
+            # Only the pages loaded so far are rendered and searched, older conversations are read from
+            # the local store or fetched on demand
+            if st.session_state.convos_cursor:
+                if st.button("Load more", key="load_more_convos", icon=":material/expand_more:", type="tertiary", use_container_width=True):
+                    load_page = load_local_conversations if st.session_state.convos_local else fetch_conversations_page
+                    page = load_page(cursor=st.session_state.convos_cursor)
+                    loaded_ids = {c["id"] for c in st.session_state.convos}
+                    for convo in page["items"]:
+                        if convo["id"] not in loaded_ids:
+                            st.session_state.convos.append(convo)
+                            index.upsert(convo)
+                    st.session_state.convos_cursor = page["next_cursor"]
+                    rerun_fragment()
+
+    except Exception as e:
+        st.error(f"Error fetching conversations: {e}")
+        st.session_state.convos = None
+
+
+@st.fragment()
+def _render_agent_settings():
+    # Edits here are only read when a conversation or batch is started, they don't rerun the page
+    with st.expander("Agent Settings", icon=":material/auto_transmission:"):
+        uploaded_plan = st.file_uploader(
+            label="**NDIS Plan**",
+            type="pdf",
+            accept_multiple_files=False,
+            disabled=st.session_state["disable_file_upload"]
+        )
+
+        if uploaded_plan and not st.session_state.get("plan_uploaded"):
+            progress = st.progress(0.0, text="Uploading…")
+            try:
+                result = upload_plan(
+                    uploaded_plan,
+                    on_progress=lambda done, total: progress.progress(
+                        done / total if total else 1.0,
+                        text=f"Uploading… {done / 2**20:.1f} / {total / 2**20:.1f} MB"
+                    )
+                )
+                progress.empty()
+                if result and result.get("skipped"):
+                    st.success("✅ This plan has already been uploaded.")
+                else:
+                    st.success("✅ Uploaded successfully!")
+                st.session_state.plan_uploaded = True
+            except Exception as e:
+                progress.empty()
+                st.error(f"Upload failed: {e}")
+
+        current_value = st.text_area(
+            label="**System Prompt**",
+            value=st.session_state.set_system_prompt,
+            placeholder="Enter system prompt...",
+            key="prompt_text_area"
+        )
+
+        if current_value != st.session_state.set_system_prompt:
+            st.session_state.set_system_prompt = current_value
+            st.toast("System prompt updated.", icon=":material/edit:")
+
+
+@traced()
 def render_sidebar():
     st.sidebar.title("Clover Demo")
 
+    for error in reconcile_mutations():
+        st.toast(error, icon=":material/error:")
+    if has_pending_mutations():
+        _await_mutations()
+
     st.session_state.get("clicked_convo_id", None)
 
     cols = st.sidebar.columns([0.1, 0.475])
@@ -44,92 +273,51 @@ def render_sidebar():
                 }
 
 
-                convo = create_conversation(
+                convo = create_conversation_optimistic(
                     conversation_name=get_random_conversation_name(),
                     agent_config=temp_agent_config
                 )
-                st.cache_data.clear()
-                st.session_state.convos = None
                 st.session_state.selected_convo = convo
                 st.session_state.new_convo_name = convo["name"]
-                st.session_state.messages = []
+                st.session_state.messages.clear()
+                st.session_state.messages_cursor = None
                 st.session_state.page = "convo"
                 st.rerun()
             except Exception as e:
                 st.sidebar.error(f"Failed to create conversation: {e}")
 
-    with st.sidebar.expander("Agent Settings", icon=":material/auto_transmission:"):
-        uploaded_plan = st.file_uploader(
-            label="**NDIS Plan**",
-            type="pdf",
-            accept_multiple_files=False,
-            disabled=st.session_state["disable_file_upload"]
-        )
-
-        if uploaded_plan and not st.session_state.get("plan_uploaded"):
-            try:
-                with st.spinner("Uploading…"):
-                    upload_plan(uploaded_plan)
-                st.success("✅ Uploaded successfully!")
-                st.session_state.plan_uploaded = True
-            except Exception as e:
-                st.error(f"Upload failed: {e}")
-
-        current_value = st.text_area(
-            label="**System Prompt**",
-            value=st.session_state.set_system_prompt,
-            placeholder="Enter system prompt...",
-            key="prompt_text_area"
-        )
-
-        if current_value != st.session_state.set_system_prompt:
-            st.session_state.set_system_prompt = current_value
-            st.toast("System prompt updated.", icon=":material/edit:")
-
+    if st.sidebar.button("Batch Evaluation", key="batch_eval", width="stretch", icon=":material/fact_check:"):
+        st.session_state.page = "batch"
+        st.session_state.selected_convo = None
+        st.rerun()
 
-    colsB = st.sidebar.columns([1, 0.15])
-    with colsB[0]:
-        st.markdown("### Chats")
-    with colsB[1]:
-        if st.button("", icon=":material/refresh:", type="tertiary"):
-            st.cache_data.clear()
-            st.rerun()
+    if st.sidebar.button("Compare Prompts", key="compare_prompts", width="stretch", icon=":material/compare:"):
+        st.session_state.page = "compare"
+        st.session_state.selected_convo = None
+        st.rerun()
 
-    try:
-        if not st.session_state.convos:
-            st.session_state.convos = fetch_conversations()
+    with st.sidebar:
+        _render_agent_settings()
+        _render_conversation_list()
+        if st.session_state.get("local_sync"):
+            _await_local_sync()
+        if get_change_feed():
+            _apply_pushed_changes()
 
-        sorted_convos = sort_recent_conversations(st.session_state.convos)
+    # Recent transcripts load in the background, opening one of them is a cache hit
+    prefetch_recent_conversations()
 
-        with st.sidebar.container(height=420, border=False):
-            for convo in sorted_convos:
-                segment_button(convo)
-
-    except Exception as e:
-        st.sidebar.error(f"Error fetching conversations: {e}")
-        st.session_state.convos = []
+    render_latency_panel()
 
     st.sidebar.markdown("---")
 
     if st.sidebar.button("Log Out", icon=":material/logout:"):
         try:
-            st.session_state.supabase_client.auth.sign_out()
+            sign_out(st.session_state.jwt)
         except Exception as e:
             st.warning(f"Logout error: {e}")
+        get_prefetcher().cancel(st.session_state.jwt)
+        invalidate_cached()
         st.session_state.clear()
-        st.cache_data.clear()
         st.session_state["initial_login"] = False
         st.rerun()
-
-    clicked_convo_id = st.session_state.get("clicked_convo_id")
-    if st.session_state.clicked_convo_id:
-        try:
-            convo = next(c for c in st.session_state.convos if c["id"] == clicked_convo_id)
-            st.session_state.selected_convo = convo
-            st.session_state.page = "convo"
-            st.session_state.messages = fetch_conversation_turns(convo["id"])
-        except Exception as e:
-            st.sidebar.error(f"Failed to load conversation history: {e}")
-            st.session_state.messages = [{"role": "assistant", "content": "SAMPLE MESSAGE"}]
-        st.session_state.clicked_convo_id = None
-        st.rerun()
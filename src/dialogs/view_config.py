@@ -2,36 +2,41 @@
 
 import streamlit as st
 
-from src.utils.backend import delete_conversation, update_conversation_name, log_conversation
+from src.utils.backend import fetch_conversation_details, log_conversation
 from src.utils.misc import iso_to_readable
+from src.utils.mutations import await_created, delete_conversation_optimistic, rename_conversation_optimistic
+from src.utils.telemetry import traced
 
 
 @st.dialog(":material/manufacturing: Conversation Settings", width="large")
+@traced()
 def render_view_config_dialog_ui(convo):
     try:
+        convo = await_created(convo)
         cols = st.columns([0.2,0.26,0.53])
         with cols[1]:
+            # The log is only built when the button is clicked
+            jwt = st.session_state.jwt
             st.download_button(
                 label="Download Log",
                 key="download_convo_log",
                 icon=":material/download:",
-                data=log_conversation(convo_id=convo["id"]),
+                data=lambda: log_conversation(convo["id"], convo.get("updated_at"), jwt=jwt),
                 file_name=f"{convo['name']}.txt",
-                mime="text/plain"
+                mime="text/plain",
+                on_click="ignore"
             )
         with cols[2]:
             text = "Delete" if not st.session_state.get("deletion_confirmation", False) else "Confirm Delete"
             if st.button(label=text, icon=":material/delete:"):
                 if st.session_state["deletion_confirmation"]:
                     st.session_state.deleted_convo_name = convo["name"]
-                    delete_conversation(convo["id"])
+                    delete_conversation_optimistic(convo)
 
                     if st.session_state.selected_convo == convo:
-                        st.session_state.messages = []
+                        st.session_state.messages.clear()
                         st.session_state.page = "home"
 
-                    st.cache_data.clear()
-                    st.session_state.convos = None
                     st.rerun()
                 else:
                     st.session_state["deletion_confirmation"] = True
@@ -54,18 +59,17 @@ def render_view_config_dialog_ui(convo):
 
         # Update convo name here
         if convo_name != convo["name"]:
-            update_conversation_name(convo["id"], convo_name)
-            convo["name"] = convo_name
-            st.session_state.convos = None
-            st.cache_data.clear()
+            rename_conversation_optimistic(convo, convo_name)
             st.rerun()
 
-        agent_config = convo.get("agent_config", {})
+        # Listed conversations only carry their name and timestamp, the rest is fetched on open
+        details = convo if "agent_config" in convo else fetch_conversation_details(convo["id"])
+        agent_config = details.get("agent_config") or {}
 
 
         st.markdown(f"""
                 **Metadata**
-                - **Created At**: `{iso_to_readable(convo.get("created_at", "1970-01-01T00:00:00.000000+00:00"))}`
+                - **Created At**: `{iso_to_readable(details.get("created_at", "1970-01-01T00:00:00.000000+00:00"))}`
                 - **Updated At**: `{iso_to_readable(convo.get("updated_at", "1970-01-01T00:00:00.000000+00:00"))}`
                 - **Turns**: `99`
     
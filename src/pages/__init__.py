@@ -1,5 +1,21 @@
 # /src/pages/__init__.py
 
-from .login import render_login_ui
-from .home import render_home_ui
-from .conversation import render_conversation_ui
+import importlib
+
+# Each page is imported when it is first rendered, so the login page doesn't load pandas or the backend
+_EXPORTS = {
+    "render_login_ui": ".login",
+    "render_home_ui": ".home",
+    "render_conversation_ui": ".conversation",
+    "render_batch_ui": ".batch",
+    "render_compare_ui": ".compare",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = globals()[name] = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    return value
@@ -0,0 +1,121 @@
+# /src/pages/batch.py
+
+import time
+
+import pandas as pd
+import streamlit as st
+
+from src.utils.batch import MESSAGE_COLUMN, BatchCell, build_variants, run_batch
+from src.utils.response_cache import RESPONSE_CACHE
+from src.utils.telemetry import traced
+
+
+def _results_grid(cells: list[BatchCell], messages: list[str], variants: list[str], show_latency: bool) -> pd.DataFrame:
+    grid = pd.DataFrame("…", index=range(len(messages)), columns=variants, dtype=object)
+    for cell in cells:
+        if show_latency:
+            value = f"{cell.duration_ms / 1000:.1f}s"
+        else:
+            value = f"Error: {cell.error}" if cell.error else cell.response
+        if cell.cached:
+            value = f"[cached] {value}"
+        grid.at[cell.message_index, cell.variant] = value
+    grid.insert(0, MESSAGE_COLUMN, messages)
+    return grid
+
+
+@traced()
+def render_batch_ui():
+    st.title(":material/fact_check: Batch Evaluation")
+    st.caption(
+        "Run a list of test messages against one or more system prompts at once. Every message is sent "
+        "in its own new conversation per variant, all in parallel."
+    )
+
+    messages_text = st.text_area(
+        "**Test messages** (one per line)",
+        key="batch_messages",
+        height=150,
+        placeholder="What supports does my plan cover?\nCan I use my core budget for transport?",
+    )
+
+    # Seeded once from the sidebar's system prompt, edits are kept by the editor's own state
+    if "batch_variant_rows" not in st.session_state:
+        st.session_state.batch_variant_rows = pd.DataFrame([{
+            "name": "Current",
+            "system_prompt": st.session_state.set_system_prompt or st.session_state.default_system_prompt,
+            "temperature": 0.4,
+            "max_tokens": 400,
+        }])
+
+    st.write("**Variants**")
+    rows = st.data_editor(
+        st.session_state.batch_variant_rows,
+        key="batch_variants",
+        num_rows="dynamic",
+        width="stretch",
+        column_config={
+            "name": st.column_config.TextColumn("Name", width="small"),
+            "system_prompt": st.column_config.TextColumn("System Prompt", width="large"),
+            "temperature": st.column_config.NumberColumn("Temperature", min_value=0.0, max_value=2.0, step=0.1),
+            "max_tokens": st.column_config.NumberColumn("Max Tokens", min_value=1, step=1),
+        },
+    )
+
+    messages = [line.strip() for line in messages_text.splitlines() if line.strip()]
+    variants = build_variants(rows.to_dict("records"))
+
+    use_cache = RESPONSE_CACHE and st.checkbox(
+        "Reuse cached responses",
+        value=True,
+        key="batch_use_cache",
+        help="Unchanged cases are answered from the response cache instead of the LLM."
+    )
+
+    if st.button(
+        f"Run {len(messages) * len(variants)} calls",
+        icon=":material/play_arrow:",
+        disabled=not messages or not variants,
+    ):
+        cells: list[BatchCell] = []
+        names = [v.name for v in variants]
+        total = len(messages) * len(variants)
+        progress = st.progress(0.0, text="Running…")
+        grid = st.empty()
+        started = time.perf_counter()
+
+        for cell in run_batch(messages, variants, st.session_state.jwt, use_cache):
+            cells.append(cell)
+            progress.progress(len(cells) / total, text=f"{len(cells)} / {total} done")
+            grid.dataframe(_results_grid(cells, messages, names, False), hide_index=True)
+
+        progress.empty()
+        grid.empty()
+        st.session_state.batch_results = {
+            "cells": cells,
+            "messages": messages,
+            "variants": names,
+            "elapsed": time.perf_counter() - started,
+        }
+        # The batch created new conversations, reload the sidebar list
+        st.session_state.convos = None
+
+    results = st.session_state.get("batch_results")
+    if not results:
+        return
+
+    cells = results["cells"]
+    errors = sum(cell.error is not None for cell in cells)
+    cached = sum(cell.cached for cell in cells)
+    total_call_time = sum(cell.duration_ms for cell in cells) / 1000
+    st.caption(
+        f"{len(cells)} calls in {results['elapsed']:.1f}s ({total_call_time:.1f}s if run one by one)"
+        + (f", {cached} from cache" if cached else "")
+        + (f", {errors} failed" if errors else "")
+    )
+    show_latency = st.toggle("Show latency", key="batch_show_latency")
+    st.dataframe(
+        _results_grid(cells, results["messages"], results["variants"], show_latency),
+        hide_index=True,
+        width="stretch",
+    )
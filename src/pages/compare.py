@@ -0,0 +1,153 @@
+# /src/pages/compare.py
+
+import time
+from datetime import datetime, timezone
+
+import streamlit as st
+
+from src.utils.batch import build_variants
+from src.utils.compare import create_compare_conversations, stream_compare_turn
+from src.utils.convo_index import get_convo_index
+from src.utils.misc import rerun_fragment
+from src.utils.telemetry import traced
+
+# More columns than this get too narrow to read side by side
+MAX_COMPARE_VARIANTS = 4
+
+
+def _render_setup():
+    st.caption(
+        "Send every message to two or more conversations at once, each created with its own system "
+        "prompt, and read the answers side by side as they arrive."
+    )
+
+    # Seeded once from the sidebar's system prompt, edits are kept by the editor's own state
+    if "compare_variant_rows" not in st.session_state:
+        prompt = st.session_state.set_system_prompt or st.session_state.default_system_prompt
+        st.session_state.compare_variant_rows = [
+            {"name": name, "system_prompt": prompt, "temperature": 0.4, "max_tokens": 400} for name in ("A", "B")
+        ]
+
+    st.write("**Variants**")
+    rows = st.data_editor(
+        st.session_state.compare_variant_rows,
+        key="compare_variants",
+        num_rows="dynamic",
+        width="stretch",
+        column_config={
+            "name": st.column_config.TextColumn("Name", width="small"),
+            "system_prompt": st.column_config.TextColumn("System Prompt", width="large"),
+            "temperature": st.column_config.NumberColumn("Temperature", min_value=0.0, max_value=2.0, step=0.1),
+            "max_tokens": st.column_config.NumberColumn("Max Tokens", min_value=1, step=1),
+        },
+    )
+    variants = build_variants(rows)
+    if len(variants) > MAX_COMPARE_VARIANTS:
+        st.warning(f"At most {MAX_COMPARE_VARIANTS} variants can be compared at once.")
+
+    if st.button(
+        f"Compare {len(variants)} variants",
+        icon=":material/play_arrow:",
+        disabled=not 2 <= len(variants) <= MAX_COMPARE_VARIANTS,
+    ):
+        try:
+            convos = create_compare_conversations(variants, st.session_state.jwt)
+        except Exception as e:
+            st.error(f"Failed to create conversations: {e}")
+            return
+        # Listed in the sidebar like conversations created there
+        if st.session_state.convos is not None:
+            for convo in convos:
+                st.session_state.convos.insert(0, convo)
+                get_convo_index().upsert(convo)
+        st.session_state.compare = {
+            "variants": [variant.name for variant in variants],
+            "configs": [variant.agent_config for variant in variants],
+            "convos": convos,
+            "turns": [],
+        }
+        st.rerun()
+
+
+def _render_answer(text: str, error: str | None = None, duration_ms: float | None = None):
+    with st.chat_message("assistant"):
+        if error:
+            st.error(f"**Error:** {error}")
+        if text:
+            st.markdown(text)
+    if duration_ms is not None:
+        st.caption(f"{duration_ms / 1000:.1f}s")
+
+
+@traced()
+def render_compare_ui():
+    st.title(":material/compare: Compare Prompts")
+
+    compare = st.session_state.get("compare")
+    if not compare:
+        _render_setup()
+        return
+
+    if st.button("New comparison", icon=":material/restart_alt:", type="tertiary"):
+        st.session_state.compare = None
+        st.rerun()
+
+    for col, name, config in zip(st.columns(len(compare["variants"])), compare["variants"], compare["configs"]):
+        with col:
+            st.markdown(f"**{name}**")
+            st.caption(config["system_prompt"], help=f"Temperature {config['temperature']}, max tokens {config['max_tokens']}")
+
+    _render_compare_transcript()
+
+
+@st.fragment()
+@traced()
+def _render_compare_transcript():
+    # A comparison turn only reruns the transcript, like a turn on the conversation page
+    compare = st.session_state.compare
+    width = len(compare["variants"])
+
+    for turn in compare["turns"]:
+        with st.chat_message("user"):
+            st.markdown(turn["message"])
+        for col, text, error, duration_ms in zip(st.columns(width), turn["answers"], turn["errors"], turn["durations"]):
+            with col:
+                _render_answer(text, error, duration_ms)
+        st.caption(
+            f"All answers in {turn['elapsed']:.1f}s ({sum(turn['durations']) / 1000:.1f}s one after another)"
+        )
+
+    if prompt := st.chat_input("Message every variant..."):
+        with st.chat_message("user"):
+            st.markdown(prompt)
+
+        placeholders = []
+        for col in st.columns(width):
+            with col:
+                placeholders.append(st.empty())
+
+        answers, errors, durations = [""] * width, [None] * width, [0.0] * width
+        started = time.perf_counter()
+        # Chunks of every answer arrive through one queue, each redraws only its own column
+        for event in stream_compare_turn(compare["convos"], compare["configs"], prompt, st.session_state.jwt):
+            i = event.index
+            if event.done:
+                errors[i], durations[i] = event.error, event.duration_ms
+            else:
+                answers[i] += event.text
+            with placeholders[i].container():
+                _render_answer(answers[i], errors[i], durations[i] if event.done else None)
+
+        compare["turns"].append({
+            "message": prompt,
+            "answers": answers,
+            "errors": errors,
+            "durations": durations,
+            "elapsed": time.perf_counter() - started,
+        })
+        if (index := get_convo_index()) is not None:
+            now = str(datetime.now(timezone.utc))
+            for convo, answer in zip(compare["convos"], answers):
+                index.touch(convo["id"], now)
+                index.add_turns(convo["id"], [{"role": "user", "content": prompt}, {"role": "assistant", "content": answer}])
+        rerun_fragment()
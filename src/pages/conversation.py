@@ -1,9 +1,41 @@
 from datetime import datetime, timezone
 import streamlit as st
 
-from src.utils import query_llm_dev, stream_to_ui
-
+from src.utils import (
+    fetch_agent_config, fetch_conversation_turns_page, record_turn, stream_llm_dev, turn_cache_key, TURN_PAGE_SIZE
+)
+from src.utils.response_cache import RESPONSE_CACHE, get_response_cache
+from src.utils.convo_index import get_convo_index
+from src.utils.misc import rerun_fragment
+from src.utils.mutations import await_created
+from src.utils.telemetry import traced
+
+# Number of messages rendered at once, older ones are revealed on demand
+MESSAGE_WINDOW: int = 2 * TURN_PAGE_SIZE
+
+
+def _render_load_older(convo_id: str):
+    messages = st.session_state.messages
+    hidden = len(messages) - st.session_state.messages_window
+    if hidden <= 0 and not st.session_state.messages_cursor:
+        return
 
+    if st.button("Load older messages", icon=":material/history:", type="tertiary"):
+        if hidden <= 0:
+            try:
+                page = fetch_conversation_turns_page(convo_id, before=st.session_state.messages_cursor)
+            except Exception as e:
+                st.error(f"Failed to load older messages: {e}")
+                return
+            messages.prepend(page["messages"])
+            st.session_state.messages_cursor = page["next_cursor"]
+            if (index := get_convo_index()) is not None:
+                index.add_turns(convo_id, page["messages"])
+        st.session_state.messages_window += MESSAGE_WINDOW
+        rerun_fragment()
+
+
+@traced()
 def render_conversation_ui():
     convo = st.session_state.get("selected_convo")
 
@@ -14,38 +46,86 @@ def render_conversation_ui():
 
     st.title(f":material/chat: {convo['name']}")
 
-    # Show past messages
-    for msg in st.session_state.get("messages", []):
+    bypass_cache = RESPONSE_CACHE and st.toggle(
+        "Bypass response cache",
+        key=f"{convo['id']}_bypass_cache",
+        help="Always ask the LLM, even when an identical turn has been answered before."
+    )
+
+    if st.session_state.get("messages_window_convo") != convo["id"]:
+        st.session_state.messages_window_convo = convo["id"]
+        st.session_state.messages_window = MESSAGE_WINDOW
+
+    _render_transcript(bypass_cache)
+
+
+@st.fragment()
+@traced()
+def _render_transcript(bypass_cache: bool):
+    # New turns and older pages only rerun the transcript. It reads the selected conversation and its
+    # messages, anything that changes which conversation is shown must rerun the whole app.
+    convo = st.session_state.selected_convo
+
+    # Show past messages, only the most recent window is rendered
+    _render_load_older(convo["id"])
+    for msg in st.session_state.get("messages", [])[-st.session_state.messages_window:]:
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
+            if msg.get("cached"):
+                st.caption(":material/cached: Cached response")
 
     if not st.session_state.get("messages"):
         st.info(":material/info: Send a message or ask a question to get started.")
 
     # Prompt handler
     if prompt := st.chat_input("Type your message..."):
+        history_len = len(st.session_state.messages)
         st.session_state.messages.append({"role": "user", "content": prompt})
         st.session_state.selected_convo["updated_at"] = str(datetime.now(timezone.utc))
+        if (index := get_convo_index()) is not None:
+            index.touch(convo["id"], st.session_state.selected_convo["updated_at"])
+            index.add_turns(convo["id"], st.session_state.messages[-1:])
 
         with st.chat_message("user"):
             st.markdown(prompt)
 
         try:
+            convo = await_created(convo)
             convo_id = convo["id"]
-            full_response = ""
-
-            with st.chat_message("assistant"):
-                response_box = st.empty()
-
-                with st.spinner("Thinking..."):
-                    response_text = query_llm_dev(convo_id, prompt, convo.get("agent_config"))
-
-                for chunk in stream_to_ui(response_text):
-                    full_response += chunk
-                    response_box.markdown(full_response)
-
-            st.session_state.messages.append({"role": "assistant", "content": full_response})
-            st.rerun()
+            # Listed conversations come without their config, it is fetched once per conversation
+            agent_config = convo.get("agent_config") or fetch_agent_config(convo_id)
+
+            cache_key = None
+            max_turns = int(agent_config.get("max_previous_turns", 0) or 0)
+            # Only the turns the agent sees, older ones may have been spilled to disk
+            history = st.session_state.messages[max(0, history_len - 2 * max_turns):history_len]
+            # Only trust the key when every prior turn the agent will see has been loaded
+            if not bypass_cache and (len(history) >= 2 * max_turns or not st.session_state.messages_cursor):
+                cache_key = turn_cache_key(agent_config, history, prompt)
+            cached = get_response_cache().get(cache_key) if cache_key else None
+
+            if cached is not None:
+                # Served from disk, the turn is still added to the server-side transcript so the
+                # history of later turns matches what is shown here
+                try:
+                    record_turn(convo_id, prompt, cached)
+                except Exception:
+                    # Without the insert the server would miss this turn, ask the LLM instead
+                    cached = None
+            if cached is not None:
+                st.session_state.messages.append({"role": "assistant", "content": cached, "cached": True})
+            else:
+                with st.chat_message("assistant"):
+                    full_response = st.write_stream(
+                        stream_llm_dev(convo_id, prompt, agent_config)
+                    )
+
+                if cache_key and full_response:
+                    get_response_cache().set(cache_key, full_response)
+                st.session_state.messages.append({"role": "assistant", "content": full_response})
+            if (index := get_convo_index()) is not None:
+                index.add_turns(convo_id, st.session_state.messages[-1:])
+            rerun_fragment()
 
         except Exception as e:
             st.error(f"Error while fetching response: {e}")
@@ -1,17 +1,13 @@
 # /src/auth.py
 
 import streamlit as st
-from supabase import create_client, Client
 
+from src.utils.auth import sign_in_with_password
 
-SUPABASE_URL: str = st.secrets.get("SUPABASE_URL")
-SUPABASE_KEY: str = st.secrets.get("SUPABASE_ANON_KEY")
 
 DEFAULT_EMAIL: str = st.secrets.get("DEFAULT_EMAIL")
 DEFAULT_PASSWORD: str = st.secrets.get("DEFAULT_PASSWORD")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
 def render_login_ui() -> None | bool:
     if st.session_state.user is not None:
         return True
@@ -19,10 +15,10 @@ def render_login_ui() -> None | bool:
     if st.secrets.get("AUTO_LOGIN") and st.session_state.initial_login:
         try:
             st.spinner("Logging in...")
-            result = supabase.auth.sign_in_with_password({
-                "email": DEFAULT_EMAIL,
-                "password": DEFAULT_PASSWORD,
-            })
+            result = sign_in_with_password(
+                email=DEFAULT_EMAIL,
+                password=DEFAULT_PASSWORD,
+            )
             st.session_state.user = result.user
             st.session_state.jwt = result.session.access_token
             st.session_state.page = "home"
@@ -42,10 +38,10 @@ def render_login_ui() -> None | bool:
     if st.button("Log In", icon=":material/login:"):
         try:
             st.spinner("Logging in...")
-            result = supabase.auth.sign_in_with_password({
-                "email": email,
-                "password": password,
-            })
+            result = sign_in_with_password(
+                email=email,
+                password=password,
+            )
             st.session_state.user = result.user
             st.session_state.jwt = result.session.access_token
             st.session_state.page = "home"
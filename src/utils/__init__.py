@@ -1,4 +1,17 @@
 # /src/utils/__init__.py
 
-from .backend import *
-from .misc import *
+import importlib
+
+# `from src.utils import name` resolves against these modules on first use, importing a single
+# utility module no longer loads the backend client
+_STAR_MODULES = (".backend", ".misc")
+
+
+def __getattr__(name: str):
+    if not name.startswith("_"):
+        for module_name in _STAR_MODULES:
+            module = importlib.import_module(module_name, __name__)
+            if hasattr(module, name):
+                value = globals()[name] = getattr(module, name)
+                return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,56 @@
+# /src/utils/auth.py
+
+from typing import TYPE_CHECKING
+
+import streamlit as st
+
+from src.utils.http import get_http_client
+
+if TYPE_CHECKING:
+    from gotrue.types import AuthResponse
+
+# Auth and PostgREST calls go straight to the Supabase REST APIs over the shared HTTP client with the
+# session's JWT on each request, rather than through a supabase-py client whose auth state is global.
+SUPABASE_URL: str = (st.secrets.get("SUPABASE_URL") or "").rstrip("/")
+SUPABASE_KEY: str = st.secrets.get("SUPABASE_ANON_KEY")
+
+SUPABASE_AUTH_URL = f"{SUPABASE_URL}/auth/v1"
+SUPABASE_REST_URL = f"{SUPABASE_URL}/rest/v1"
+
+
+def supabase_headers(jwt: str | None = None) -> dict:
+    """
+    Headers for a Supabase REST request made on behalf of the given user (or anonymously).
+    """
+    return {
+        "apikey": SUPABASE_KEY,
+        "Authorization": f"Bearer {jwt or SUPABASE_KEY}",
+    }
+
+
+def sign_in_with_password(email: str, password: str) -> "AuthResponse":
+    # gotrue takes about 0.3s to import and is only needed to parse this response
+    from gotrue.helpers import parse_auth_response
+
+    response = get_http_client().post(
+        f"{SUPABASE_AUTH_URL}/token",
+        headers=supabase_headers(),
+        params={"grant_type": "password"},
+        json={"email": email, "password": password},
+        timeout=10
+    )
+    response.raise_for_status()
+    return parse_auth_response(response.json())
+
+
+def sign_out(jwt: str):
+    """
+    Revoke the sessions of the user `jwt` belongs to, no shared client state is touched.
+    """
+    response = get_http_client().post(
+        f"{SUPABASE_AUTH_URL}/logout",
+        headers=supabase_headers(jwt),
+        params={"scope": "global"},
+        timeout=5
+    )
+    response.raise_for_status()
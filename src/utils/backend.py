@@ -1,54 +1,315 @@
 # /src/utils.py
 
 import requests
-from typing import Dict
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Callable, Dict, Hashable, Iterator, Tuple
+from uuid import uuid4
+import copy
+import io
 import json
 
 import streamlit as st
 import urllib.parse
 import urllib3
 
+from src.utils.auth import SUPABASE_REST_URL, supabase_headers
+from src.utils.cache import CONVERSATION_DETAILS, CONVERSATIONS, LOGS, TURNS, get_user_cache, user_key
+from src.utils.http import get_http_client
+from src.utils.local_store import LOCAL_STORE, LocalStore, get_local_store
 from src.utils.misc import iso_to_readable
+from src.utils.resilience import ResilienceConfig, TurnRouter
+from src.utils.response_cache import RESPONSE_CACHE, response_key
+from src.utils.telemetry import traced
+from src.utils.upload import upload_file_resumable
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 SUPABASE_FUNCTIONS_URL = f"{st.secrets.get("SUPABASE_URL")}/functions/v1"
 
+DEDICATED_API_URL = st.secrets.get("FASTAPI_BASE_URL")  # For testing using dedicated server API
+LOCAL_API_URL = "http://127.0.0.1:8000/api"  # For testing using a locally hosted API
+
 USE_DEDICATED_SERVER: bool = True
 if USE_DEDICATED_SERVER:
-    FASTAPI_BASE_URL = st.secrets.get("FASTAPI_BASE_URL")  # For testing using dedicated server API
+    FASTAPI_BASE_URL = DEDICATED_API_URL
+    FALLBACK_API_URL = LOCAL_API_URL
 else:
-    FASTAPI_BASE_URL = "http://127.0.0.1:8000/api"  # For testing using a locally hosted API
+    FASTAPI_BASE_URL = LOCAL_API_URL
+    FALLBACK_API_URL = DEDICATED_API_URL
+
+STREAM_RESPONSES: bool = bool(st.secrets.get("STREAM_RESPONSES", True))
+
+CONVERSATION_PAGE_SIZE: int = int(st.secrets.get("CONVERSATION_PAGE_SIZE", 25))
+TURN_PAGE_SIZE: int = int(st.secrets.get("TURN_PAGE_SIZE", 10))
+# Rows per request when the local store syncs the full conversation list
+SYNC_PAGE_SIZE: int = int(st.secrets.get("SYNC_PAGE_SIZE", 1000))
+LOG_CACHE_TTL: float = float(st.secrets.get("LOG_CACHE_TTL", 600))
+# A conversation's agent config never changes once it is created
+DETAILS_CACHE_TTL: float = float(st.secrets.get("DETAILS_CACHE_TTL", 3600))
+
+# Columns the conversation list needs, the agent config (and its system prompt) is fetched per
+# conversation when a turn is sent or its config is viewed
+CONVERSATION_LIST_COLUMNS = ("id", "name", "updated_at")
+CONVERSATION_DETAIL_COLUMNS = ("id", "created_at", "agent_config")
+
+# Status codes returned by a turn endpoint that does not understand streaming requests
+_STREAM_UNSUPPORTED = {404, 405, 406, 415, 422}
 
 # Headers
-def _auth_headers():
+# Functions that may run off the script thread accept an explicit `jwt`, st.session_state is only
+# read when it is omitted.
+def _auth_headers(jwt: str | None = None):
     auth = {
-        "Authorization": f"Bearer {st.session_state.jwt}",
+        "Authorization": f"Bearer {jwt or st.session_state.jwt}",
     }
     return auth
 
+# Coalescing
+class SingleFlight:
+    """
+    Lets concurrent callers asking for the same key share one in-flight call, so a burst of reruns
+    or a double click costs a single round trip. Waiting callers get a copy of the leader's result.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = Lock()
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+
+    def forget(self, user: str, resource: str | None = None):
+        """
+        Detach in-flight reads of a user (or one resource), later callers start a fresh request.
+        """
+        with self._lock:
+            for key in [k for k in self._calls if k[0] == user and (resource is None or k[1] == resource)]:
+                del self._calls[key]
+
+@st.cache_resource(show_spinner=False)
+def _get_single_flight() -> SingleFlight:
+    return SingleFlight()
+
+# Cache
+def _cache_user(jwt: str | None = None) -> str:
+    return user_key(jwt or st.session_state.jwt)
+
+def _cached_load(resource: str, key: Hashable, loader: Callable, jwt: str | None = None, ttl: float | None = None):
+    # Cache misses for the same entry are coalesced into one request
+    user = _cache_user(jwt)
+    return get_user_cache().get_or_load(
+        user, resource, key,
+        lambda: _get_single_flight().do((user, resource, key), loader),
+        ttl=ttl
+    )
+
+def _idempotent(idempotency_key: str, fn: Callable, jwt: str | None = None):
+    # Repeats of a mutation carry the same key, concurrent ones share the request
+    return _get_single_flight().do((_cache_user(jwt), "mutation", idempotency_key), fn)
+
+def invalidate_cached(resource: str | None = None, key=None, jwt: str | None = None):
+    """
+    Invalidate the current user's cached entries, all of them if no resource is given.
+    """
+    _get_single_flight().forget(_cache_user(jwt), resource)
+    cache = get_user_cache()
+    if resource is None:
+        cache.invalidate(_cache_user(jwt))
+    elif key is None:
+        cache.invalidate(_cache_user(jwt), resource)
+    else:
+        cache.invalidate(_cache_user(jwt), resource, key)
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    return get_user_cache().stats()
+
+def coalesced_requests() -> int:
+    return _get_single_flight().coalesced
+
+# Local Store
+def _local_store() -> LocalStore | None:
+    return get_local_store() if LOCAL_STORE else None
+
+def load_local_conversations(
+    jwt: str | None = None,
+    limit: int = CONVERSATION_PAGE_SIZE,
+    cursor: Tuple[str, str] | None = None
+) -> Dict | None:
+    """
+    One page of the user's conversations as of the last sync, newest first, shaped like
+    `fetch_conversations_page`. None while the local store is off or holds none of them.
+    """
+    if (store := _local_store()) is None:
+        return None
+    items, has_more = store.conversations_page(_cache_user(jwt), limit, cursor)
+    if not items and cursor is None:
+        return None
+    next_cursor = (items[-1]["updated_at"], items[-1]["id"]) if has_more else None
+    return {"items": items, "next_cursor": next_cursor}
+
+@traced()
+def sync_local_conversations(jwt: str | None = None):
+    """
+    Pull the conversations changed since the last sync into the local store and drop the ones
+    deleted on the server. Finding deletions takes the ids of all the user's conversations, only
+    the full rows are fetched incrementally.
+    """
+    store, user = get_local_store(), _cache_user(jwt)
+    watermark = store.watermark(user, CONVERSATIONS)
+    changed = _fetch_conversation_rows(CONVERSATION_LIST_COLUMNS, jwt, since=watermark)
+    store.put_conversations(user, changed)
+    store.prune_conversations(user, _fetch_conversation_ids(jwt))
+    if changed:
+        store.set_watermark(user, CONVERSATIONS, max(c["updated_at"] for c in changed))
+
+def _keyset_after(row: Dict) -> str:
+    # PostgREST filter for the rows after `row` in updated_at.desc,id.desc order, rows sharing its
+    # timestamp are told apart by their id
+    return f"(updated_at.lt.{row['updated_at']},and(updated_at.eq.{row['updated_at']},id.lt.{row['id']}))"
+
+def _fetch_conversation_rows(columns: tuple, jwt: str | None = None, since: str | None = None) -> list:
+    """
+    Every conversation row of the user, newest first, only those updated at or after `since` when
+    given. Pages are requested until one comes back empty, a short page alone could be PostgREST's
+    max-rows cutting the response.
+    """
+    rows = []
+    params = {
+        "select": ",".join(dict.fromkeys((*columns, "id", "updated_at"))),
+        "order": "updated_at.desc,id.desc",
+        "limit": SYNC_PAGE_SIZE
+    }
+    if since:
+        # Inclusive, rows sharing the watermark's timestamp are fetched again rather than missed
+        params["updated_at"] = f"gte.{since}"
+    while True:
+        if rows:
+            params["or"] = _keyset_after(rows[-1])
+        response = get_http_client().get(
+            f"{SUPABASE_REST_URL}/conversations",
+            headers=supabase_headers(jwt or st.session_state.jwt),
+            params=params,
+            timeout=10
+        )
+        response.raise_for_status()
+        if not (page := response.json()):
+            return rows
+        rows.extend(page)
+
+def _fetch_conversation_ids(jwt: str | None = None) -> list:
+    # Complete or an error, every stored conversation missing from it is deleted
+    return [row["id"] for row in _fetch_conversation_rows(("id",), jwt)]
+
+def _local_turns_page(convo_id: str, limit: int, before: str | None, jwt: str | None = None) -> Dict:
+    # Only turns newer than the stored ones are downloaded, and nothing at all when the stored
+    # conversation has not changed since its latest stored turn
+    store, user = get_local_store(), _cache_user(jwt)
+    latest = store.latest_turn_at(user, convo_id)
+    updated_at = store.conversation_updated_at(user, convo_id)
+    if latest is None or updated_at is None or latest < updated_at:
+        store.put_turns(user, convo_id, _fetch_turns_since(convo_id, latest, jwt))
+
+    turns, has_more = store.turns_page(user, convo_id, limit, before)
+    next_cursor = turns[0].get("created_at") if has_more and turns else None
+    return {"messages": _turns_to_messages(turns), "next_cursor": next_cursor}
+
+def _fetch_turns_since(convo_id: str, since: str | None, jwt: str | None = None) -> list:
+    params = {"conversation_id": convo_id}
+    if since:
+        params["since"] = since
+    response = get_http_client().get(
+        f"{SUPABASE_FUNCTIONS_URL}/turns",
+        headers=_auth_headers(jwt),
+        params=params,
+        timeout=10
+    )
+    response.raise_for_status()
+    payload = response.json()
+    turns = payload.get("items", []) if isinstance(payload, dict) else payload
+    return [t for t in turns if not since or (t.get("created_at") or "") >= since]
+
 # Backend Connections
-@st.cache_data(ttl=30)
-def fetch_conversations():
-    response = requests.get(
-        f"{SUPABASE_FUNCTIONS_URL}/conversations",
-        headers=_auth_headers(),
+@traced()
+def fetch_conversations_page(limit: int = CONVERSATION_PAGE_SIZE, cursor: str | None = None) -> Dict:
+    """
+    Fetch one page of conversations ordered by `updated_at` (newest first). `cursor` is the
+    `next_cursor` of the previous page, the returned `next_cursor` is None on the last page.
+    Cursors mark a position by `updated_at` and `id`, so conversations updated at the same
+    instant are split across pages without being skipped.
+    """
+    return _cached_load(CONVERSATIONS, ("page", limit, cursor), lambda: _fetch_conversations_page(limit, cursor))
+
+def _fetch_conversations_page(limit: int, cursor: str | None) -> Dict:
+    # PostgREST rather than the edge function, so only the listed columns are sent
+    # One row more than the page tells whether another page follows
+    params = {"select": ",".join(CONVERSATION_LIST_COLUMNS), "order": "updated_at.desc,id.desc", "limit": limit + 1}
+    if cursor:
+        params["or"] = cursor
+
+    response = get_http_client().get(
+        f"{SUPABASE_REST_URL}/conversations",
+        headers=supabase_headers(st.session_state.jwt),
+        params=params,
         timeout=5
     )
     response.raise_for_status()
-    return response.json()
+    items = response.json()
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = _keyset_after(items[-1]) if has_more else None
+    return {"items": items, "next_cursor": next_cursor}
+
+@traced()
+def fetch_conversation_details(convo_id: str, jwt: str | None = None) -> Dict:
+    """
+    The columns the conversation list leaves out (`created_at`, `agent_config`), cached per conversation.
+    """
+    return _cached_load(
+        CONVERSATION_DETAILS, convo_id, lambda: _fetch_conversation_details(convo_id, jwt), jwt=jwt, ttl=DETAILS_CACHE_TTL
+    )
 
-@st.cache_data(ttl=30)
-def fetch_conversation_turns(convo_id: str):
-    response = requests.get(
-        f"{SUPABASE_FUNCTIONS_URL}/turns",
-        headers=_auth_headers(),
-        params={"conversation_id": convo_id},
+def fetch_agent_config(convo_id: str, jwt: str | None = None) -> Dict:
+    return fetch_conversation_details(convo_id, jwt).get("agent_config") or {}
+
+def _fetch_conversation_details(convo_id: str, jwt: str | None = None) -> Dict:
+    response = get_http_client().get(
+        f"{SUPABASE_REST_URL}/conversations",
+        headers={
+            **supabase_headers(jwt or st.session_state.jwt),
+            "Accept": "application/vnd.pgrst.object+json",
+        },
+        params={"select": ",".join(CONVERSATION_DETAIL_COLUMNS), "id": f"eq.{convo_id}"},
         timeout=5
     )
     response.raise_for_status()
-    turns = response.json()
+    return response.json()
 
+def _turns_to_messages(turns: list) -> list:
     messages = []
     for turn in turns:
         if user_msg := turn.get("user_message"):
@@ -57,175 +318,464 @@ def fetch_conversation_turns(convo_id: str):
             messages.append({"role": "assistant", "content": assistant_msg})
     return messages
 
-def create_conversation(conversation_name: str, agent_config: dict | None = None) -> dict:
-    response = requests.post(
-        f"{SUPABASE_FUNCTIONS_URL}/conversations",
-        headers=_auth_headers(),
-        json={
-            "name": conversation_name,
-            "agent_config": agent_config
-          },
+@traced()
+def fetch_conversation_turns_page(
+    convo_id: str,
+    limit: int = TURN_PAGE_SIZE,
+    before: str | None = None,
+    jwt: str | None = None,
+    ttl: float | None = None
+) -> Dict:
+    """
+    Fetch the most recent `limit` turns older than `before` as chronologically ordered messages.
+    Pass the returned `next_cursor` as `before` to load the page preceding it, None means
+    the start of the conversation has been reached.
+    """
+    if LOCAL_STORE:
+        return _cached_load(TURNS, (convo_id, limit, before), lambda: _local_turns_page(convo_id, limit, before, jwt), jwt=jwt, ttl=ttl)
+    return _cached_load(TURNS, (convo_id, limit, before), lambda: _fetch_conversation_turns_page(convo_id, limit, before, jwt), jwt=jwt, ttl=ttl)
+
+def is_turns_page_cached(convo_id: str, limit: int = TURN_PAGE_SIZE, before: str | None = None, jwt: str | None = None) -> bool:
+    return get_user_cache().contains(_cache_user(jwt), TURNS, (convo_id, limit, before))
+
+def _fetch_conversation_turns_page(convo_id: str, limit: int, before: str | None, jwt: str | None = None) -> Dict:
+    # One turn more than the page tells whether older turns remain, like LocalStore.turns_page
+    params = {"conversation_id": convo_id, "limit": limit + 1, "order": "created_at.desc"}
+    if before:
+        params["before"] = before
+
+    response = get_http_client().get(
+        f"{SUPABASE_FUNCTIONS_URL}/turns",
+        headers=_auth_headers(jwt),
+        params=params,
         timeout=5
     )
     response.raise_for_status()
-    return response.json()
+    payload = response.json()
 
-def delete_conversation(conversation_id: str):
+    if isinstance(payload, dict):
+        turns = sorted(payload.get("items", []), key=lambda t: t.get("created_at") or "")
+        next_cursor = payload.get("next_cursor")
+    else:
+        # Tolerate an endpoint that ignores the paging parameters and returns the whole transcript
+        turns = sorted(payload, key=lambda t: t.get("created_at") or "")
+        if before:
+            turns = [t for t in turns if (t.get("created_at") or "") < before]
+        next_cursor = None
+    if len(turns) > limit:
+        turns = turns[-limit:]
+        next_cursor = turns[0].get("created_at")
+    return {"messages": _turns_to_messages(turns), "next_cursor": next_cursor}
+
+@traced()
+def create_conversation(
+    conversation_name: str,
+    agent_config: dict | None = None,
+    jwt: str | None = None,
+    idempotency_key: str | None = None
+) -> dict:
+    """
+    Create a conversation. Calls repeated with the same `idempotency_key` create it only once.
+    """
+    idempotency_key = idempotency_key or str(uuid4())
+
+    def create():
+        response = get_http_client().post(
+            f"{SUPABASE_FUNCTIONS_URL}/conversations",
+            headers={**_auth_headers(jwt), "Idempotency-Key": idempotency_key},
+            json={
+                "name": conversation_name,
+                "agent_config": agent_config
+              },
+            timeout=5
+        )
+        response.raise_for_status()
+        invalidate_cached(CONVERSATIONS, jwt=jwt)
+        convo = response.json()
+        if store := _local_store():
+            store.put_conversations(_cache_user(jwt), [convo])
+        return convo
+
+    return _idempotent(f"create-{idempotency_key}", create, jwt)
+
+@traced()
+def delete_conversation(conversation_id: str, jwt: str | None = None):
     """
     Permanently delete a conversation via the Supabase Edge Function.
     """
-    response = requests.delete(
-        f"{SUPABASE_FUNCTIONS_URL}/conversations/{conversation_id}",
-        headers=_auth_headers(),
-        timeout=5,
-        verify=False
-    )
-    response.raise_for_status()
-
-def log_conversation(convo_id: str) -> str:
+    def delete():
+        response = get_http_client().delete(
+            f"{SUPABASE_FUNCTIONS_URL}/conversations/{conversation_id}",
+            headers={**_auth_headers(jwt), "Idempotency-Key": f"delete-{conversation_id}"},
+            timeout=5,
+            verify=False
+        )
+        response.raise_for_status()
+        invalidate_cached(CONVERSATIONS, jwt=jwt)
+        invalidate_cached(TURNS, conversation_id, jwt=jwt)
+        invalidate_cached(CONVERSATION_DETAILS, conversation_id, jwt=jwt)
+        if store := _local_store():
+            store.delete_conversations(_cache_user(jwt), [conversation_id])
+
+    _idempotent(f"delete-{conversation_id}", delete, jwt)
+
+@traced()
+def log_conversation(convo_id: str, updated_at: str | None = None, jwt: str | None = None) -> bytes:
+    """
+    Build the downloadable conversation log. Logs are cached per conversation and `updated_at`,
+    so a log is only rebuilt once the conversation has changed.
+    """
+    return _cached_load(LOGS, (convo_id, updated_at), lambda: _build_conversation_log(convo_id, jwt), jwt=jwt, ttl=LOG_CACHE_TTL)
 
-    resp = requests.get(
+def _build_conversation_log(convo_id: str, jwt: str | None = None) -> bytes:
+    resp = get_http_client().get(
         f"{SUPABASE_FUNCTIONS_URL}/log",
-        headers=_auth_headers(),
+        headers=_auth_headers(jwt),
         params={"conversation_id": convo_id},
         timeout=10,
         verify=False,
     )
     resp.raise_for_status()
 
-    text = resp.text
-
-    # First parse attempt
     try:
-        parsed = json.loads(text)
-    except json.JSONDecodeError as e:
-        st.error(f"Could not decode JSON from log endpoint: {e}")
-        return text
-
-    # If what we got is itself a JSON‐string, parse again
-    if isinstance(parsed, str):
-        try:
-            log = json.loads(parsed)
-        except json.JSONDecodeError as e:
-            st.error(f"Could not decode nested JSON: {e}")
-            return parsed
-    else:
-        log = parsed
-
-    # Now `log` is a dict
+        log = resp.json()
+        # If what we got is itself a JSON‐string, parse again
+        if isinstance(log, str):
+            log = json.loads(log)
+    except ValueError as e:
+        return f"Could not decode JSON from log endpoint: {e}\n\n{resp.text}".encode()
+
+    buffer = io.BytesIO()
+    for chunk in iter_conversation_log(log):
+        buffer.write(chunk.encode())
+    return buffer.getvalue()
+
+def iter_conversation_log(log: Dict) -> Iterator[str]:
+    """
+    Yield the readable log piece by piece, including the raw JSON, so it is never held as a list of lines.
+    """
     conv = log.get("conversation", {})
-    lines: list[str] = []
 
     # --- Header ---
-    lines.append(f"Conversation: {conv.get('name')}  (ID: {conv.get('id')})")
-    lines.append(f"Created:      {iso_to_readable(conv.get('created_at', ''))}")
-    lines.append(f"Last updated: {iso_to_readable(conv.get('updated_at', ''))}")
-    lines.append("")
-    lines.append("Agent configuration:")
-    for key, val in conv.get("agent_config", {}).items():
-        lines.append(f"  • {key}: {val}")
-    lines.append("")
+    yield f"Conversation: {conv.get('name')}  (ID: {conv.get('id')})\n"
+    yield f"Created:      {iso_to_readable(conv.get('created_at', ''))}\n"
+    yield f"Last updated: {iso_to_readable(conv.get('updated_at', ''))}\n"
+    yield "\n"
+    yield "Agent configuration:\n"
+    for key, val in (conv.get("agent_config") or {}).items():
+        yield f"  • {key}: {val}\n"
+    yield "\n"
 
     # --- Transcript ---
-    lines.append("Transcript:")
-    for idx, turn in enumerate(log.get("turns", []), start=1):
-        user_msg = turn.get("user_message", "").strip()
-        assistant_msg = turn.get("assistant_response", "").strip()
-        lines.append("--- User ---")
-        lines.append(user_msg)
-        lines.append("")
-        lines.append("--- Assistant ---")
-        lines.append(assistant_msg)
-        lines.append("")
-        lines.append("")
-
+    yield "Transcript:\n"
+    for turn in log.get("turns", []):
+        user_msg = (turn.get("user_message") or "").strip()
+        assistant_msg = (turn.get("assistant_response") or "").strip()
+        yield f"--- User ---\n{user_msg}\n\n"
+        yield f"--- Assistant ---\n{assistant_msg}\n\n\n"
 
     # --- Full raw log for debugging ---
-    lines.append("––– Full raw log JSON –––")
-    lines.append(json.dumps(log, indent=2))
+    yield "––– Full raw log JSON –––\n"
+    yield from json.JSONEncoder(indent=2).iterencode(log)
 
-    return "\n".join(lines)
-
-def update_conversation_name(convo_id: str, new_name: str):
+@traced()
+def update_conversation_name(convo_id: str, new_name: str, jwt: str | None = None):
     """
     Update the name of a conversation using its ID.
     """
-    st.session_state.supabase_client.postgrest.auth(st.session_state.jwt)
-    st.session_state.supabase_client.table("conversations").update({"name": new_name}).eq("id", convo_id).execute()
-
-def query_llm_standard(conversation_id: str, user_message: str) -> str:
+    def rename():
+        response = get_http_client().patch(
+            f"{SUPABASE_REST_URL}/conversations",
+            headers={**supabase_headers(jwt or st.session_state.jwt), "Prefer": "return=minimal"},
+            params={"id": f"eq.{convo_id}"},
+            json={"name": new_name},
+            timeout=5
+        )
+        response.raise_for_status()
+        invalidate_cached(CONVERSATIONS, jwt=jwt)
+        if store := _local_store():
+            store.rename_conversation(_cache_user(jwt), convo_id, new_name)
+
+    # Setting the same name twice is idempotent by nature, concurrent repeats only need coalescing
+    _idempotent(("rename", convo_id, new_name), rename, jwt)
+
+# Turns
+@st.cache_resource(show_spinner=False)
+def get_turn_router() -> TurnRouter:
+    # Turns go to the preferred API, the other one is only used while its circuit is open
+    return TurnRouter([FASTAPI_BASE_URL, FALLBACK_API_URL], ResilienceConfig.from_secrets())
+
+def _post_turn(path: str, payload: Dict, jwt: str | None = None) -> Dict:
+    """
+    POST a turn through the turn router. Retries and hedged copies share one idempotency key, a
+    server that honours it (TURN_IDEMPOTENCY_KEYS) records the turn once.
+    """
+    router = get_turn_router()
+    headers = {**_auth_headers(jwt), "Idempotency-Key": str(uuid4())}
+
+    def send(base_url: str) -> Dict:
+        resp = get_http_client().post(
+            f"{base_url}{path}",
+            headers=headers,
+            json=payload,
+            timeout=router.config.timeout,
+            verify=False
+        )
+        resp.raise_for_status()
+        return resp.json()
+
+    return router.call(send)
+
+def _invalidate_turn(conversation_id: str, jwt: str | None = None):
+    # A new turn changes the transcript and bumps the conversation's updated_at
+    invalidate_cached(TURNS, conversation_id, jwt=jwt)
+    invalidate_cached(CONVERSATIONS, jwt=jwt)
+    if store := _local_store():
+        # Marks the stored transcript as behind, the next open pulls the new turn
+        store.touch_conversation(_cache_user(jwt), conversation_id, datetime.now(timezone.utc).isoformat())
+
+@traced()
+def query_llm_standard(conversation_id: str, user_message: str, jwt: str | None = None) -> str:
     """
     Send user message to FastAPI backend and return the assistant's response.
     """
-    url = f"{FASTAPI_BASE_URL}/conversations/{conversation_id}/turn"
-    response = requests.post(
-        url,
-        headers=_auth_headers(),
-        json={"user_message": user_message},
-        timeout=30,
-        verify = False
-    )
-    response.raise_for_status()
-    return response.json()["assistant_response"]
+    response = _post_turn(f"/conversations/{conversation_id}/turn", {"user_message": user_message}, jwt)
+    _invalidate_turn(conversation_id, jwt)
+    return response["assistant_response"]
+
+def turn_cache_key(agent_config: Dict | None, history: list, user_message: str, jwt: str | None = None) -> str | None:
+    """
+    Response cache key of a dev turn given the messages before it, None while the cache is off.
+    """
+    if not RESPONSE_CACHE:
+        return None
+    return response_key(_cache_user(jwt), FASTAPI_BASE_URL, agent_config, history, user_message)
 
-def query_llm_dev(conversation_id: str, user_message: str, agent_config: Dict):
+@traced()
+def query_llm_dev(conversation_id: str, user_message: str, agent_config: Dict, jwt: str | None = None):
     """
     Send user message to FastAPI backend and return the assistant's response.
     Dev version of this method allows for sending of a custom agent config.
     """
-    url = f"{FASTAPI_BASE_URL}/conversations/{conversation_id}/turn_dev"
-    resp = requests.post(
-        url,
-        headers=_auth_headers(),
-        json={
+    response = _post_turn(
+        f"/conversations/{conversation_id}/turn_dev",
+        {
             "user_message": user_message,
             "agent_config": agent_config
         },
-        timeout=30,
-        verify=False
+        jwt
     )
-    resp.raise_for_status()
-    return resp.json()["assistant_response"]
+    _invalidate_turn(conversation_id, jwt)
+    return response["assistant_response"]
+
+@traced()
+def record_turn(conversation_id: str, user_message: str, assistant_response: str, jwt: str | None = None):
+    """
+    Add a turn answered without the LLM (e.g. from the response cache) to the server-side
+    transcript, so later turns of the conversation see it as history. Neither the edge function
+    nor the turn API takes a ready answer, this inserts into the turns table and needs an RLS
+    policy letting a user insert turns into their own conversations. Raises when it is refused.
+    """
+    response = get_http_client().post(
+        f"{SUPABASE_REST_URL}/turns",
+        headers={**supabase_headers(jwt or st.session_state.jwt), "Prefer": "return=minimal"},
+        json={
+            "conversation_id": conversation_id,
+            "user_message": user_message,
+            "assistant_response": assistant_response
+        },
+        timeout=5
+    )
+    response.raise_for_status()
+    _invalidate_turn(conversation_id, jwt)
 
-def fetch_system_prompt(convo_id: str) -> str | None:
+def _iter_sse_data(response) -> Iterator[str]:
+    """
+    Yield the data payload of each server-sent event as it arrives.
     """
-    Fetch only the system_prompt using an authenticated Supabase client with the user's JWT.
+    data_lines: list[str] = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield "\n".join(data_lines)
+                data_lines = []
+        elif line.startswith("data:"):
+            data_lines.append(line[5:].removeprefix(" "))
+    if data_lines:
+        yield "\n".join(data_lines)
+
+def _sse_text(data: str) -> str | None:
     """
-    st.session_state.supabase_client.postgrest.auth(st.session_state.jwt)
+    Extract the text delta from an SSE payload, returns None once the stream is done.
+    """
+    if data == "[DONE]":
+        return None
+    try:
+        payload = json.loads(data)
+    except json.JSONDecodeError:
+        return data
+
+    if isinstance(payload, str):
+        return payload
+    if isinstance(payload, dict):
+        if payload.get("error"):
+            raise RuntimeError(payload["error"])
+        for key in ("delta", "content", "text", "assistant_response"):
+            if isinstance(payload.get(key), str):
+                return payload[key]
+    return ""
+
+def _stream_turn(path: str, payload: Dict, jwt: str | None = None) -> Iterator[str]:
+    """
+    POST a turn and yield the assistant's response as it is produced. Understands
+    SSE (`text/event-stream`), plain chunked text and, for servers that do not stream,
+    a regular JSON body which is yielded as a single chunk.
+    """
+    router = get_turn_router()
+    headers = {
+        **_auth_headers(jwt),
+        "Accept": "text/event-stream, text/plain, application/json",
+        "Idempotency-Key": str(uuid4()),
+    }
 
-    response = (
-        st.session_state.supabase_client
-        .table("conversations")
-        .select("system_prompt")
-        .eq("id", convo_id)
-        .single()
-        .execute()
+    def send(base_url: str):
+        resp = get_http_client().post(
+            f"{base_url}{path}",
+            headers=headers,
+            json={**payload, "stream": True},
+            timeout=router.config.timeout,
+            stream=True,
+            verify=False
+        )
+        if not resp.ok:
+            resp.close()
+        resp.raise_for_status()
+        return resp
+
+    # Retries and failover only cover opening the stream, never a response that has started
+    resp = router.call(send, hedge=False)
+    with resp:
+        content_type = resp.headers.get("Content-Type", "")
+        resp.encoding = resp.encoding or "utf-8"
+
+        if content_type.startswith("application/json"):
+            yield resp.json()["assistant_response"]
+        elif content_type.startswith("text/event-stream"):
+            for data in _iter_sse_data(resp):
+                text = _sse_text(data)
+                if text is None:
+                    break
+                if text:
+                    yield text
+        else:
+            for chunk in resp.iter_content(chunk_size=None, decode_unicode=True):
+                if chunk:
+                    yield chunk
+
+def _stream_with_fallback(stream: Iterator[str], fallback) -> Iterator[str]:
+    """
+    Fall back to the blocking call if the server rejects the streaming request
+    before anything has been yielded.
+    """
+    started = False
+    try:
+        for chunk in stream:
+            started = True
+            yield chunk
+    except requests.HTTPError as e:
+        if started or e.response is None or e.response.status_code not in _STREAM_UNSUPPORTED:
+            raise
+        yield fallback()
+
+@traced()
+def stream_llm_standard(conversation_id: str, user_message: str) -> Iterator[str]:
+    """
+    Streaming version of query_llm_standard, yields the assistant's response in chunks.
+    """
+    if not STREAM_RESPONSES:
+        yield query_llm_standard(conversation_id, user_message)
+        return
+
+    yield from _stream_with_fallback(
+        _stream_turn(f"/conversations/{conversation_id}/turn", {"user_message": user_message}),
+        lambda: query_llm_standard(conversation_id, user_message)
     )
+    _invalidate_turn(conversation_id)
 
-    if response.data and isinstance(response.data, dict):
-        return response.data.get("system_prompt")
-    return None
+@traced()
+def stream_llm_dev(conversation_id: str, user_message: str, agent_config: Dict, jwt: str | None = None) -> Iterator[str]:
+    """
+    Streaming version of query_llm_dev, yields the assistant's response in chunks.
+    """
+    if not STREAM_RESPONSES:
+        yield query_llm_dev(conversation_id, user_message, agent_config, jwt)
+        return
+
+    yield from _stream_with_fallback(
+        _stream_turn(
+            f"/conversations/{conversation_id}/turn_dev",
+            {"user_message": user_message, "agent_config": agent_config},
+            jwt
+        ),
+        lambda: query_llm_dev(conversation_id, user_message, agent_config, jwt)
+    )
+    _invalidate_turn(conversation_id, jwt)
 
-def upload_plan(pdf_file):
+@traced()
+def fetch_system_prompt(convo_id: str, jwt: str | None = None) -> str | None:
+    """
+    Fetch only the system_prompt from PostgREST with the user's JWT.
+    """
+    def fetch():
+        response = get_http_client().get(
+            f"{SUPABASE_REST_URL}/conversations",
+            headers={
+                **supabase_headers(jwt or st.session_state.jwt),
+                # Single object response, errors unless exactly one row matches
+                "Accept": "application/vnd.pgrst.object+json",
+            },
+            params={"select": "system_prompt", "id": f"eq.{convo_id}"},
+            timeout=5
+        )
+        response.raise_for_status()
+
+        data = response.json()
+        if data and isinstance(data, dict):
+            return data.get("system_prompt")
+        return None
+
+    return _get_single_flight().do((_cache_user(jwt), "system_prompt", convo_id), fetch)
+
+@traced()
+def upload_plan(pdf_file, resumable: bool = True, on_progress=None):
     """
     Do not implement this feature yet into the production app (have not yet finalized security rules)
+
+    Uploads in 6 MB chunks over the TUS resumable protocol unless `resumable` is False, in which
+    case the file is streamed in a single request. `on_progress(uploaded, total)` is called per chunk.
     """
     base = st.secrets["SUPABASE_URL"].rstrip("/")
     account_id = st.session_state.user.id
-    filename   = urllib.parse.quote_plus(pdf_file.name)
-    url = f"{base}/storage/v1/object/ndis-plans/{account_id}/{filename}"
+    # Raw in the TUS metadata, which is base64 encoded, quoted only where it is part of a URL path
+    filename   = pdf_file.name
+    headers = {
+        "Authorization": f"Bearer {st.session_state.jwt}",
+        "apikey": st.secrets["SUPABASE_ANON_KEY"],
+    }
+
+    if resumable:
+        return upload_file_resumable(pdf_file, filename, account_id, base, headers, on_progress=on_progress)
 
-    data = pdf_file.read()
+    url = f"{base}/storage/v1/object/ndis-plans/{account_id}/{urllib.parse.quote(filename, safe='')}"
+    pdf_file.seek(0)
 
-    resp = requests.post(
+    resp = get_http_client().post(
         url,
-        headers={
-            "Authorization": f"Bearer {st.session_state.jwt}",
-            "apikey": st.secrets["SUPABASE_ANON_KEY"],
-            "Content-Type": "application/pdf",
-        },
-        data=data,
-        timeout=10,
+        headers={**headers, "Content-Type": "application/pdf"},
+        data=pdf_file,
+        timeout=(5, 60),
         verify=False,
     )
     resp.raise_for_status()
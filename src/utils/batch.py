@@ -0,0 +1,162 @@
+# /src/utils/batch.py
+
+import math
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from threading import BoundedSemaphore, Lock
+from typing import Callable, Dict, Iterator, List
+from urllib.parse import urlparse
+
+import streamlit as st
+
+from src.utils.backend import FASTAPI_BASE_URL, SUPABASE_FUNCTIONS_URL, create_conversation, query_llm_dev, turn_cache_key
+from src.utils.response_cache import get_response_cache
+
+# Calls in flight across every batch in the process, and at most this many against any one host
+BATCH_MAX_WORKERS: int = int(st.secrets.get("BATCH_MAX_WORKERS", 16))
+BATCH_HOST_CONCURRENCY: int = int(st.secrets.get("BATCH_HOST_CONCURRENCY", 8))
+
+# First column of the results grid, next to one column per variant
+MESSAGE_COLUMN = "Message"
+
+
+@dataclass
+class BatchVariant:
+    name: str
+    agent_config: Dict
+
+
+@dataclass
+class BatchCell:
+    variant: str
+    message_index: int
+    message: str
+    convo_id: str | None = None
+    response: str | None = None
+    error: str | None = None
+    duration_ms: float = 0.0
+    cached: bool = False
+
+
+def variant_agent_config(system_prompt: str, temperature: float, max_tokens: int) -> Dict:
+    return {
+        "system_prompt": system_prompt,
+        "document_prompt": "Here are additional documents that may help answer the users question: {context}",
+        "retrieval_documents": 5,
+        "max_previous_turns": 6,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "max_completion_tokens": max_tokens,
+    }
+
+
+def _cell(row: Dict, key: str, default):
+    # Cleared editor cells come back as None, or as NaN from a DataFrame
+    value = row.get(key)
+    return default if value is None or (isinstance(value, float) and math.isnan(value)) else value
+
+
+def build_variants(rows: List[Dict]) -> List[BatchVariant]:
+    """
+    Variants from the rows of a variants editor, rows without a system prompt are skipped and
+    repeated names, or names of a results grid column, made unique.
+    """
+    variants, seen = [], {MESSAGE_COLUMN}
+    for i, row in enumerate(rows):
+        prompt = str(_cell(row, "system_prompt", "")).strip()
+        if not prompt:
+            continue
+        name = str(_cell(row, "name", "")).strip() or f"Variant {i + 1}"
+        while name in seen:
+            name = f"{name}*"
+        seen.add(name)
+        variants.append(BatchVariant(name, variant_agent_config(
+            prompt,
+            float(_cell(row, "temperature", 0.4)),
+            int(_cell(row, "max_tokens", 400)),
+        )))
+    return variants
+
+
+class BatchPool:
+    """
+    Process-wide worker pool for batch evaluations with a concurrency limit per backend host, so
+    a large suite cannot exhaust the connection pool or overload one service.
+    """
+
+    def __init__(self, max_workers: int, host_concurrency: int):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-eval")
+        self.host_concurrency = host_concurrency
+        self._semaphores: Dict[str, BoundedSemaphore] = {}
+        self._lock = Lock()
+
+    @contextmanager
+    def host_slot(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            semaphore = self._semaphores.setdefault(host, BoundedSemaphore(self.host_concurrency))
+        with semaphore:
+            yield
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        return self.executor.submit(fn, *args, **kwargs)
+
+
+@st.cache_resource(show_spinner=False)
+def get_batch_pool() -> BatchPool:
+    return BatchPool(BATCH_MAX_WORKERS, BATCH_HOST_CONCURRENCY)
+
+
+def _run_cell(pool: BatchPool, cell: BatchCell, variant: BatchVariant, name: str, jwt: str, use_cache: bool) -> BatchCell:
+    # Each test message gets its own conversation so earlier turns never leak into the answer
+    started = time.perf_counter()
+    cache_key = turn_cache_key(variant.agent_config, [], cell.message, jwt=jwt) if use_cache else None
+    if cache_key and (cached := get_response_cache().get(cache_key)) is not None:
+        # Unchanged case, neither the conversation nor the LLM call is needed
+        cell.response, cell.cached = cached, True
+        cell.duration_ms = (time.perf_counter() - started) * 1000
+        return cell
+
+    try:
+        with pool.host_slot(SUPABASE_FUNCTIONS_URL):
+            convo = create_conversation(name, variant.agent_config, jwt=jwt)
+        cell.convo_id = convo["id"]
+        with pool.host_slot(FASTAPI_BASE_URL):
+            cell.response = query_llm_dev(cell.convo_id, cell.message, variant.agent_config, jwt=jwt)
+        if cache_key and cell.response:
+            get_response_cache().set(cache_key, cell.response)
+    except Exception as e:
+        cell.error = str(e)
+    cell.duration_ms = (time.perf_counter() - started) * 1000
+    return cell
+
+
+def run_batch(messages: List[str], variants: List[BatchVariant], jwt: str, use_cache: bool = True) -> Iterator[BatchCell]:
+    """
+    Run every test message against every variant concurrently, yielding cells as they finish.
+    Closing the iterator early cancels the cells that have not started yet.
+    """
+    pool = get_batch_pool()
+    stamp = datetime.now().strftime("%m%d-%H%M")
+    futures = [
+        pool.submit(
+            _run_cell,
+            pool,
+            BatchCell(variant.name, i, message),
+            variant,
+            f"Batch-{stamp}-{variant.name}-{i + 1:02d}",
+            jwt,
+            use_cache,
+        )
+        for variant in variants
+        for i, message in enumerate(messages)
+    ]
+    try:
+        for future in as_completed(futures):
+            yield future.result()
+    finally:
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,164 @@
+# /src/utils/cache.py
+
+import base64
+import copy
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import streamlit as st
+
+from src.utils.telemetry import annotate
+
+# Cached resources
+CONVERSATIONS = "conversations"
+CONVERSATION_DETAILS = "conversation_details"
+TURNS = "turns"
+LOGS = "logs"
+
+_ALL = object()
+
+
+def user_key(jwt: str | None) -> str:
+    """
+    Stable per-user cache key, the `sub` claim of the JWT or a hash of the token itself.
+    """
+    if not jwt:
+        return "anonymous"
+    try:
+        payload = jwt.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        if sub := claims.get("sub"):
+            return str(sub)
+    except (IndexError, ValueError):
+        pass
+    return hashlib.sha256(jwt.encode()).hexdigest()[:32]
+
+
+def _key_matches(entry_key: Hashable, key: Hashable) -> bool:
+    if entry_key == key:
+        return True
+    prefix = key if isinstance(key, tuple) else (key,)
+    return isinstance(entry_key, tuple) and entry_key[:len(prefix)] == prefix
+
+
+class UserCache:
+    """
+    Process-wide cache whose entries are keyed by (user, resource, key), so one user's
+    writes only invalidate what they touched instead of wiping the cache for everyone.
+    """
+
+    def __init__(self, ttl: float = 30.0, max_entries: int = 2048):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Tuple[str, str, Hashable], Tuple[float, Any]] = OrderedDict()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        # Bumped by every invalidation, per user, per (user, resource) or per (user, resource, key prefix)
+        self._generations: Dict[tuple, int] = {}
+        self._lock = Lock()
+
+    def _count(self, resource: str, counter: str, amount: int = 1):
+        counters = self._counters.setdefault(resource, {"hits": 0, "misses": 0, "invalidations": 0})
+        counters[counter] += amount
+
+    def _generation(self, user: str, resource: str, key: Hashable) -> int:
+        # Sum of the counters of every invalidation that would drop this entry, it grows whenever one
+        # of them runs. Called with the lock held.
+        path = key if isinstance(key, tuple) else (key,)
+        return (
+            self._generations.get((user,), 0)
+            + self._generations.get((user, resource), 0)
+            + sum(self._generations.get((user, resource, path[:i]), 0) for i in range(1, len(path) + 1))
+        )
+
+    def get(self, user: str, resource: str, key: Hashable = None) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get((user, resource, key))
+            hit = entry is not None and entry[0] >= monotonic()
+            self._count(resource, "hits" if hit else "misses")
+            if hit:
+                self._entries.move_to_end((user, resource, key))
+        annotate(cache_hit=hit)
+        return (True, copy.deepcopy(entry[1])) if hit else (False, None)
+
+    def contains(self, user: str, resource: str, key: Hashable = None) -> bool:
+        # Unlike get(), neither counted as a hit or miss nor copied
+        with self._lock:
+            entry = self._entries.get((user, resource, key))
+            return entry is not None and entry[0] >= monotonic()
+
+    def set(
+        self,
+        user: str,
+        resource: str,
+        key: Hashable,
+        value: Any,
+        ttl: float | None = None,
+        generation: int | None = None
+    ):
+        """
+        Store a value. With `generation` (read before the value was loaded) it is dropped instead
+        when the entry has been invalidated since, the value may predate that write.
+        """
+        with self._lock:
+            if generation is not None and generation != self._generation(user, resource, key):
+                return
+            expires = monotonic() + (self.ttl if ttl is None else ttl)
+            self._entries[(user, resource, key)] = (expires, copy.deepcopy(value))
+            self._entries.move_to_end((user, resource, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_load(self, user: str, resource: str, key: Hashable, loader: Callable[[], Any], ttl: float | None = None) -> Any:
+        hit, value = self.get(user, resource, key)
+        if hit:
+            return value
+        with self._lock:
+            generation = self._generation(user, resource, key)
+        value = loader()
+        self.set(user, resource, key, value, ttl, generation)
+        return value
+
+    def invalidate(self, user: str, resource: str | None = None, key: Hashable = _ALL) -> int:
+        """
+        Drop a single entry, every entry of a resource, or every entry of a user. Tuple keys
+        starting with `key` are dropped along with it, e.g. the pages of one conversation's turns.
+        """
+        if resource is None:
+            scope = (user,)
+        elif key is _ALL:
+            scope = (user, resource)
+        else:
+            scope = (user, resource, key if isinstance(key, tuple) else (key,))
+        with self._lock:
+            # Loads already running for these entries must not write their result back
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+            stale = [
+                k for k in self._entries
+                if k[0] == user
+                and (resource is None or k[1] == resource)
+                and (key is _ALL or _key_matches(k[2], key))
+            ]
+            for k in stale:
+                del self._entries[k]
+                self._count(k[1], "invalidations")
+            return len(stale)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            snapshot = {resource: {**counters, "entries": 0} for resource, counters in self._counters.items()}
+            for user, resource, _ in self._entries:
+                counters = snapshot.setdefault(resource, {"hits": 0, "misses": 0, "invalidations": 0, "entries": 0})
+                counters["entries"] += 1
+            return snapshot
+
+
+@st.cache_resource(show_spinner=False)
+def get_user_cache() -> UserCache:
+    return UserCache(
+        ttl=float(st.secrets.get("CACHE_TTL", 30)),
+        max_entries=int(st.secrets.get("CACHE_MAX_ENTRIES", 2048)),
+    )
@@ -0,0 +1,86 @@
+# /src/utils/compare.py
+
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from queue import SimpleQueue
+from threading import Event
+from typing import Dict, Iterator, List
+
+from src.utils.backend import FASTAPI_BASE_URL, SUPABASE_FUNCTIONS_URL, create_conversation, stream_llm_dev
+from src.utils.batch import BatchPool, BatchVariant, get_batch_pool
+
+
+@dataclass
+class CompareEvent:
+    """
+    A chunk of one variant's answer, or with `done` set the end of it.
+    """
+    index: int
+    text: str = ""
+    done: bool = False
+    error: str | None = None
+    duration_ms: float = 0.0
+
+
+def create_compare_conversations(variants: List[BatchVariant], jwt: str) -> List[Dict]:
+    """
+    Create one conversation per variant, all at once, in the order of `variants`.
+    """
+    pool = get_batch_pool()
+    stamp = datetime.now().strftime("%m%d-%H%M")
+
+    def create(variant: BatchVariant) -> Dict:
+        with pool.host_slot(SUPABASE_FUNCTIONS_URL):
+            return create_conversation(f"Compare-{stamp}-{variant.name}", variant.agent_config, jwt=jwt)
+
+    futures = [pool.submit(create, variant) for variant in variants]
+    return [future.result() for future in futures]
+
+
+def _stream_variant(
+    pool: BatchPool,
+    events: SimpleQueue,
+    stop: Event,
+    index: int,
+    convo_id: str,
+    message: str,
+    agent_config: Dict,
+    jwt: str
+):
+    started = time.perf_counter()
+    error = None
+    try:
+        with pool.host_slot(FASTAPI_BASE_URL):
+            for chunk in stream_llm_dev(convo_id, message, agent_config, jwt=jwt):
+                if stop.is_set():
+                    break
+                events.put(CompareEvent(index, text=chunk))
+    except Exception as e:
+        error = str(e)
+    events.put(CompareEvent(index, done=True, error=error, duration_ms=(time.perf_counter() - started) * 1000))
+
+
+def stream_compare_turn(convos: List[Dict], agent_configs: List[Dict], message: str, jwt: str) -> Iterator[CompareEvent]:
+    """
+    Send `message` to every conversation at once and yield the chunks of all answers through one
+    queue, in the order they arrive. The turn takes as long as its slowest answer. Closing the
+    iterator early stops the answers still streaming.
+    """
+    pool = get_batch_pool()
+    events: SimpleQueue[CompareEvent] = SimpleQueue()
+    stop = Event()
+    futures = [
+        pool.submit(_stream_variant, pool, events, stop, i, convo["id"], message, agent_config, jwt)
+        for i, (convo, agent_config) in enumerate(zip(convos, agent_configs))
+    ]
+    remaining = len(futures)
+    try:
+        while remaining:
+            event = events.get()
+            remaining -= event.done
+            yield event
+    finally:
+        stop.set()
+        for future in futures:
+            future.cancel()
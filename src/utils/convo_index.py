@@ -0,0 +1,206 @@
+# /src/utils/convo_index.py
+
+import re
+import sys
+from bisect import bisect_left, insort
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Set
+
+import streamlit as st
+
+from src.utils.misc import pad_convo_label, time_ago
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+PROMPT_KEYS = ("system_prompt", "document_prompt")
+
+
+def tokenize(text: str) -> Set[str]:
+    return set(TOKEN_PATTERN.findall((text or "").lower()))
+
+
+def compact_agent_config(convo: Dict):
+    """
+    Intern the prompts of a conversation's agent config, conversations created with the same
+    settings then share one copy of the system prompt across every session of the process.
+    """
+    config = convo.get("agent_config")
+    if not isinstance(config, dict):
+        return
+    for key in PROMPT_KEYS:
+        if isinstance(config.get(key), str):
+            config[key] = sys.intern(config[key])
+
+
+def parse_timestamp(value: str | datetime | None) -> datetime | None:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    return None
+
+
+@dataclass(slots=True)
+class IndexEntry:
+    convo: Dict
+    updated_at: datetime | None
+    name_tokens: Set[str]
+    turn_tokens: Set[str] = field(default_factory=set)
+    label_cache: tuple = ()
+
+    @property
+    def sort_key(self) -> tuple:
+        # Most recent first, conversations without a valid timestamp last
+        stamp = self.updated_at.timestamp() if self.updated_at else float("-inf")
+        return -stamp, self.convo["id"]
+
+
+class ConversationIndex:
+    """
+    The loaded conversations with their timestamps parsed once, kept ordered by recency and
+    searchable through an inverted index over names and loaded turn text. Every change to the
+    conversation list is applied here incrementally instead of rebuilding it.
+    """
+
+    def __init__(self, convos: List[Dict]):
+        self.source = convos
+        self._entries: Dict[str, IndexEntry] = {}
+        self._order: List[tuple] = []
+        self._postings: Dict[str, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        for convo in convos:
+            self.upsert(convo)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _add_postings(self, convo_id: str, tokens: Iterable[str]):
+        for token in tokens:
+            if token not in self._postings:
+                self._postings[token] = set()
+                insort(self._vocabulary, token)
+            self._postings[token].add(convo_id)
+
+    def _drop_postings(self, convo_id: str, tokens: Iterable[str]):
+        for token in tokens:
+            ids = self._postings.get(token)
+            if ids is None:
+                continue
+            ids.discard(convo_id)
+            if not ids:
+                del self._postings[token]
+                self._vocabulary.pop(bisect_left(self._vocabulary, token))
+
+    def upsert(self, convo: Dict):
+        """
+        Add a conversation or replace the indexed copy of it.
+        """
+        compact_agent_config(convo)
+        turn_tokens = set()
+        if (old := self._entries.get(convo["id"])) is not None:
+            turn_tokens = old.turn_tokens
+            self.remove(convo["id"])
+        entry = IndexEntry(convo, parse_timestamp(convo.get("updated_at")), tokenize(convo.get("name", "")), turn_tokens)
+        self._entries[convo["id"]] = entry
+        insort(self._order, entry.sort_key)
+        self._add_postings(convo["id"], entry.name_tokens | entry.turn_tokens)
+
+    def remove(self, convo_id: str):
+        entry = self._entries.pop(convo_id, None)
+        if entry is None:
+            return
+        i = bisect_left(self._order, entry.sort_key)
+        if i < len(self._order) and self._order[i] == entry.sort_key:
+            self._order.pop(i)
+        self._drop_postings(convo_id, entry.name_tokens | entry.turn_tokens)
+
+    def replace(self, old_id: str, convo: Dict):
+        # A placeholder swapped for the server row keeps the turns indexed under it
+        entry = self._entries.get(old_id)
+        self.remove(old_id)
+        self.upsert(convo)
+        if entry is not None:
+            self.add_text(convo["id"], entry.turn_tokens)
+
+    def rename(self, convo_id: str, name: str):
+        if (entry := self._entries.get(convo_id)) is None:
+            return
+        new_tokens = tokenize(name)
+        self._drop_postings(convo_id, entry.name_tokens - new_tokens - entry.turn_tokens)
+        self._add_postings(convo_id, new_tokens)
+        entry.name_tokens = new_tokens
+
+    def touch(self, convo_id: str, updated_at: str | datetime):
+        if (entry := self._entries.get(convo_id)) is None:
+            return
+        self._order.pop(bisect_left(self._order, entry.sort_key))
+        entry.updated_at = parse_timestamp(updated_at)
+        insort(self._order, entry.sort_key)
+
+    def add_text(self, convo_id: str, tokens: Iterable[str]):
+        if (entry := self._entries.get(convo_id)) is None:
+            return
+        new_tokens = set(tokens) - entry.turn_tokens
+        entry.turn_tokens |= new_tokens
+        self._add_postings(convo_id, new_tokens)
+
+    def add_turns(self, convo_id: str, messages: Iterable[Dict]):
+        tokens = set()
+        for message in messages:
+            tokens |= tokenize(message.get("content", ""))
+        self.add_text(convo_id, tokens)
+
+    def ordered(self, limit: int | None = None) -> List[Dict]:
+        return [self._entries[convo_id].convo for _, convo_id in self._order[:limit]]
+
+    def _prefix_matches(self, prefix: str) -> Set[str]:
+        ids = set()
+        i = bisect_left(self._vocabulary, prefix)
+        while i < len(self._vocabulary) and self._vocabulary[i].startswith(prefix):
+            ids |= self._postings[self._vocabulary[i]]
+            i += 1
+        return ids
+
+    def search(self, query: str) -> List[Dict]:
+        """
+        Conversations whose name or loaded turns contain a word starting with every word of the
+        query, most recent first.
+        """
+        matches = None
+        for token in tokenize(query):
+            ids = self._prefix_matches(token)
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        if matches is None:
+            return self.ordered()
+        return [self._entries[convo_id].convo for convo_id in sorted(matches, key=lambda c: self._entries[c].sort_key)]
+
+    def label(self, convo: Dict) -> str:
+        """
+        Sidebar label for a conversation, rebuilt only when its name or relative age changes.
+        """
+        entry = self._entries.get(convo["id"])
+        if entry is None or entry.updated_at is None:
+            return pad_convo_label(convo["name"], time_ago(convo["updated_at"]))
+        ago = time_ago(entry.updated_at)
+        if entry.label_cache[:2] != (convo["name"], ago):
+            entry.label_cache = (convo["name"], ago, pad_convo_label(convo["name"], ago))
+        return entry.label_cache[2]
+
+
+def get_convo_index() -> ConversationIndex | None:
+    """
+    The session's index over `st.session_state.convos`, built again only when the list itself is replaced.
+    """
+    convos = st.session_state.get("convos")
+    if convos is None:
+        return None
+    index = st.session_state.get("convo_index")
+    if index is None or index.source is not convos:
+        index = st.session_state.convo_index = ConversationIndex(convos)
+    return index
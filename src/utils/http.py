@@ -0,0 +1,153 @@
+# /src/utils/http.py
+
+from dataclasses import dataclass, field
+from http.cookiejar import DefaultCookiePolicy
+from threading import Lock
+from time import perf_counter
+from typing import Dict
+from urllib.parse import urlsplit
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+
+from src.utils.telemetry import annotate
+
+
+@dataclass(frozen=True)
+class HttpConfig:
+    pool_connections: int = 4
+    pool_maxsize: int = 16
+    pool_block: bool = False
+    timeout: float = 10.0
+
+    @classmethod
+    def from_secrets(cls) -> "HttpConfig":
+        return cls(
+            pool_connections=int(st.secrets.get("HTTP_POOL_CONNECTIONS", cls.pool_connections)),
+            pool_maxsize=int(st.secrets.get("HTTP_POOL_MAXSIZE", cls.pool_maxsize)),
+            pool_block=bool(st.secrets.get("HTTP_POOL_BLOCK", cls.pool_block)),
+            timeout=float(st.secrets.get("HTTP_TIMEOUT", cls.timeout)),
+        )
+
+
+@dataclass
+class HostStats:
+    requests: int = 0
+    errors: int = 0
+    bytes_received: int = 0
+    total_seconds: float = 0.0
+    status_codes: Dict[int, int] = field(default_factory=dict)
+
+
+class HttpClient:
+    """
+    Process-wide HTTP client holding one keep-alive session per host so that
+    repeated backend calls reuse TCP/TLS connections across reruns and sessions.
+    """
+
+    def __init__(self, config: HttpConfig | None = None):
+        self.config = config or HttpConfig()
+        self._sessions: Dict[str, requests.Session] = {}
+        self._stats: Dict[str, HostStats] = {}
+        self._lock = Lock()
+
+    def _session_for(self, host: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # The session is shared between users, never let it carry cookies across them
+                session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+                adapter = HTTPAdapter(
+                    pool_connections=self.config.pool_connections,
+                    pool_maxsize=self.config.pool_maxsize,
+                    pool_block=self.config.pool_block,
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+                self._stats[host] = HostStats()
+            return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        host = urlsplit(url).netloc
+        session = self._session_for(host)
+        kwargs.setdefault("timeout", self.config.timeout)
+
+        start = perf_counter()
+        try:
+            response = session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self._record(host, perf_counter() - start, error=True)
+            raise
+
+        size = 0 if kwargs.get("stream") else len(response.content)
+        self._record(
+            host,
+            perf_counter() - start,
+            status=response.status_code,
+            size=size,
+            error=response.status_code >= 400,
+        )
+        annotate(bytes=size, status=response.status_code)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request("HEAD", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def _record(self, host: str, elapsed: float, status: int | None = None, size: int = 0, error: bool = False):
+        with self._lock:
+            stats = self._stats.setdefault(host, HostStats())
+            stats.requests += 1
+            stats.errors += int(error)
+            stats.bytes_received += size
+            stats.total_seconds += elapsed
+            if status is not None:
+                stats.status_codes[status] = stats.status_codes.get(status, 0) + 1
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Per-host request counters along with the number of pooled connections each host holds.
+        """
+        with self._lock:
+            snapshot = {}
+            for host, stats in self._stats.items():
+                pooled = 0
+                if session := self._sessions.get(host):
+                    pools = session.get_adapter(f"https://{host}").poolmanager.pools
+                    for key in pools.keys():
+                        if pool := pools.get(key):
+                            pooled += pool.num_connections
+                snapshot[host] = {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "pooled_connections": pooled,
+                    "bytes_received": stats.bytes_received,
+                    "avg_ms": round(1000 * stats.total_seconds / stats.requests, 2) if stats.requests else 0.0,
+                    "status_codes": dict(stats.status_codes),
+                }
+            return snapshot
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_client() -> HttpClient:
+    return HttpClient(HttpConfig.from_secrets())
@@ -0,0 +1,169 @@
+# /src/utils/local_store.py
+
+import json
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterable, List, Tuple
+
+import streamlit as st
+
+# Opt-in, conversations and turns are kept on disk per user so a restart or re-login starts warm
+LOCAL_STORE: bool = bool(st.secrets.get("LOCAL_STORE", False))
+LOCAL_STORE_PATH: str = st.secrets.get("LOCAL_STORE_PATH") or ".cache/local_store.sqlite3"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    user TEXT NOT NULL,
+    id TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user, id)
+);
+CREATE INDEX IF NOT EXISTS conversations_recent ON conversations (user, updated_at, id);
+CREATE TABLE IF NOT EXISTS turns (
+    user TEXT NOT NULL,
+    conversation_id TEXT NOT NULL,
+    id TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user, conversation_id, id)
+);
+CREATE INDEX IF NOT EXISTS turns_recent ON turns (user, conversation_id, created_at);
+CREATE TABLE IF NOT EXISTS sync_state (
+    user TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    watermark TEXT NOT NULL,
+    PRIMARY KEY (user, scope)
+);
+"""
+
+
+class LocalStore:
+    """
+    SQLite copy of each user's conversations and turns. Rows keep the server's JSON as is, the
+    `updated_at` / `created_at` columns order them and mark how far a delta sync has got.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One connection shared by the script threads, writes are serialized by the lock
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+
+    # Conversations
+    def conversations_page(self, user: str, limit: int, after: Tuple[str, str] | None = None) -> Tuple[List[Dict], bool]:
+        """
+        The newest `limit` conversations after the `(updated_at, id)` position `after`, newest first,
+        and whether more follow. Conversations updated at the same instant are ordered by id.
+        """
+        query = "SELECT data FROM conversations WHERE user = ?"
+        params: list = [user]
+        if after:
+            query += " AND (updated_at < ? OR (updated_at = ? AND id < ?))"
+            params += [after[0], after[0], after[1]]
+        with self._lock:
+            rows = self._conn.execute(
+                f"{query} ORDER BY updated_at DESC, id DESC LIMIT ?", (*params, limit + 1)
+            ).fetchall()
+        return [json.loads(data) for data, in rows[:limit]], len(rows) > limit
+
+    def conversation_updated_at(self, user: str, convo_id: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM conversations WHERE user = ? AND id = ?", (user, convo_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def put_conversations(self, user: str, convos: Iterable[Dict]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO conversations (user, id, updated_at, data) VALUES (?, ?, ?, ?)",
+                [(user, c["id"], c.get("updated_at") or "", json.dumps(c)) for c in convos]
+            )
+
+    def rename_conversation(self, user: str, convo_id: str, name: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE conversations SET data = json_set(data, '$.name', ?) WHERE user = ? AND id = ?",
+                (name, user, convo_id)
+            )
+
+    def touch_conversation(self, user: str, convo_id: str, updated_at: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE conversations SET updated_at = ?, data = json_set(data, '$.updated_at', ?) WHERE user = ? AND id = ?",
+                (updated_at, updated_at, user, convo_id)
+            )
+
+    def delete_conversations(self, user: str, convo_ids: Iterable[str]):
+        ids = [(user, convo_id) for convo_id in convo_ids]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM conversations WHERE user = ? AND id = ?", ids)
+            self._conn.executemany("DELETE FROM turns WHERE user = ? AND conversation_id = ?", ids)
+
+    def prune_conversations(self, user: str, keep_ids: Iterable[str]) -> int:
+        """
+        Delete every stored conversation of the user that is not in `keep_ids`.
+        """
+        with self._lock:
+            stored = {convo_id for convo_id, in self._conn.execute("SELECT id FROM conversations WHERE user = ?", (user,))}
+        removed = stored - set(keep_ids)
+        if removed:
+            self.delete_conversations(user, removed)
+        return len(removed)
+
+    # Turns
+    def latest_turn_at(self, user: str, convo_id: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MAX(created_at) FROM turns WHERE user = ? AND conversation_id = ?", (user, convo_id)
+            ).fetchone()
+        return row[0]
+
+    def put_turns(self, user: str, convo_id: str, turns: Iterable[Dict]):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO turns (user, conversation_id, id, created_at, data) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (user, convo_id, str(t.get("id") or t.get("created_at")), t.get("created_at") or "", json.dumps(t))
+                    for t in turns
+                ]
+            )
+
+    def turns_page(self, user: str, convo_id: str, limit: int, before: str | None = None) -> Tuple[List[Dict], bool]:
+        """
+        The latest `limit` turns older than `before` in chronological order, and whether older ones exist.
+        """
+        query = "SELECT data FROM turns WHERE user = ? AND conversation_id = ?"
+        params: list = [user, convo_id]
+        if before:
+            query += " AND created_at < ?"
+            params.append(before)
+        with self._lock:
+            rows = self._conn.execute(f"{query} ORDER BY created_at DESC LIMIT ?", (*params, limit + 1)).fetchall()
+        turns = [json.loads(data) for data, in rows[:limit]]
+        return turns[::-1], len(rows) > limit
+
+    # Sync state
+    def watermark(self, user: str, scope: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT watermark FROM sync_state WHERE user = ? AND scope = ?", (user, scope)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_watermark(self, user: str, scope: str, watermark: str):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (user, scope, watermark) VALUES (?, ?, ?)", (user, scope, watermark)
+            )
+
+
+@st.cache_resource(show_spinner=False)
+def get_local_store() -> LocalStore:
+    return LocalStore(LOCAL_STORE_PATH)
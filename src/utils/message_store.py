@@ -0,0 +1,207 @@
+# /src/utils/message_store.py
+
+import json
+import os
+import sys
+import tempfile
+import weakref
+from array import array
+from threading import Lock
+from typing import Dict, Iterable, Iterator, List
+
+import streamlit as st
+
+# Messages of the open transcript held in memory per session, older ones are spilled to disk
+MESSAGE_MEMORY_LIMIT: int = int(st.secrets.get("MESSAGE_MEMORY_LIMIT", 200))
+MESSAGE_MEMORY_MAX_BYTES: int = int(st.secrets.get("MESSAGE_MEMORY_MAX_BYTES", 2**20))
+MESSAGE_SPILL_DIR: str = st.secrets.get("MESSAGE_SPILL_DIR") or os.path.join(tempfile.gettempdir(), "clover-messages")
+
+# Flag bits stored with each message
+CACHED = 1
+
+# Role strings are stored once per process, messages only keep their index in this table
+_roles: List[str] = ["user", "assistant"]
+_role_codes: Dict[str, int] = {role: i for i, role in enumerate(_roles)}
+_roles_lock = Lock()
+
+# Every live store, for the process-wide memory report
+_stores: "weakref.WeakSet[MessageStore]" = weakref.WeakSet()
+
+
+def _role_code(role: str) -> int:
+    if (code := _role_codes.get(role)) is not None:
+        return code
+    with _roles_lock:
+        if role not in _role_codes:
+            _roles.append(sys.intern(role))
+            _role_codes[_roles[-1]] = len(_roles) - 1
+        return _role_codes[role]
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class MessageStore:
+    """
+    A session's transcript stored as columns: role codes and flags in byte arrays, contents in a
+    list. Only the newest `max_messages` (and at most `max_bytes` of content) stay in memory, older
+    messages are appended to a per-session spill file and read back when a slice reaches them.
+    Reads return `{"role", "content"}` dicts, so the store stands in for the list it replaces.
+    """
+
+    __slots__ = (
+        "max_messages", "max_bytes", "_codes", "_flags", "_contents", "_memory_bytes",
+        "_offsets", "_spill_path", "_spill_bytes", "__weakref__",
+    )
+
+    def __init__(self, max_messages: int = MESSAGE_MEMORY_LIMIT, max_bytes: int = MESSAGE_MEMORY_MAX_BYTES):
+        self.max_messages = max(1, max_messages)
+        self.max_bytes = max_bytes
+        self._codes = array("B")
+        self._flags = array("B")
+        self._contents: List[str] = []
+        self._memory_bytes = 0
+        # File offset of every spilled message, oldest first
+        self._offsets = array("Q")
+        self._spill_path: str | None = None
+        self._spill_bytes = 0
+        _stores.add(self)
+
+    def __len__(self) -> int:
+        return len(self._offsets) + len(self._contents)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self[:])
+
+    def __getitem__(self, key: int | slice) -> Dict | List[Dict]:
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            spilled = len(self._offsets)
+            messages = self._read_spilled(start, min(stop, spilled))
+            for i in range(max(start, spilled) - spilled, stop - spilled):
+                messages.append(self._message(self._codes[i], self._flags[i], self._contents[i]))
+            return messages
+        index = key + len(self) if key < 0 else key
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        return self[index:index + 1][0]
+
+    @staticmethod
+    def _message(code: int, flags: int, content: str) -> Dict:
+        message = {"role": _roles[code], "content": content}
+        if flags & CACHED:
+            message["cached"] = True
+        return message
+
+    @staticmethod
+    def _row(message: Dict) -> tuple:
+        return _role_code(message["role"]), CACHED if message.get("cached") else 0, message["content"] or ""
+
+    def append(self, message: Dict):
+        self.extend([message])
+
+    def extend(self, messages: Iterable[Dict]):
+        for code, flags, content in map(self._row, messages):
+            self._codes.append(code)
+            self._flags.append(flags)
+            self._contents.append(content)
+            self._memory_bytes += sys.getsizeof(content)
+        self._spill_excess()
+
+    def prepend(self, messages: Iterable[Dict]):
+        """
+        Insert messages older than the first one, e.g. a page loaded on demand.
+        """
+        rows = [self._row(m) for m in messages]
+        if self._offsets:
+            # Older than what is already on disk, they go straight there
+            self._offsets[0:0] = self._spill(rows)
+            return
+        self._codes[0:0] = array("B", [code for code, _, _ in rows])
+        self._flags[0:0] = array("B", [flags for _, flags, _ in rows])
+        self._contents[0:0] = [content for _, _, content in rows]
+        self._memory_bytes += sum(sys.getsizeof(content) for _, _, content in rows)
+        self._spill_excess()
+
+    def clear(self):
+        self._codes = array("B")
+        self._flags = array("B")
+        self._contents = []
+        self._memory_bytes = 0
+        self._offsets = array("Q")
+        if self._spill_path is not None:
+            os.truncate(self._spill_path, 0)
+        self._spill_bytes = 0
+
+    def replace(self, messages: Iterable[Dict]):
+        self.clear()
+        self.extend(messages)
+
+    def _spill(self, rows: Iterable[tuple]) -> array:
+        if self._spill_path is None:
+            os.makedirs(MESSAGE_SPILL_DIR, exist_ok=True)
+            fd, self._spill_path = tempfile.mkstemp(dir=MESSAGE_SPILL_DIR, suffix=".jsonl")
+            os.close(fd)
+            # The file goes with the store, when the session ends or logs out
+            weakref.finalize(self, _remove_file, self._spill_path)
+        offsets = array("Q")
+        with open(self._spill_path, "ab") as f:
+            for row in rows:
+                line = json.dumps(row, ensure_ascii=False).encode() + b"\n"
+                offsets.append(f.tell())
+                f.write(line)
+                self._spill_bytes += len(line)
+        return offsets
+
+    def _spill_excess(self):
+        count = max(0, len(self._contents) - self.max_messages)
+        remaining = self._memory_bytes - sum(sys.getsizeof(c) for c in self._contents[:count])
+        # The newest message always stays in memory
+        while remaining > self.max_bytes and count < len(self._contents) - 1:
+            remaining -= sys.getsizeof(self._contents[count])
+            count += 1
+        if not count:
+            return
+        self._offsets.extend(self._spill(zip(self._codes[:count], self._flags[:count], self._contents[:count])))
+        del self._codes[:count], self._flags[:count], self._contents[:count]
+        self._memory_bytes = remaining
+
+    def _read_spilled(self, start: int, stop: int) -> List[Dict]:
+        if start >= stop:
+            return []
+        messages = []
+        with open(self._spill_path, "rb") as f:
+            for offset in self._offsets[start:stop]:
+                f.seek(offset)
+                messages.append(self._message(*json.loads(f.readline())))
+        return messages
+
+    def memory_report(self) -> Dict[str, int]:
+        return {
+            "messages": len(self),
+            "in_memory": len(self._contents),
+            "spilled": len(self._offsets),
+            "memory_bytes": (
+                self._memory_bytes + sys.getsizeof(self._contents)
+                + sum(a.buffer_info()[1] * a.itemsize for a in (self._codes, self._flags, self._offsets))
+            ),
+            "spilled_bytes": self._spill_bytes,
+        }
+
+
+def process_memory_report() -> Dict[str, int]:
+    """
+    The memory reports of every session's store added up.
+    """
+    totals = {"sessions": 0}
+    for store in list(_stores):
+        totals["sessions"] += 1
+        for name, value in store.memory_report().items():
+            totals[name] = totals.get(name, 0) + value
+    return totals
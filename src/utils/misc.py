@@ -1,11 +1,12 @@
 # /src/utils/misc.py
 
-from time import sleep
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import List, Dict
 import random
 
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
 SYSTEM_PROMPT_FILEPATH: Path = Path(__file__).parent.parent / "resources" / "system_prompt.prmpt"
 
 def pad_convo_label(convo_name: str, last_turn: str, total_width: int = 24) -> str:
@@ -71,23 +72,10 @@ def time_ago(dt_str: str | datetime):
     days = hours // 24
     return f"{min(days, 99)}d"
 
-def sort_recent_conversations(convos: List[Dict[str, str]]) -> List[Dict[str, str]]:
-    def parse_datetime(val):
-        if isinstance(val, datetime):
-            return val
-        elif isinstance(val, str):
-            try:
-                return datetime.fromisoformat(val.replace("Z", "+00:00"))
-            except ValueError:
-                return datetime.min
-        return datetime.min
-
-    return sorted(convos, key=lambda c: parse_datetime(c["updated_at"]), reverse=True)
-
-def stream_to_ui(text: str, delay: float = 0.001):
+def rerun_fragment():
     """
-    Yields text chunks character-by-character to simulate streaming.
+    Reruns only the calling fragment. A fragment drawn as part of a full run can't be rerun on its
+    own, so the whole app is rerun instead.
     """
-    for char in text:
-        yield char
-        sleep(delay)
+    ctx = get_script_run_ctx()
+    st.rerun(scope="fragment" if ctx and ctx.fragment_ids_this_run else "app")
@@ -0,0 +1,202 @@
+# /src/utils/mutations.py
+
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Callable, Dict, List
+
+import streamlit as st
+
+from src.utils.backend import create_conversation, delete_conversation, invalidate_cached, update_conversation_name
+from src.utils.cache import CONVERSATIONS
+from src.utils.convo_index import get_convo_index
+
+PENDING_PREFIX = "pending-"
+
+# A second "New Conversation" with the same config this soon after the first is treated as a double click
+CREATE_DEDUP_SECONDS = 2.0
+
+
+@dataclass
+class PendingMutation:
+    kind: str
+    convo_id: str
+    future: Future
+    rollback: Callable[[], None]
+    on_success: Callable[[object], None] = field(default=lambda result: None)
+    args: tuple = ()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="convo-mutation")
+
+
+def _pending() -> List[PendingMutation]:
+    return st.session_state.setdefault("pending_mutations", [])
+
+
+def _convos() -> List[Dict] | None:
+    return st.session_state.get("convos")
+
+
+def _index_of(convo_id: str) -> int | None:
+    for i, convo in enumerate(_convos() or []):
+        if convo["id"] == convo_id:
+            return i
+    return None
+
+
+def is_pending(convo: Dict) -> bool:
+    return str(convo.get("id", "")).startswith(PENDING_PREFIX)
+
+
+def _in_flight(kind: str, convo_id: str, args: tuple = ()) -> PendingMutation | None:
+    for mutation in _pending():
+        if mutation.kind == kind and mutation.convo_id == convo_id and mutation.args == args and not mutation.future.done():
+            return mutation
+    return None
+
+
+def create_conversation_optimistic(conversation_name: str, agent_config: dict | None = None) -> Dict:
+    """
+    Insert a placeholder conversation immediately and create it on the server in the background.
+    The placeholder is swapped for the server row once the write is reconciled.
+    """
+    recent = st.session_state.get("last_create")
+    if recent and recent["agent_config"] == agent_config and monotonic() - recent["at"] < CREATE_DEDUP_SECONDS:
+        if (i := _index_of(recent["id"])) is not None:
+            return st.session_state.convos[i]
+
+    idempotency_key = str(uuid.uuid4())
+    now = datetime.now(timezone.utc).isoformat()
+    placeholder = {
+        "id": f"{PENDING_PREFIX}{idempotency_key}",
+        "name": conversation_name,
+        "agent_config": agent_config,
+        "created_at": now,
+        "updated_at": now,
+    }
+    if _convos() is not None:
+        st.session_state.convos.insert(0, placeholder)
+        get_convo_index().upsert(placeholder)
+
+    def rollback():
+        if (i := _index_of(placeholder["id"])) is not None:
+            st.session_state.convos.pop(i)
+            get_convo_index().remove(placeholder["id"])
+        if (st.session_state.get("selected_convo") or {}).get("id") == placeholder["id"]:
+            st.session_state.selected_convo = None
+            st.session_state.messages.clear()
+            st.session_state.page = "home"
+
+    def on_success(created: Dict):
+        if (i := _index_of(placeholder["id"])) is not None:
+            if _index_of(created["id"]) is not None:
+                # The row already arrived another way (a pushed change), only the placeholder goes
+                st.session_state.convos.pop(i)
+                get_convo_index().remove(placeholder["id"])
+            else:
+                st.session_state.convos[i] = created
+                get_convo_index().replace(placeholder["id"], created)
+        if (st.session_state.get("selected_convo") or {}).get("id") == placeholder["id"]:
+            st.session_state.selected_convo = created
+        if (st.session_state.get("last_create") or {}).get("id") == placeholder["id"]:
+            st.session_state.last_create["id"] = created["id"]
+
+    future = _get_executor().submit(
+        create_conversation, conversation_name, agent_config,
+        jwt=st.session_state.jwt, idempotency_key=idempotency_key
+    )
+    _pending().append(PendingMutation("create", placeholder["id"], future, rollback, on_success))
+    st.session_state.last_create = {"id": placeholder["id"], "agent_config": agent_config, "at": monotonic()}
+    return placeholder
+
+
+def rename_conversation_optimistic(convo: Dict, new_name: str):
+    if _in_flight("rename", convo["id"], (new_name,)):
+        return
+    old_name = convo["name"]
+    convo["name"] = new_name
+    if (i := _index_of(convo["id"])) is not None:
+        st.session_state.convos[i]["name"] = new_name
+        get_convo_index().rename(convo["id"], new_name)
+
+    def rollback():
+        if (i := _index_of(convo["id"])) is not None:
+            st.session_state.convos[i]["name"] = old_name
+            get_convo_index().rename(convo["id"], old_name)
+        if (st.session_state.get("selected_convo") or {}).get("id") == convo["id"]:
+            st.session_state.selected_convo["name"] = old_name
+
+    future = _get_executor().submit(update_conversation_name, convo["id"], new_name, jwt=st.session_state.jwt)
+    _pending().append(PendingMutation("rename", convo["id"], future, rollback, args=(new_name,)))
+
+
+def delete_conversation_optimistic(convo: Dict):
+    # Confirm clicked twice, the first delete is still on its way
+    if _in_flight("delete", convo["id"]):
+        return
+    index = _index_of(convo["id"])
+    removed = st.session_state.convos.pop(index) if index is not None else None
+    if removed is not None:
+        get_convo_index().remove(removed["id"])
+
+    def rollback():
+        if removed is None:
+            return
+        if _convos() is None:
+            # The list is being loaded again (a refresh or a failed fetch), it must not come from a
+            # cached copy taken while the conversation was hidden
+            invalidate_cached(CONVERSATIONS)
+        elif _index_of(removed["id"]) is None:
+            st.session_state.convos.insert(min(index, len(st.session_state.convos)), removed)
+            get_convo_index().upsert(removed)
+
+    future = _get_executor().submit(delete_conversation, convo["id"], jwt=st.session_state.jwt)
+    _pending().append(PendingMutation("delete", convo["id"], future, rollback))
+
+
+def has_pending_mutations() -> bool:
+    return bool(st.session_state.get("pending_mutations"))
+
+
+def has_finished_mutations() -> bool:
+    return any(mutation.future.done() for mutation in st.session_state.get("pending_mutations", []))
+
+
+def reconcile_mutations() -> List[str]:
+    """
+    Apply the outcome of every finished background write, rolling back the ones that failed.
+    Returns an error message per failed mutation.
+    """
+    errors = []
+    still_pending = []
+    for mutation in _pending():
+        if not mutation.future.done():
+            still_pending.append(mutation)
+            continue
+        if error := mutation.future.exception():
+            mutation.rollback()
+            errors.append(f"Failed to {mutation.kind} conversation: {error}")
+        else:
+            mutation.on_success(mutation.future.result())
+    st.session_state.pending_mutations = still_pending
+    return errors
+
+
+def await_created(convo: Dict, timeout: float = 10) -> Dict:
+    """
+    Block until a placeholder conversation has been created on the server and return the server row.
+    """
+    if not is_pending(convo):
+        return convo
+    for mutation in _pending():
+        if mutation.kind == "create" and mutation.convo_id == convo["id"]:
+            created = mutation.future.result(timeout=timeout)
+            mutation.on_success(created)
+            st.session_state.pending_mutations.remove(mutation)
+            return created
+    return convo
@@ -0,0 +1,147 @@
+# /src/utils/prefetch.py
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import Deque, Dict, List, Set
+
+import streamlit as st
+
+from src.utils.backend import TURN_PAGE_SIZE, fetch_conversation_turns_page, is_turns_page_cached
+from src.utils.cache import TURNS, get_user_cache, user_key
+from src.utils.convo_index import get_convo_index
+from src.utils.mutations import is_pending
+
+# The first transcript page of this many of the most recent conversations is loaded in the
+# background after the sidebar renders, 0 turns prefetching off
+PREFETCH_CONVERSATIONS: int = int(st.secrets.get("PREFETCH_CONVERSATIONS", 5))
+PREFETCH_WORKERS: int = int(st.secrets.get("PREFETCH_WORKERS", 4))
+PREFETCH_USER_CONCURRENCY: int = int(st.secrets.get("PREFETCH_USER_CONCURRENCY", 2))
+PREFETCH_USER_MAX_BYTES: int = int(st.secrets.get("PREFETCH_USER_MAX_BYTES", 4 * 2**20))
+# Prefetched pages outlive the regular cache TTL, they are only useful if they are still there
+# when the conversation is opened. New turns from this process invalidate them either way
+PREFETCH_TTL: float = float(st.secrets.get("PREFETCH_TTL", 300))
+
+
+def page_bytes(page: Dict) -> int:
+    # Approximate, the message text dominates the size of a cached page
+    return sum(len(m.get("content") or "") for m in page.get("messages", []))
+
+
+@dataclass
+class UserPrefetch:
+    jwt: str
+    queue: Deque[str] = field(default_factory=deque)
+    running: Set[str] = field(default_factory=set)
+    # Size of every page this user has prefetched into the cache
+    warmed: Dict[str, int] = field(default_factory=dict)
+    # Last known size of each prefetched page, pages that cannot fit are not fetched again
+    sizes: Dict[str, int] = field(default_factory=dict)
+
+
+class Prefetcher:
+    """
+    Loads the first transcript page of conversations into the user cache on a shared worker pool,
+    so opening one of them is a cache hit. Each user gets at most `user_concurrency` requests at a
+    time and `max_bytes` of prefetched pages, pages that have since left the cache no longer count.
+    """
+
+    def __init__(self, workers: int, user_concurrency: int, max_bytes: int):
+        self.user_concurrency = user_concurrency
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._users: Dict[str, UserPrefetch] = {}
+        self._counters = {"prefetched": 0, "over_budget": 0, "failed": 0}
+        self._lock = Lock()
+
+    def _used_bytes(self, state: UserPrefetch) -> int:
+        # Expired, evicted and invalidated pages are no longer held
+        for convo_id in [c for c in state.warmed if not is_turns_page_cached(c, jwt=state.jwt)]:
+            del state.warmed[convo_id]
+        return sum(state.warmed.values())
+
+    def _fill(self, state: UserPrefetch):
+        while state.queue and len(state.running) < self.user_concurrency:
+            convo_id = state.queue.popleft()
+            used = self._used_bytes(state)
+            if used >= self.max_bytes or used + state.sizes.get(convo_id, 0) > self.max_bytes:
+                self._counters["over_budget"] += 1
+                continue
+            state.running.add(convo_id)
+            self._executor.submit(self._prefetch, state, convo_id)
+
+    def _prefetch(self, state: UserPrefetch, convo_id: str):
+        size, failed = 0, False
+        try:
+            size = page_bytes(fetch_conversation_turns_page(convo_id, jwt=state.jwt, ttl=PREFETCH_TTL))
+        except Exception:
+            # Left to the click, which loads the page again and reports the error
+            failed = True
+
+        user = user_key(state.jwt)
+        with self._lock:
+            state.running.discard(convo_id)
+            state.sizes[convo_id] = size
+            if failed:
+                self._counters["failed"] += 1
+            elif self._users.get(user) is not state:
+                # Cancelled by a log out while in flight
+                get_user_cache().invalidate(user, TURNS, (convo_id, TURN_PAGE_SIZE, None))
+            elif self._used_bytes(state) + size > self.max_bytes:
+                get_user_cache().invalidate(user, TURNS, (convo_id, TURN_PAGE_SIZE, None))
+                self._counters["over_budget"] += 1
+            else:
+                state.warmed[convo_id] = size
+                self._counters["prefetched"] += 1
+            self._fill(state)
+
+    def schedule(self, jwt: str, convo_ids: List[str]):
+        """
+        Prefetch these conversations for the user, replacing whatever was still queued for them.
+        """
+        with self._lock:
+            state = self._users.setdefault(user_key(jwt), UserPrefetch(jwt))
+            state.jwt = jwt
+            state.queue = deque(
+                convo_id for convo_id in convo_ids
+                if convo_id not in state.running and not is_turns_page_cached(convo_id, jwt=jwt)
+            )
+            self._fill(state)
+
+    def cancel(self, jwt: str):
+        with self._lock:
+            if (state := self._users.pop(user_key(jwt), None)) is not None:
+                state.queue.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                **self._counters,
+                "queued": sum(len(s.queue) for s in self._users.values()),
+                "running": sum(len(s.running) for s in self._users.values()),
+                "held_bytes": sum(sum(s.warmed.values()) for s in self._users.values()),
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_prefetcher() -> Prefetcher:
+    return Prefetcher(PREFETCH_WORKERS, PREFETCH_USER_CONCURRENCY, PREFETCH_USER_MAX_BYTES)
+
+
+def prefetch_recent_conversations():
+    """
+    Queue the most recently updated conversations of the session, except the open one, for
+    prefetching. Nothing is queued until the list of recent conversations changes.
+    """
+    if PREFETCH_CONVERSATIONS <= 0 or not st.session_state.get("jwt") or (index := get_convo_index()) is None:
+        return
+    selected_id = (st.session_state.get("selected_convo") or {}).get("id")
+    convo_ids = [
+        convo["id"] for convo in index.ordered(PREFETCH_CONVERSATIONS + 1)
+        if convo["id"] != selected_id and not is_pending(convo)
+    ][:PREFETCH_CONVERSATIONS]
+    if st.session_state.get("prefetched_ids") == convo_ids:
+        return
+    st.session_state.prefetched_ids = convo_ids
+    get_prefetcher().schedule(st.session_state.jwt, convo_ids)
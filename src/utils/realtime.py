@@ -0,0 +1,291 @@
+# /src/utils/realtime.py
+
+import json
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from queue import Empty, SimpleQueue
+from typing import Dict, List
+from urllib.parse import urlencode
+
+import streamlit as st
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.client import ClientConnection, connect
+
+from src.utils.auth import SUPABASE_KEY, SUPABASE_URL
+from src.utils.backend import CONVERSATION_LIST_COLUMNS, invalidate_cached
+from src.utils.cache import CONVERSATIONS, TURNS, user_key
+from src.utils.convo_index import get_convo_index
+from src.utils.mutations import is_pending
+
+# Opt-in, conversation and turn changes are pushed over Supabase Realtime instead of refetched
+REALTIME: bool = bool(st.secrets.get("REALTIME", False))
+REALTIME_URL: str = st.secrets.get("REALTIME_URL") or f"{SUPABASE_URL.replace('http', 'ws', 1)}/realtime/v1/websocket"
+REALTIME_HEARTBEAT: float = float(st.secrets.get("REALTIME_HEARTBEAT", 25))
+
+# Tables the channel listens to, row level security limits the changes to the user's own rows
+TABLES = ("conversations", "turns")
+
+# Marks a gap in the feed, the session reloads instead of patching
+RESYNC = "RESYNC"
+
+RECONNECT_BACKOFF_MAX = 30.0
+
+
+@dataclass
+class Change:
+    table: str
+    type: str
+    record: Dict = field(default_factory=dict)
+    old_record: Dict = field(default_factory=dict)
+
+
+class ChangeFeed:
+    """
+    The changes one session has not applied yet. The channel only holds it weakly, so a feed
+    dropped with its session stops receiving and the channel closes once it has no feeds left.
+    """
+
+    def __init__(self):
+        self._queue: SimpleQueue[Change] = SimpleQueue()
+
+    def put(self, change: Change):
+        self._queue.put(change)
+
+    def drain(self) -> List[Change]:
+        changes = []
+        while True:
+            try:
+                changes.append(self._queue.get_nowait())
+            except Empty:
+                return changes
+
+
+class UserChannel(threading.Thread):
+    """
+    One Phoenix channel per user subscribed to postgres changes on `TABLES`, read on a background
+    thread and fanned out to the user's sessions. Reconnects with backoff and tells the feeds to
+    resync, changes made while it was disconnected were never received.
+    """
+
+    def __init__(self, url: str, apikey: str, jwt: str, on_exit):
+        super().__init__(daemon=True, name="realtime")
+        self.url = f"{url}?{urlencode({'apikey': apikey, 'vsn': '1.0.0'})}"
+        self.jwt = jwt
+        self.feeds: weakref.WeakSet[ChangeFeed] = weakref.WeakSet()
+        self.connected = False
+        self._on_exit = on_exit
+        self._ref = 0
+        self._topic = f"realtime:app-{random.getrandbits(32):08x}"
+        self._ws: ClientConnection | None = None
+        self._lock = threading.Lock()
+
+    def _send(self, topic: str, event: str, payload: Dict):
+        with self._lock:
+            self._ref += 1
+            message = {"topic": topic, "event": event, "payload": payload, "ref": str(self._ref), "join_ref": "1"}
+        self._ws.send(json.dumps(message))
+
+    def update_token(self, jwt: str):
+        # A fresher token from another of the user's sessions, the server re-checks access with it
+        if jwt == self.jwt:
+            return
+        self.jwt = jwt
+        if self.connected:
+            try:
+                self._send(self._topic, "access_token", {"access_token": jwt})
+            except ConnectionClosed:
+                pass
+
+    def _join(self):
+        self._send(self._topic, "phx_join", {
+            "config": {
+                "broadcast": {"self": False},
+                "presence": {"key": ""},
+                "postgres_changes": [{"event": "*", "schema": "public", "table": table} for table in TABLES],
+            },
+            "access_token": self.jwt,
+        })
+        while True:
+            message = json.loads(self._ws.recv(timeout=10))
+            if message.get("event") == "phx_reply" and message.get("topic") == self._topic:
+                if message["payload"].get("status") != "ok":
+                    raise ConnectionError(f"Realtime join refused: {message['payload'].get('response')}")
+                return
+
+    def _publish(self, change: Change):
+        for feed in list(self.feeds):
+            feed.put(change)
+
+    def _read(self):
+        next_heartbeat = time.monotonic() + REALTIME_HEARTBEAT
+        while self.feeds:
+            if time.monotonic() >= next_heartbeat:
+                self._send("phoenix", "heartbeat", {})
+                next_heartbeat = time.monotonic() + REALTIME_HEARTBEAT
+            try:
+                message = json.loads(self._ws.recv(timeout=1))
+            except TimeoutError:
+                continue
+            if message.get("event") != "postgres_changes":
+                continue
+            data = message["payload"].get("data", {})
+            self._publish(Change(data.get("table", ""), data.get("type", ""), data.get("record") or {}, data.get("old_record") or {}))
+
+    def run(self):
+        backoff = 1.0
+        try:
+            while self.feeds:
+                try:
+                    with connect(self.url, open_timeout=10) as self._ws:
+                        self._join()
+                        if self.connected is None:
+                            self._publish(Change("", RESYNC))
+                        self.connected = True
+                        backoff = 1.0
+                        self._read()
+                except (OSError, ConnectionClosed, ConnectionError, TimeoutError, ValueError):
+                    # None marks a dropped connection, the next successful join asks for a resync
+                    self.connected = None
+                    time.sleep(random.uniform(0, backoff))
+                    backoff = min(backoff * 2, RECONNECT_BACKOFF_MAX)
+        finally:
+            self.connected = False
+            self._on_exit(self)
+
+
+class RealtimeHub:
+    """
+    Process-wide registry of user channels, so a user's tabs share one websocket.
+    """
+
+    def __init__(self, url: str, apikey: str):
+        self.url = url
+        self.apikey = apikey
+        self._channels: Dict[str, UserChannel] = {}
+        self._lock = threading.Lock()
+
+    def _remove(self, channel: UserChannel):
+        with self._lock:
+            for user, existing in list(self._channels.items()):
+                if existing is channel:
+                    del self._channels[user]
+
+    def subscribe(self, jwt: str) -> ChangeFeed:
+        feed = ChangeFeed()
+        with self._lock:
+            user = user_key(jwt)
+            channel = self._channels.get(user)
+            if channel is None or not channel.is_alive():
+                channel = self._channels[user] = UserChannel(self.url, self.apikey, jwt, self._remove)
+                channel.feeds.add(feed)
+                channel.start()
+            else:
+                channel.feeds.add(feed)
+                channel.update_token(jwt)
+        return feed
+
+    def is_connected(self, jwt: str) -> bool:
+        channel = self._channels.get(user_key(jwt))
+        return bool(channel and channel.connected)
+
+
+@st.cache_resource(show_spinner=False)
+def get_realtime_hub() -> RealtimeHub:
+    return RealtimeHub(REALTIME_URL, SUPABASE_KEY)
+
+
+def get_change_feed() -> ChangeFeed | None:
+    """
+    The session's feed, subscribed on first use. None while realtime is off or nobody is logged in.
+    """
+    if not REALTIME or not st.session_state.get("jwt"):
+        return None
+    if st.session_state.get("change_feed") is None:
+        st.session_state.change_feed = get_realtime_hub().subscribe(st.session_state.jwt)
+    return st.session_state.change_feed
+
+
+def _apply_conversation(change: Change) -> bool:
+    convos = st.session_state.get("convos")
+    if convos is None:
+        return False
+    index = get_convo_index()
+    # Pushed rows are full rows, the list only keeps the columns it fetches itself
+    record = {k: v for k, v in (change.record or change.old_record).items() if k in CONVERSATION_LIST_COLUMNS}
+    existing = next((c for c in convos if c["id"] == record.get("id")), None)
+
+    if change.type == "DELETE":
+        if existing is None:
+            return False
+        convos.remove(existing)
+        index.remove(existing["id"])
+        if (st.session_state.get("selected_convo") or {}).get("id") == existing["id"]:
+            st.session_state.selected_convo = None
+            st.session_state.messages.clear()
+            st.session_state.page = "home"
+            st.session_state.deleted_convo_name = existing["name"]
+        return True
+
+    if existing is None:
+        # This session's own create, the placeholder is swapped for the row when it is reconciled
+        if any(is_pending(c) and c["name"] == record.get("name") for c in convos):
+            return False
+        convos.insert(0, record)
+        index.upsert(record)
+        return True
+
+    if all(existing.get(k) == v for k, v in record.items()):
+        return False
+    existing.update(record)
+    index.upsert(existing)
+    selected = st.session_state.get("selected_convo")
+    if selected is not None and selected is not existing and selected.get("id") == existing["id"]:
+        selected.update(record)
+    return True
+
+
+def _apply_turn(change: Change) -> bool:
+    turn = change.record
+    convo_id = turn.get("conversation_id")
+    if change.type != "INSERT" or not convo_id:
+        return False
+    invalidate_cached(TURNS, convo_id)
+    messages = [
+        {"role": role, "content": turn[column]}
+        for role, column in (("user", "user_message"), ("assistant", "assistant_response"))
+        if turn.get(column)
+    ]
+    if (index := get_convo_index()) is not None:
+        index.add_turns(convo_id, messages)
+
+    if (st.session_state.get("selected_convo") or {}).get("id") != convo_id:
+        return False
+    # Turns sent from this session are already shown
+    recent = [(m["role"], m["content"]) for m in st.session_state.messages[-4:]]
+    if all((m["role"], m["content"]) in recent for m in messages):
+        return False
+    st.session_state.messages.extend(messages)
+    return True
+
+
+def apply_changes(changes: List[Change]) -> bool:
+    """
+    Patch the session's conversation list and open transcript with pushed changes. Returns
+    whether anything shown has changed.
+    """
+    changed = False
+    for change in changes:
+        if change.type == RESYNC:
+            # Changes were missed while disconnected, reload the list
+            invalidate_cached(CONVERSATIONS)
+            st.session_state.convos = None
+            changed = True
+        elif change.table == "conversations":
+            invalidate_cached(CONVERSATIONS)
+            changed |= _apply_conversation(change)
+        elif change.table == "turns":
+            changed |= _apply_turn(change)
+    return changed
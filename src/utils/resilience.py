@@ -0,0 +1,273 @@
+# /src/utils/resilience.py
+
+import random
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, List, TypeVar
+
+import requests
+import streamlit as st
+from urllib3.exceptions import NewConnectionError
+
+from src.utils.telemetry import annotate
+
+T = TypeVar("T")
+
+# Responses that mean the request was not processed and can safely be sent again
+RETRYABLE_STATUS = {429, 503}
+# Responses after which the server may still have taken the request, only resent when it dedupes
+# requests by their idempotency key
+AMBIGUOUS_STATUS = {502, 504}
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class ResilienceConfig:
+    connect_timeout: float = 3.05
+    read_timeout: float = 30.0
+    retries: int = 2
+    backoff: float = 0.5
+    hedge: bool = False
+    hedge_after: float | None = None
+    hedge_min_samples: int = 20
+    breaker_failures: int = 5
+    breaker_reset: float = 30.0
+    fallback: bool = True
+    # The turn endpoints record a request once per Idempotency-Key, which makes resending safe
+    # after a read timeout or a gateway error, and makes hedging possible at all
+    idempotency_keys: bool = False
+
+    @property
+    def timeout(self) -> tuple:
+        return self.connect_timeout, self.read_timeout
+
+    @classmethod
+    def from_secrets(cls) -> "ResilienceConfig":
+        hedge_after = st.secrets.get("TURN_HEDGE_AFTER")
+        return cls(
+            connect_timeout=float(st.secrets.get("TURN_CONNECT_TIMEOUT", cls.connect_timeout)),
+            read_timeout=float(st.secrets.get("TURN_READ_TIMEOUT", cls.read_timeout)),
+            retries=int(st.secrets.get("TURN_RETRIES", cls.retries)),
+            backoff=float(st.secrets.get("TURN_RETRY_BACKOFF", cls.backoff)),
+            hedge=bool(st.secrets.get("TURN_HEDGE", cls.hedge)),
+            hedge_after=float(hedge_after) if hedge_after else None,
+            breaker_failures=int(st.secrets.get("TURN_BREAKER_FAILURES", cls.breaker_failures)),
+            breaker_reset=float(st.secrets.get("TURN_BREAKER_RESET", cls.breaker_reset)),
+            fallback=bool(st.secrets.get("TURN_FALLBACK", cls.fallback)),
+            idempotency_keys=bool(st.secrets.get("TURN_IDEMPOTENCY_KEYS", cls.idempotency_keys)),
+        )
+
+
+class CircuitBreaker:
+    """
+    Opens after `failures` consecutive failures and fails fast until `reset` seconds have passed,
+    then lets a single trial request through (half-open) to decide whether to close again.
+    """
+
+    def __init__(self, failures: int, reset: float):
+        self.failures = failures
+        self.reset = reset
+        self.consecutive_failures = 0
+        self.opened_at: float | None = None
+        self._trial_running = False
+        self._lock = Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self._trial_running or self.consecutive_failures >= self.failures:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class LatencyWindow:
+    def __init__(self, size: int = 200):
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def p95(self) -> float | None:
+        with self._lock:
+            if not self._samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+
+
+def is_retryable(error: Exception, idempotency_keys: bool = False) -> bool:
+    """
+    Failures where the request was not processed, or where the server may have processed it but
+    dedupes the resent copy by its idempotency key.
+    """
+    if never_connected(error):
+        return True
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        # Dropped or timed out after the request went out, the server may have recorded the turn
+        return idempotency_keys
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        status = error.response.status_code
+        return status in RETRYABLE_STATUS or (idempotency_keys and status in AMBIGUOUS_STATUS)
+    return False
+
+
+def never_connected(error: Exception) -> bool:
+    """
+    Failures to set up the connection at all (refused, unresolvable host, connect timeout), the
+    request was never sent. A reset or disconnect once it was sent is a plain ConnectionError too.
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError):
+        return False
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying error
+    cause = error.args[0] if error.args else None
+    # NameResolutionError is a NewConnectionError
+    return isinstance(cause, NewConnectionError) or isinstance(getattr(cause, "reason", None), NewConnectionError)
+
+
+def is_endpoint_failure(error: Exception) -> bool:
+    """
+    Failures that count against the endpoint's circuit, rejections of the request itself (4xx) don't.
+    """
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return False
+
+
+class TurnRouter:
+    """
+    Sends turn requests to the preferred API and, only while its circuit is open, to the fallback
+    one. Each attempt gets a connect and a read timeout, retryable failures are retried with jittered
+    exponential backoff and, when hedging is on, a second copy is sent once an attempt has run
+    longer than the endpoint's observed p95.
+    """
+
+    def __init__(self, base_urls: List[str], config: ResilienceConfig):
+        self.config = config
+        urls = [url for i, url in enumerate(base_urls) if url and url not in base_urls[:i]]
+        self.base_urls = urls if config.fallback else urls[:1]
+        self.breakers = {url: CircuitBreaker(config.breaker_failures, config.breaker_reset) for url in self.base_urls}
+        self.latencies = {url: LatencyWindow() for url in self.base_urls}
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="turn-hedge")
+
+    def _hedge_delay(self, base_url: str) -> float | None:
+        # A hedged copy is a second request for the same turn, only safe when the server dedupes it
+        if not self.config.hedge or not self.config.idempotency_keys:
+            return None
+        if self.config.hedge_after:
+            return self.config.hedge_after
+        window = self.latencies[base_url]
+        return window.p95() if len(window) >= self.config.hedge_min_samples else None
+
+    def _attempt(self, base_url: str, send: Callable[[str], T], hedge: bool) -> T:
+        delay = self._hedge_delay(base_url) if hedge else None
+        if delay is None:
+            return send(base_url)
+
+        first = self._executor.submit(send, base_url)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        # Both copies carry the same idempotency key, whichever answers first wins
+        annotate(hedged=True)
+        pending: List[Future] = [first, self._executor.submit(send, base_url)]
+        error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def call(self, send: Callable[[str], T], hedge: bool = True) -> T:
+        """
+        Run `send(base_url)` against the first endpoint whose circuit allows it. Once retries run
+        out the next endpoint is only tried if this one's circuit has opened, a short outage is
+        reported rather than the turn sent to a second backend.
+        """
+        last_error: Exception | None = None
+        attempts = 0
+        for base_url in self.base_urls:
+            breaker = self.breakers[base_url]
+            for attempt in range(self.config.retries + 1):
+                if not breaker.allow():
+                    break
+                attempts += 1
+                started = time.monotonic()
+                try:
+                    result = self._attempt(base_url, send, hedge)
+                except Exception as e:
+                    if not is_endpoint_failure(e):
+                        # The endpoint answered, the request itself was rejected
+                        breaker.record_success()
+                        raise
+                    breaker.record_failure()
+                    if not is_retryable(e, self.config.idempotency_keys):
+                        # The turn may have been taken, sending it again could record it twice
+                        raise
+                    last_error = e
+                    if attempt < self.config.retries:
+                        time.sleep(random.uniform(0, self.config.backoff * 2 ** attempt))
+                    continue
+
+                breaker.record_success()
+                self.latencies[base_url].add(time.monotonic() - started)
+                annotate(attempts=attempts, endpoint=base_url)
+                return result
+            if breaker.state == "closed" and last_error is not None:
+                break
+
+        annotate(attempts=attempts)
+        if last_error is not None:
+            raise last_error
+        raise CircuitOpenError("The LLM servers are failing, requests are paused for a moment. Please try again shortly.")
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        return [
+            {
+                "endpoint": url,
+                "state": self.breakers[url].state,
+                "failures": self.breakers[url].consecutive_failures,
+                "p95_ms": round(p95 * 1000, 1) if (p95 := self.latencies[url].p95()) is not None else None,
+            }
+            for url in self.base_urls
+        ]
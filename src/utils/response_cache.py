@@ -0,0 +1,116 @@
+# /src/utils/response_cache.py
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Dict, List
+
+import streamlit as st
+
+from src.utils.telemetry import annotate
+
+# Opt-in, regression runs of unchanged prompts are answered from disk instead of the LLM
+RESPONSE_CACHE: bool = bool(st.secrets.get("RESPONSE_CACHE", False))
+RESPONSE_CACHE_DIR: str = st.secrets.get("RESPONSE_CACHE_DIR") or ".cache/responses"
+RESPONSE_CACHE_MAX_BYTES: int = int(st.secrets.get("RESPONSE_CACHE_MAX_BYTES", 256 * 2**20))
+
+
+def response_key(user: str, backend: str, agent_config: Dict | None, history: List[Dict], user_message: str) -> str:
+    """
+    Content hash of everything that determines a reply: who asks (retrieval runs over the user's own
+    documents), which backend answers, the agent config, the prior turns it sees and the message.
+    """
+    config = agent_config or {}
+    max_turns = int(config.get("max_previous_turns", 0) or 0)
+    visible = history[-2 * max_turns:] if max_turns else []
+    payload = {
+        "user": user,
+        "backend": backend,
+        "agent_config": config,
+        "history": [[m["role"], m["content"]] for m in visible],
+        "user_message": user_message,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Content-addressed replies stored one file per key, evicted least recently used once the
+    directory grows past `max_bytes`. Reads refresh a file's mtime, which orders the LRU across restarts.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for path in sorted(self.directory.glob("*/*.json"), key=lambda p: p.stat().st_mtime):
+            self._sizes[path.stem] = path.stat().st_size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            response = json.loads(path.read_text(encoding="utf-8"))["response"]
+            os.utime(path)
+        except (OSError, ValueError, KeyError):
+            response = None
+        with self._lock:
+            if response is None:
+                self.misses += 1
+                self._sizes.pop(key, None)
+            else:
+                self.hits += 1
+                self._sizes[key] = self._sizes.get(key, path.stat().st_size)
+                self._sizes.move_to_end(key)
+        annotate(cache_hit=response is not None)
+        return response
+
+    def set(self, key: str, response: str):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        body = json.dumps({"response": response, "stored_at": time.time()}, ensure_ascii=False)
+        # Written beside the target and renamed into place, readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(body)
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._sizes[key] = path.stat().st_size
+            self._sizes.move_to_end(key)
+            total = sum(self._sizes.values())
+            while total > self.max_bytes and len(self._sizes) > 1:
+                oldest, size = self._sizes.popitem(last=False)
+                self._path(oldest).unlink(missing_ok=True)
+                total -= size
+
+    def clear(self):
+        with self._lock:
+            for key in self._sizes:
+                self._path(key).unlink(missing_ok=True)
+            self._sizes.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._sizes),
+                "bytes": sum(self._sizes.values()),
+            }
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache() -> ResponseCache:
+    return ResponseCache(RESPONSE_CACHE_DIR, RESPONSE_CACHE_MAX_BYTES)
@@ -0,0 +1,66 @@
+# /src/utils/startup.py
+
+import copy
+from pathlib import Path
+from typing import Any, Dict
+
+import streamlit as st
+
+from src.utils.message_store import MessageStore
+
+STYLES_PATH: Path = Path(__file__).parent.parent.parent / "assets" / "styles.css"
+
+SESSION_DEFAULTS: Dict[str, Any] = {
+    "user": None,
+    "jwt": None,
+    "disable_file_upload": True,
+    "clicked_convo_id": None,
+    "selected_convo": None,
+    "deleted_convo_name": None,
+    "new_convo_name": None,
+    "convos": None,
+    "convos_cursor": None,
+    # Whether the listed pages come from the local store rather than the server
+    "convos_local": False,
+    "initial_login": True,
+    "messages_cursor": None,
+    "page": "login",
+    "use_dedicated_server": True,
+    "default_system_prompt": "You are a helpful assistant.",
+    "set_system_prompt": "You are a helpful assistant.",
+    "agent_settings": {
+        "model": "o9-mini",
+        "temperature": "0.99",
+        "rag_chunks": "9",
+        "chunk_size": "999",
+        "system_prompt": "You are a helpful assistant."
+    },
+    "temp_agent_config": {
+        "system_prompt": "Talk like a farmer",
+        "document_prompt": "Here are additional documents that may help answer the users question: {context}",
+        "retrieval_documents": 5,
+        "max_previous_turns": 6,
+        "temperature": 0.4,
+        "max_tokens": 400,
+        "max_completion_tokens": 400,
+    },
+}
+
+
+@st.cache_resource(show_spinner=False)
+def load_styles() -> str:
+    # Read once per process, the file only changes with a deploy
+    return f"<style>{STYLES_PATH.read_text()}</style>"
+
+
+def init_session_state():
+    """
+    Fill in the session state defaults once per session, and again after logging out clears it.
+    """
+    if st.session_state.get("session_initialized"):
+        return
+    for key, value in SESSION_DEFAULTS.items():
+        # Copied, sessions must never share the mutable defaults
+        st.session_state.setdefault(key, copy.deepcopy(value))
+    st.session_state.setdefault("messages", MessageStore())
+    st.session_state.session_initialized = True
@@ -0,0 +1,226 @@
+# /src/utils/telemetry.py
+
+import functools
+import inspect
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from queue import SimpleQueue
+from threading import Lock, Thread
+from typing import Dict, Iterable, List, TextIO
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import RerunException, StopException, get_script_run_ctx
+
+# Upper bounds (seconds) of the Prometheus histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    duration_ms: float = 0.0
+    outcome: str = "ok"
+    bytes: int | None = None
+    cache_hit: bool | None = None
+    session_id: str | None = None
+    attrs: Dict[str, object] = field(default_factory=dict)
+
+
+_current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+
+
+def current_session_id() -> str | None:
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else None
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class SpanRecorder:
+    """
+    Process-wide ring buffer of finished spans, optionally mirrored to a JSONL file. The file is
+    written by a background thread, recording a span never waits on disk.
+    """
+
+    def __init__(self, max_spans: int = 10_000, jsonl_path: str | None = None):
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+        self._jsonl_path = jsonl_path
+        self._lock = Lock()
+        self._unwritten: SimpleQueue[Span] = SimpleQueue()
+        if jsonl_path:
+            Thread(target=self._write_jsonl, daemon=True, name="span-jsonl").start()
+
+    def record(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+        if self._jsonl_path:
+            self._unwritten.put(span)
+
+    def _write_jsonl(self):
+        # Blocks for the next span, then writes it along with every other span queued meanwhile
+        while True:
+            spans = [self._unwritten.get()]
+            while not self._unwritten.empty():
+                spans.append(self._unwritten.get())
+            with open(self._jsonl_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(asdict(span), default=str) + "\n" for span in spans)
+
+    def spans(self, session_id: str | None = None) -> List[Span]:
+        with self._lock:
+            return [s for s in self._spans if session_id is None or s.session_id == session_id]
+
+    def export_jsonl(self, fp: TextIO, session_id: str | None = None):
+        for span in self.spans(session_id):
+            fp.write(json.dumps(asdict(span), default=str) + "\n")
+
+    def summary(self, session_id: str | None = None) -> List[Dict[str, object]]:
+        """
+        Per span name count, p50/p95 latency, error count and cache hit rate.
+        """
+        by_name: Dict[str, List[Span]] = {}
+        for span in self.spans(session_id):
+            by_name.setdefault(span.name, []).append(span)
+
+        rows = []
+        for name, spans in sorted(by_name.items()):
+            durations = sorted(s.duration_ms for s in spans)
+            cache_lookups = [s.cache_hit for s in spans if s.cache_hit is not None]
+            rows.append({
+                "name": name,
+                "count": len(spans),
+                "p50_ms": round(_percentile(durations, 50), 1),
+                "p95_ms": round(_percentile(durations, 95), 1),
+                "errors": sum(s.outcome == "error" for s in spans),
+                "cache_hit_rate": round(sum(cache_lookups) / len(cache_lookups), 2) if cache_lookups else None,
+            })
+        return rows
+
+    def prometheus_snapshot(self) -> str:
+        """
+        Render all recorded spans as Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP clover_span_duration_seconds Duration of instrumented backend calls and renders.",
+            "# TYPE clover_span_duration_seconds histogram",
+        ]
+        by_name: Dict[str, List[Span]] = {}
+        for span in self.spans():
+            by_name.setdefault(span.name, []).append(span)
+
+        for name, spans in sorted(by_name.items()):
+            seconds = [s.duration_ms / 1000 for s in spans]
+            for bound in LATENCY_BUCKETS:
+                count = sum(v <= bound for v in seconds)
+                lines.append(f'clover_span_duration_seconds_bucket{{name="{name}",le="{bound}"}} {count}')
+            lines.append(f'clover_span_duration_seconds_bucket{{name="{name}",le="+Inf"}} {len(seconds)}')
+            lines.append(f'clover_span_duration_seconds_sum{{name="{name}"}} {sum(seconds):.6f}')
+            lines.append(f'clover_span_duration_seconds_count{{name="{name}"}} {len(seconds)}')
+
+        for metric, help_text, predicate in (
+            ("clover_span_errors_total", "Spans that ended with an error.", lambda s: s.outcome == "error"),
+            ("clover_span_cache_hits_total", "Spans served from cache.", lambda s: s.cache_hit is True),
+            ("clover_span_cache_misses_total", "Spans that missed the cache.", lambda s: s.cache_hit is False),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, spans in sorted(by_name.items()):
+                lines.append(f'{metric}{{name="{name}"}} {sum(map(predicate, spans))}')
+
+        lines.append("# HELP clover_span_bytes_total Payload bytes received by instrumented calls.")
+        lines.append("# TYPE clover_span_bytes_total counter")
+        for name, spans in sorted(by_name.items()):
+            lines.append(f'clover_span_bytes_total{{name="{name}"}} {sum(s.bytes or 0 for s in spans)}')
+        return "\n".join(lines) + "\n"
+
+
+@st.cache_resource(show_spinner=False)
+def get_span_recorder() -> SpanRecorder:
+    return SpanRecorder(
+        max_spans=int(st.secrets.get("TELEMETRY_MAX_SPANS", 10_000)),
+        jsonl_path=st.secrets.get("TELEMETRY_JSONL_PATH") or None,
+    )
+
+
+def annotate(bytes: int | None = None, cache_hit: bool | None = None, **attrs):
+    """
+    Attach payload size, cache status or other attributes to the span currently being timed.
+    """
+    span = _current_span.get()
+    if span is None:
+        return
+    if bytes is not None:
+        span.bytes = (span.bytes or 0) + bytes
+    if cache_hit is not None:
+        span.cache_hit = cache_hit if span.cache_hit is None else span.cache_hit and cache_hit
+    span.attrs.update(attrs)
+
+
+@contextmanager
+def span(name: str, bind: bool = True, **attrs):
+    """
+    Time a block as a span. While bound, annotate() calls made inside the block land on this span.
+    """
+    current = Span(name=name, start=time.time(), session_id=current_session_id(), attrs=attrs)
+    token = _current_span.set(current) if bind else None
+    started = time.perf_counter()
+    try:
+        yield current
+    except (RerunException, StopException):
+        current.outcome = "rerun"
+        raise
+    except GeneratorExit:
+        current.outcome = "cancelled"
+        raise
+    except BaseException:
+        current.outcome = "error"
+        raise
+    finally:
+        current.duration_ms = (time.perf_counter() - started) * 1000
+        if token is not None:
+            _current_span.reset(token)
+        get_span_recorder().record(current)
+
+
+def _traced_generator(name: str, gen: Iterable):
+    # Not bound to the context, a generator's frames run interleaved with the caller's own spans
+    with span(name, bind=False) as current:
+        started = time.perf_counter()
+        size = 0
+        for chunk in gen:
+            if "first_chunk_ms" not in current.attrs:
+                current.attrs["first_chunk_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            size += len(chunk) if isinstance(chunk, (str, bytes)) else 0
+            yield chunk
+        current.bytes = size
+
+
+def traced(name: str | None = None):
+    """
+    Time every call of the decorated function as a span, generators are timed until exhausted.
+    """
+    def decorator(func):
+        span_name = name or func.__name__
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                return _traced_generator(span_name, func(*args, **kwargs))
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
@@ -0,0 +1,173 @@
+# /src/utils/upload.py
+
+import base64
+import hashlib
+from dataclasses import dataclass, field
+from threading import Lock
+from typing import BinaryIO, Callable, Dict, Tuple
+
+import streamlit as st
+
+from src.utils.http import get_http_client
+
+TUS_VERSION = "1.0.0"
+PLAN_BUCKET = "ndis-plans"
+
+# Supabase storage only accepts 6 MB chunks (the final chunk may be smaller)
+UPLOAD_CHUNK_SIZE = 6 * 1024 * 1024
+
+
+@dataclass
+class UploadRegistry:
+    """
+    Process-wide record of finished uploads (by content hash) and of the upload URLs of
+    unfinished ones, so identical plans are skipped and interrupted uploads resume. It is held in
+    memory only, after a restart or in another app process the same plan is uploaded again.
+    """
+    completed: Dict[Tuple[str, str], str] = field(default_factory=dict)
+    in_progress: Dict[Tuple[str, str], str] = field(default_factory=dict)
+    lock: Lock = field(default_factory=Lock)
+
+
+@st.cache_resource(show_spinner=False)
+def get_upload_registry() -> UploadRegistry:
+    return UploadRegistry()
+
+
+def _encode_metadata(metadata: Dict[str, str]) -> str:
+    return ",".join(f"{k} {base64.b64encode(v.encode()).decode()}" for k, v in metadata.items())
+
+
+def file_sha256(file: BinaryIO, chunk_size: int = UPLOAD_CHUNK_SIZE) -> str:
+    """
+    Hash a file chunk by chunk, leaves the file at its start.
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    while chunk := file.read(chunk_size):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def _file_size(file: BinaryIO) -> int:
+    file.seek(0, 2)
+    size = file.tell()
+    file.seek(0)
+    return size
+
+
+class ResumableUpload:
+    """
+    A single TUS upload to Supabase storage, a dropped connection only costs the chunk in flight.
+    """
+
+    def __init__(self, base_url: str, headers: Dict[str, str], chunk_size: int = UPLOAD_CHUNK_SIZE, verify: bool = False):
+        self.base_url = base_url.rstrip("/")
+        self.endpoint = f"{self.base_url}/storage/v1/upload/resumable"
+        self.headers = {**headers, "Tus-Resumable": TUS_VERSION}
+        self.chunk_size = chunk_size
+        self.verify = verify
+
+    def create(self, object_name: str, size: int, content_type: str, bucket: str = PLAN_BUCKET) -> str:
+        resp = get_http_client().post(
+            self.endpoint,
+            headers={
+                **self.headers,
+                "Upload-Length": str(size),
+                "Upload-Metadata": _encode_metadata({
+                    "bucketName": bucket,
+                    "objectName": object_name,
+                    "contentType": content_type,
+                }),
+                "x-upsert": "true",
+            },
+            timeout=10,
+            verify=self.verify,
+        )
+        resp.raise_for_status()
+        location = resp.headers["Location"]
+        return location if location.startswith("http") else f"{self.base_url}{location}"
+
+    def offset(self, upload_url: str) -> int | None:
+        """
+        Bytes the server already holds for an upload, None if it no longer knows the upload.
+        """
+        resp = get_http_client().head(upload_url, headers=self.headers, timeout=10, verify=self.verify)
+        if resp.status_code in (404, 410):
+            return None
+        resp.raise_for_status()
+        return int(resp.headers.get("Upload-Offset", 0))
+
+    def send(self, upload_url: str, file: BinaryIO, offset: int, size: int, on_progress: Callable[[int, int], None] | None = None):
+        file.seek(offset)
+        while offset < size:
+            chunk = file.read(self.chunk_size)
+            if not chunk:
+                raise RuntimeError(f"File ended at byte {offset} of {size} while uploading")
+            resp = get_http_client().patch(
+                upload_url,
+                headers={
+                    **self.headers,
+                    "Upload-Offset": str(offset),
+                    "Content-Type": "application/offset+octet-stream",
+                },
+                data=chunk,
+                timeout=(5, 60),
+                verify=self.verify,
+            )
+            resp.raise_for_status()
+            sent_to = int(resp.headers.get("Upload-Offset", offset + len(chunk)))
+            if sent_to <= offset:
+                # Sending the same chunk again would not get any further
+                raise RuntimeError(f"Upload stalled at byte {offset} of {size}")
+            if sent_to != offset + len(chunk):
+                # The server kept only part of the chunk, the rest is read again from there
+                file.seek(sent_to)
+            offset = sent_to
+            if on_progress:
+                on_progress(offset, size)
+
+
+def upload_file_resumable(
+    file: BinaryIO,
+    filename: str,
+    account_id: str,
+    base_url: str,
+    headers: Dict[str, str],
+    content_type: str = "application/pdf",
+    on_progress: Callable[[int, int], None] | None = None,
+) -> Dict:
+    """
+    Upload `file` to `ndis-plans/{account_id}/{filename}`, `filename` unquoted as the object should
+    be named. Skips files whose content hash has already been uploaded for the account and resumes
+    an earlier interrupted upload of the same file.
+    """
+    registry = get_upload_registry()
+    sha256 = file_sha256(file)
+    size = _file_size(file)
+    object_name = f"{account_id}/{filename}"
+    key = (account_id, sha256)
+
+    with registry.lock:
+        existing = registry.completed.get(key)
+        upload_url = registry.in_progress.get(key)
+    if existing:
+        if on_progress:
+            on_progress(size, size)
+        return {"object": existing, "sha256": sha256, "skipped": True}
+
+    upload = ResumableUpload(base_url, headers)
+    offset = upload.offset(upload_url) if upload_url else None
+    if offset is None:
+        upload_url = upload.create(object_name, size, content_type)
+        offset = 0
+        with registry.lock:
+            registry.in_progress[key] = upload_url
+
+    upload.send(upload_url, file, offset, size, on_progress)
+
+    with registry.lock:
+        registry.in_progress.pop(key, None)
+        registry.completed[key] = object_name
+    return {"object": object_name, "sha256": sha256, "skipped": False}
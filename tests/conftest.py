@@ -0,0 +1,28 @@
+# /tests/conftest.py
+
+import pytest
+import streamlit as st
+
+from dev.fake_backend import FakeBackendConfig, FakeBackendServer, fake_jwt, start_fake_backend
+
+# The app's modules read their settings from st.secrets on import, so one fake backend serves the
+# whole session and its secrets are in place before any test module imports them
+SERVER = start_fake_backend(config=FakeBackendConfig(chunk_delay=0), realtime=True)
+st.secrets._secrets = {**SERVER.secrets(), "REALTIME": 1}
+
+
+@pytest.fixture
+def fake_backend() -> FakeBackendServer:
+    """
+    The shared fake backend with freshly seeded state. Set `fake_backend.config` fields to change
+    its behaviour for a test.
+    """
+    SERVER.reset(FakeBackendConfig(conversations=3, turns_per_conversation=4, chunk_delay=0))
+    # Process-wide caches, pools and routers would otherwise carry state between tests
+    st.cache_resource.clear()
+    yield SERVER
+
+
+@pytest.fixture
+def jwt() -> str:
+    return fake_jwt()
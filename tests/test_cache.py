@@ -0,0 +1,34 @@
+# /tests/test_cache.py
+
+from src.utils.cache import CONVERSATIONS, TURNS, UserCache
+
+
+def _load_while(cache: UserCache, key, invalidate):
+    def loader():
+        invalidate()
+        return "stale"
+    return cache.get_or_load("user", TURNS, key, loader)
+
+
+def test_load_invalidated_while_running_is_not_stored():
+    cache = UserCache()
+    assert _load_while(cache, ("convo", 10, None), lambda: cache.invalidate("user", TURNS, "convo")) == "stale"
+    assert cache.get("user", TURNS, ("convo", 10, None)) == (False, None)
+
+
+def test_resource_and_user_invalidations_also_drop_running_loads():
+    cache = UserCache()
+    _load_while(cache, ("convo", 10, None), lambda: cache.invalidate("user", TURNS))
+    _load_while(cache, ("other", 10, None), lambda: cache.invalidate("user"))
+    assert not cache.contains("user", TURNS, ("convo", 10, None))
+    assert not cache.contains("user", TURNS, ("other", 10, None))
+
+
+def test_unrelated_invalidations_do_not_drop_running_loads():
+    cache = UserCache()
+    _load_while(cache, ("convo", 10, None), lambda: cache.invalidate("user", TURNS, "other"))
+    _load_while(cache, ("convo", 20, None), lambda: cache.invalidate("user", CONVERSATIONS))
+    _load_while(cache, ("convo", 30, None), lambda: cache.invalidate("someone-else", TURNS))
+    assert cache.get("user", TURNS, ("convo", 10, None)) == (True, "stale")
+    assert cache.contains("user", TURNS, ("convo", 20, None))
+    assert cache.contains("user", TURNS, ("convo", 30, None))
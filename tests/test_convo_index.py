@@ -0,0 +1,49 @@
+# /tests/test_convo_index.py
+
+from src.utils.convo_index import ConversationIndex
+
+
+def _convo(convo_id: str, name: str, day: int) -> dict:
+    return {"id": convo_id, "name": name, "updated_at": f"2026-01-{day:02d}T00:00:00+00:00"}
+
+
+def _ids(convos) -> list:
+    return [c["id"] for c in convos]
+
+
+def test_seeded_conversations_are_ordered_by_recency(fake_backend):
+    convos = [{k: c[k] for k in ("id", "name", "updated_at")} for c in fake_backend.state.conversations.values()]
+    index = ConversationIndex(convos)
+    assert _ids(index.ordered()) == _ids(sorted(convos, key=lambda c: c["updated_at"], reverse=True))
+    assert _ids(index.ordered(2)) == _ids(index.ordered())[:2]
+
+
+def test_touch_and_remove_keep_the_order():
+    index = ConversationIndex([_convo("a", "Budget", 1), _convo("b", "Travel", 2), _convo("c", "Therapy", 3)])
+    index.touch("a", "2026-01-04T00:00:00+00:00")
+    assert _ids(index.ordered()) == ["a", "c", "b"]
+    index.remove("c")
+    assert _ids(index.ordered()) == ["a", "b"] and len(index) == 2
+
+
+def test_search_matches_prefixes_of_names_and_turns():
+    index = ConversationIndex([_convo("a", "Core budget", 1), _convo("b", "Travel plans", 2)])
+    index.add_turns("a", [{"role": "user", "content": "Can I claim transport?"}])
+
+    assert _ids(index.search("bud")) == ["a"]
+    assert _ids(index.search("trans")) == ["a"]
+    assert _ids(index.search("tra")) == ["b", "a"]
+    assert _ids(index.search("core travel")) == []
+    assert _ids(index.search("")) == ["b", "a"]
+
+
+def test_rename_and_replace_update_the_postings():
+    index = ConversationIndex([_convo("pending", "Budget", 1)])
+    index.add_turns("pending", [{"role": "user", "content": "wheelchair"}])
+    index.replace("pending", _convo("real", "Budget", 1))
+    assert _ids(index.search("wheel")) == ["real"]
+
+    index.rename("real", "Equipment")
+    assert _ids(index.search("budget")) == []
+    assert _ids(index.search("equip")) == ["real"]
+    assert _ids(index.search("wheel")) == ["real"]
@@ -0,0 +1,62 @@
+# /tests/test_message_store.py
+
+import gc
+import os
+
+import pytest
+
+from src.utils import message_store
+from src.utils.message_store import MessageStore
+
+
+@pytest.fixture(autouse=True)
+def spill_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(message_store, "MESSAGE_SPILL_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _messages(start: int, stop: int) -> list:
+    return [{"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"} for i in range(start, stop)]
+
+
+def test_oldest_messages_spill_past_the_count_limit():
+    store = MessageStore(max_messages=4)
+    store.extend(_messages(0, 10))
+
+    report = store.memory_report()
+    assert (report["in_memory"], report["spilled"]) == (4, 6)
+    assert store[:] == _messages(0, 10)
+    assert store[4:7] == _messages(4, 7)
+    assert store[-1] == _messages(9, 10)[0]
+
+
+def test_large_messages_spill_past_the_byte_limit():
+    store = MessageStore(max_messages=100, max_bytes=10_000)
+    store.extend([{"role": "user", "content": "x" * 4000} for _ in range(5)])
+    store.append({"role": "assistant", "content": "y" * 50_000, "cached": True})
+
+    # The newest message stays in memory even when it alone is over the limit
+    assert store.memory_report()["in_memory"] == 1
+    assert store[-1] == {"role": "assistant", "content": "y" * 50_000, "cached": True}
+    assert len(store) == 6
+
+
+def test_older_pages_are_prepended_to_disk_once_spilled():
+    store = MessageStore(max_messages=4)
+    store.extend(_messages(10, 20))
+    store.prepend(_messages(0, 10))
+
+    assert store.memory_report()["in_memory"] == 4
+    assert store[:] == _messages(0, 20)
+
+
+def test_spill_file_goes_with_the_store(spill_dir):
+    store = MessageStore(max_messages=1)
+    store.extend(_messages(0, 3))
+    assert len(os.listdir(spill_dir)) == 1
+
+    store.replace(_messages(5, 6))
+    assert store[:] == _messages(5, 6)
+    del store
+    gc.collect()
+    assert os.listdir(spill_dir) == []
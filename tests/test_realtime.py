@@ -0,0 +1,78 @@
+# /tests/test_realtime.py
+
+import time
+
+import pytest
+import streamlit as st
+
+from src.utils.realtime import RESYNC, Change, RealtimeHub, apply_changes
+
+
+@pytest.fixture
+def session(jwt):
+    st.session_state.clear()
+    st.session_state.jwt = jwt
+    st.session_state.selected_convo = None
+    st.session_state.convos = [{"id": "a", "name": "A", "updated_at": "2026-01-01T00:00:00+00:00"}]
+    yield st.session_state
+    st.session_state.clear()
+
+
+def _wait_for(predicate, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def _subscribe(fake_backend, jwt):
+    hub = RealtimeHub(fake_backend.realtime.url, "fake-anon-key")
+    feed = hub.subscribe(jwt)
+    _wait_for(lambda: hub.is_connected(jwt))
+    return hub, feed
+
+
+def _collect(feed, predicate) -> list:
+    changes = []
+    _wait_for(lambda: changes.extend(feed.drain()) or any(map(predicate, changes)))
+    return changes
+
+
+def test_sessions_of_a_user_share_a_channel(fake_backend, jwt):
+    hub, feed = _subscribe(fake_backend, jwt)
+    other = hub.subscribe(jwt)
+    convo = fake_backend.state.add_conversation("Pushed", None)
+
+    for session_feed in (feed, other):
+        changes = _collect(session_feed, lambda c: c.table == "conversations")
+        assert (changes[0].type, changes[0].record["id"]) == ("INSERT", convo["id"])
+    assert len(hub._channels) == 1
+
+
+def test_reconnect_asks_for_a_resync(fake_backend, jwt):
+    hub, feed = _subscribe(fake_backend, jwt)
+    fake_backend.realtime.disconnect_all()
+
+    _collect(feed, lambda c: c.type == RESYNC)
+    _wait_for(lambda: hub.is_connected(jwt))
+    # Changes after the reconnect arrive again
+    convo = fake_backend.state.add_conversation("After reconnect", None)
+    changes = _collect(feed, lambda c: c.table == "conversations")
+    assert changes[-1].record["id"] == convo["id"]
+
+
+def test_resync_reloads_the_list(session):
+    assert apply_changes([Change("", RESYNC)])
+    assert st.session_state.convos is None
+
+
+def test_pushed_rows_patch_the_list(session):
+    row = {"id": "b", "name": "B", "updated_at": "2026-01-02T00:00:00+00:00", "agent_config": {}}
+
+    assert apply_changes([Change("conversations", "INSERT", row)])
+    assert [c["id"] for c in st.session_state.convos] == ["b", "a"]
+    assert "agent_config" not in st.session_state.convos[0]
+    # The same row again changes nothing
+    assert not apply_changes([Change("conversations", "UPDATE", row)])
+    assert apply_changes([Change("conversations", "DELETE", old_record={"id": "a"})])
+    assert [c["id"] for c in st.session_state.convos] == ["b"]
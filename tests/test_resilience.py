@@ -0,0 +1,166 @@
+# /tests/test_resilience.py
+
+import socket
+import threading
+import time
+
+import pytest
+import requests
+
+from src.utils.resilience import CircuitBreaker, CircuitOpenError, ResilienceConfig, TurnRouter
+
+
+class DroppingServer:
+    """
+    Accepts connections, reads a whole request and closes the connection without answering, as a
+    server that crashed after taking the request would.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self._socket = socket.create_server(("127.0.0.1", 0))
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._socket.getsockname()[1]}"
+
+    def _serve(self):
+        while True:
+            connection, _ = self._socket.accept()
+            with connection:
+                data = b""
+                while b"\r\n\r\n" not in data:
+                    data += connection.recv(65536)
+                head, _, body = data.partition(b"\r\n\r\n")
+                length = next(
+                    int(line.split(b":", 1)[1]) for line in head.split(b"\r\n")
+                    if line.lower().startswith(b"content-length:")
+                )
+                while len(body) < length:
+                    body += connection.recv(65536)
+                self.requests += 1
+
+
+def _closed_port_url() -> str:
+    with socket.create_server(("127.0.0.1", 0)) as s:
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+def _post(base_url: str):
+    response = requests.post(f"{base_url}/turn", json={"user_message": "hi"}, timeout=(1, 2))
+    response.raise_for_status()
+    return response.json()
+
+
+def test_dropped_connection_after_send_is_not_resent():
+    primary, fallback = DroppingServer(), DroppingServer()
+    router = TurnRouter([primary.url, fallback.url], ResilienceConfig(retries=2, backoff=0, idempotency_keys=False))
+
+    with pytest.raises(requests.ConnectionError):
+        router.call(_post)
+    assert primary.requests + fallback.requests == 1
+
+
+def test_dropped_connection_is_resent_with_idempotency_keys():
+    primary = DroppingServer()
+    router = TurnRouter([primary.url], ResilienceConfig(retries=2, backoff=0, idempotency_keys=True))
+
+    with pytest.raises(requests.ConnectionError):
+        router.call(_post)
+    assert primary.requests == 3
+
+
+def test_refused_connection_is_retried_but_not_failed_over():
+    fallback = DroppingServer()
+    router = TurnRouter([_closed_port_url(), fallback.url], ResilienceConfig(retries=2, backoff=0, breaker_failures=5))
+    sent = []
+
+    def send(base_url: str):
+        sent.append(base_url)
+        return _post(base_url)
+
+    with pytest.raises(requests.ConnectionError):
+        router.call(send)
+    # Retried on the preferred endpoint, whose circuit is still closed, never sent to the fallback
+    assert len(sent) == 3 and fallback.requests == 0
+
+
+def test_breaker_opens_then_lets_one_trial_through():
+    breaker = CircuitBreaker(failures=2, reset=0.1)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    time.sleep(0.1)
+    assert breaker.allow() and not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.1)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def _turn_sender(convo_id: str, key: str, delays: list | None = None):
+    def send(base_url: str):
+        if delays:
+            time.sleep(delays.pop(0))
+        response = requests.post(
+            f"{base_url}/conversations/{convo_id}/turn",
+            headers={"Idempotency-Key": key},
+            json={"user_message": "hi"},
+            timeout=(1, 5),
+        )
+        response.raise_for_status()
+        return response.json()
+    return send
+
+
+def test_open_breaker_fails_over_to_the_fallback(fake_backend):
+    convo_id = next(iter(fake_backend.state.conversations))
+    primary, fallback = _closed_port_url(), f"{fake_backend.url}/api"
+    router = TurnRouter([primary, fallback], ResilienceConfig(retries=2, backoff=0, breaker_failures=3, breaker_reset=60))
+    sent = []
+    post = _turn_sender(convo_id, "turn-1")
+
+    def send(base_url: str):
+        sent.append(base_url)
+        return post(base_url)
+
+    # The retries open the preferred endpoint's circuit, the turn then goes to the fallback
+    assert router.call(send)["assistant_response"].startswith("You said: hi.")
+    assert sent == [primary] * 3 + [fallback]
+    assert router.breakers[primary].state == "open"
+    # While it stays open the preferred endpoint is skipped
+    router.call(send)
+    assert sent[4:] == [fallback]
+    assert len(fake_backend.state.turns[convo_id]) == 5
+
+
+def test_every_endpoint_open_fails_fast():
+    router = TurnRouter([_closed_port_url()], ResilienceConfig(retries=0, breaker_failures=1, breaker_reset=60))
+    with pytest.raises(requests.ConnectionError):
+        router.call(_post)
+    with pytest.raises(CircuitOpenError):
+        router.call(_post)
+
+
+def test_slow_attempt_is_hedged_and_recorded_once(fake_backend):
+    convo_id = next(iter(fake_backend.state.conversations))
+    router = TurnRouter(
+        [f"{fake_backend.url}/api"],
+        ResilienceConfig(hedge=True, hedge_after=0.1, idempotency_keys=True, fallback=False),
+    )
+    # The first copy stalls before it is sent, the hedged copy answers
+    send = _turn_sender(convo_id, "turn-1", delays=[1.0, 0])
+
+    started = time.monotonic()
+    reply = router.call(send)
+    assert time.monotonic() - started < 0.8
+    assert reply["assistant_response"].startswith("You said: hi.")
+    time.sleep(1.2)
+    # The stalled copy carried the same idempotency key and was not recorded again
+    assert len(fake_backend.state.turns[convo_id]) == 5
@@ -0,0 +1,62 @@
+# /tests/test_single_flight.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.utils.backend import SingleFlight
+
+
+def _slow(result, calls: list, delay: float = 0.2):
+    def fn():
+        calls.append(1)
+        time.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return fn
+
+
+def test_concurrent_callers_share_one_call():
+    flight, calls = SingleFlight(), []
+    fn = _slow({"rows": [1, 2]}, calls)
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: flight.do(("user", "convos", None), fn), range(4)))
+
+    assert len(calls) == 1 and flight.coalesced == 3
+    assert all(result == {"rows": [1, 2]} for result in results)
+    # Waiters get copies, changing one result leaves the others alone
+    assert len({id(result) for result in results}) == 4
+
+
+def test_failure_reaches_every_waiter():
+    flight, calls = SingleFlight(), []
+    fn = _slow(ValueError("down"), calls)
+    with ThreadPoolExecutor(3) as pool:
+        futures = [pool.submit(flight.do, ("user", "convos", None), fn) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result()
+    assert len(calls) == 1
+
+
+def test_finished_calls_and_forgotten_keys_start_fresh():
+    flight, calls = SingleFlight(), []
+    flight.do(("user", "convos", None), _slow("first", calls, 0))
+    assert flight.do(("user", "convos", None), _slow("second", calls, 0)) == "second"
+
+    started = threading.Event()
+
+    def blocked():
+        started.set()
+        time.sleep(0.3)
+        return "stale"
+
+    with ThreadPoolExecutor(1) as pool:
+        stale = pool.submit(flight.do, ("user", "turns", "convo"), blocked)
+        started.wait()
+        flight.forget("user", "turns")
+        assert flight.do(("user", "turns", "convo"), _slow("fresh", calls, 0)) == "fresh"
+    assert stale.result() == "stale"
@@ -0,0 +1,47 @@
+# /tests/test_streaming.py
+
+from src.utils.backend import _iter_sse_data, _sse_text, stream_llm_dev
+
+
+class FakeLines:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+def _first_convo(fake_backend) -> dict:
+    return next(iter(fake_backend.state.conversations.values()))
+
+
+def test_sse_events_are_split_on_blank_lines():
+    lines = ["data: one", "", ": comment", "data: two", "data:three", "", "event: ping", "", "data: tail"]
+    assert list(_iter_sse_data(FakeLines(lines))) == ["one", "two\nthree", "tail"]
+
+
+def test_sse_payloads():
+    assert _sse_text('{"delta": " word"}') == " word"
+    assert _sse_text('"plain"') == "plain"
+    assert _sse_text("not json") == "not json"
+    assert _sse_text("[DONE]") is None
+
+
+def test_turn_is_streamed_in_chunks(fake_backend, jwt):
+    convo = _first_convo(fake_backend)
+    chunks = list(stream_llm_dev(convo["id"], "hello", convo["agent_config"], jwt))
+
+    turns = fake_backend.state.turns[convo["id"]]
+    assert len(chunks) > 1
+    assert "".join(chunks) == turns[-1]["assistant_response"]
+    assert len(turns) == 5
+
+
+def test_server_without_streaming_falls_back_to_one_response(fake_backend, jwt):
+    fake_backend.config.stream_turns = False
+    convo = _first_convo(fake_backend)
+    chunks = list(stream_llm_dev(convo["id"], "hello", convo["agent_config"], jwt))
+
+    turns = fake_backend.state.turns[convo["id"]]
+    assert chunks == [turns[-1]["assistant_response"]]
+    assert len(turns) == 5
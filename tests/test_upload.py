@@ -0,0 +1,64 @@
+# /tests/test_upload.py
+
+import io
+import os
+
+import pytest
+
+from src.utils.upload import UPLOAD_CHUNK_SIZE, upload_file_resumable
+
+ACCOUNT = "account-1"
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _plan(chunks: float = 2.5) -> io.BytesIO:
+    return io.BytesIO(os.urandom(int(UPLOAD_CHUNK_SIZE * chunks)))
+
+
+def _upload(fake_backend, file, on_progress=None) -> dict:
+    return upload_file_resumable(file, "plan.pdf", ACCOUNT, fake_backend.url, {}, on_progress=on_progress)
+
+
+def _stop_after_first_chunk(offset: int, size: int):
+    raise Interrupted
+
+
+def test_interrupted_upload_resumes_where_it_stopped(fake_backend):
+    plan = _plan()
+    with pytest.raises(Interrupted):
+        _upload(fake_backend, plan, _stop_after_first_chunk)
+
+    progress = []
+    result = _upload(fake_backend, plan, lambda offset, size: progress.append(offset))
+
+    # The first chunk is not sent again
+    assert progress == [2 * UPLOAD_CHUNK_SIZE, len(plan.getvalue())]
+    assert not result["skipped"]
+    assert fake_backend.state.objects[f"ndis-plans/{ACCOUNT}/plan.pdf"] == plan.getvalue()
+
+
+def test_upload_the_server_forgot_starts_over(fake_backend):
+    plan = _plan()
+    with pytest.raises(Interrupted):
+        _upload(fake_backend, plan, _stop_after_first_chunk)
+    fake_backend.state.uploads.clear()
+
+    progress = []
+    _upload(fake_backend, plan, lambda offset, size: progress.append(offset))
+    assert progress[0] == UPLOAD_CHUNK_SIZE
+    assert fake_backend.state.objects[f"ndis-plans/{ACCOUNT}/plan.pdf"] == plan.getvalue()
+
+
+def test_same_content_is_uploaded_once(fake_backend):
+    plan = _plan(0.5)
+    assert not _upload(fake_backend, plan)["skipped"]
+    fake_backend.state.objects.clear()
+
+    again = _upload(fake_backend, io.BytesIO(plan.getvalue()))
+    assert again["skipped"] and again["object"] == f"{ACCOUNT}/plan.pdf"
+    assert not fake_backend.state.objects
+    # A different file is uploaded
+    assert not _upload(fake_backend, _plan(0.5))["skipped"]